@@ -0,0 +1,344 @@
+import os
+
+# Um único chamador: os lotes vão direto ao modelo, sem a thread do EmbeddingBatcher
+os.environ.setdefault("EMBEDDING_BATCHING", "false")
+
+import argparse
+import json
+import multiprocessing
+import signal
+import sys
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Deque, Dict, Iterator, List, Optional, Set
+
+# Objetos de cada processo de parsing, criados no initializer
+_WORKER: Dict[str, Any] = {}
+
+
+def find_pdfs(root: str) -> Iterator[str]:
+    """PDFs da árvore de diretórios, em ordem estável (a retomada revisita os mesmos arquivos)"""
+    if os.path.isfile(root):
+        yield root
+        return
+    for directory, subdirectories, files in os.walk(root):
+        subdirectories.sort()
+        for name in sorted(files):
+            if name.lower().endswith(".pdf"):
+                yield os.path.join(directory, name)
+
+
+def _init_worker(store_dir: str, max_file_mb: float) -> None:
+    # Ctrl+C é tratado pelo processo principal, que cancela o que está na fila
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    # Um processo de páginas por worker de parsing, em vez do pool padrão da API
+    os.environ["PDF_PAGE_WORKERS"] = "1"
+    from api.services.extractors.pdf_extractor import PDFExtractor
+    from api.services.extractors.text_analyzer import TextAnalyzer
+    from api.services.storage.document_indexer import DocumentIndexer
+    from api.services.storage.document_store import DocumentStore
+
+    store = DocumentStore(store_dir)
+    extractor = PDFExtractor()
+    extractor.max_file_size = int(max_file_mb * 1024 * 1024)
+    _WORKER.update(
+        store=store,
+        extractor=extractor,
+        analyzer=TextAnalyzer(),
+        # Só chunking e deduplicação: o modelo de embeddings fica no processo principal
+        indexer=DocumentIndexer(None, store)
+    )
+
+
+def _parse(path: str, root: str, profile: Optional[str]) -> Dict[str, Any]:
+    """Hash, extração, análise e chunking de um PDF (roda no pool)"""
+    from io import BytesIO
+
+    start = time.perf_counter()
+    result: Dict[str, Any] = {"path": path}
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+        result["bytes"] = len(data)
+        document_id = _WORKER["store"].compute_document_id(data)
+        result["document_id"] = document_id
+        if _WORKER["store"].exists(document_id):
+            result["status"] = "skipped"
+            return result
+
+        doc_info = _WORKER["extractor"].extract(BytesIO(data), profile)
+        doc_info["document_id"] = document_id
+        doc_info["metadata"]["filename"] = os.path.basename(path)
+        doc_info["metadata"]["source_path"] = os.path.relpath(path, root)
+        analysis = _WORKER["analyzer"].analyze_content(doc_info["content"], doc_info["sections"])
+        pieces = _WORKER["indexer"].prepare(doc_info)
+        result.update(
+            status="parsed",
+            doc_info=doc_info,
+            analysis=analysis,
+            pieces=pieces,
+            pages=doc_info["metadata"].get("total_pages", 0),
+            degraded_pages=len(doc_info["metadata"].get("degraded_pages", []))
+        )
+    except Exception as e:
+        result.update(status="failed", error=f"{type(e).__name__}: {str(e)}")
+    finally:
+        result["parse_seconds"] = time.perf_counter() - start
+    return result
+
+
+class BulkIngestor:
+    """
+    Ingestão offline de uma árvore de PDFs no mesmo DocumentStore da API.
+    O parsing (extração, análise e chunking) roda em um pool de processos;
+    o processo principal junta os trechos de vários documentos em lotes de
+    embedding e grava cada documento. Documentos já presentes no store
+    (pelo SHA-256 do conteúdo) são pulados, então uma execução interrompida
+    é retomada de onde parou
+    """
+
+    def __init__(
+        self,
+        root: str,
+        store_dir: str,
+        workers: int = 2,
+        embed_batch: int = 512,
+        profile: Optional[str] = None,
+        max_file_mb: float = 10.0
+    ):
+        from api.services.embeddings.embedding_provider import get_embeddings
+        from api.services.storage.document_indexer import DocumentIndexer
+        from api.services.storage.document_store import DocumentStore
+
+        self.root = root
+        self.store = DocumentStore(store_dir)
+        self.indexer = DocumentIndexer(get_embeddings(), self.store)
+        self.workers = max(1, workers)
+        self.embed_batch = max(1, embed_batch)
+        self.profile = profile
+        self.max_file_mb = max_file_mb
+        self._buffer: List[Dict[str, Any]] = []
+        self._seen: Set[str] = set()
+        self.ingested: List[str] = []
+        self.failures: List[Dict[str, str]] = []
+        self.totals = {
+            "files": 0, "ingested": 0, "skipped": 0, "duplicates": 0, "failed": 0,
+            "bytes": 0, "pages": 0, "degraded_pages": 0, "chunks": 0,
+            "parse_seconds": 0.0, "embed_seconds": 0.0, "save_seconds": 0.0
+        }
+
+    def _collect(self, result: Dict[str, Any]) -> None:
+        self.totals["files"] += 1
+        self.totals["parse_seconds"] += result["parse_seconds"]
+        status = result["status"]
+        if status == "failed":
+            self.totals["failed"] += 1
+            self.failures.append({"path": result["path"], "error": result["error"]})
+            print(f"Falha: {result['path']}: {result['error']}")
+        elif status == "skipped":
+            self.totals["skipped"] += 1
+        elif result["document_id"] in self._seen:
+            # Mesmo conteúdo com outro nome na mesma execução
+            self.totals["duplicates"] += 1
+        else:
+            self._seen.add(result["document_id"])
+            self._buffer.append(result)
+            if sum(len(item["pieces"]) for item in self._buffer) >= self.embed_batch:
+                self._flush()
+
+    def _flush(self) -> None:
+        """Um lote de embedding com os trechos de todos os documentos do buffer"""
+        if not self._buffer:
+            return
+        batch, self._buffer = self._buffer, []
+        chunks = [text for item in batch for _, text in item["pieces"]]
+        start = time.perf_counter()
+        try:
+            vectors = self.indexer.embeddings.embed_documents(chunks) if chunks else []
+        except Exception as e:
+            for item in batch:
+                self.totals["failed"] += 1
+                self.failures.append({"path": item["path"], "error": f"embedding: {str(e)}"})
+            print(f"Erro no lote de embedding ({len(batch)} documentos): {str(e)}")
+            return
+        self.totals["embed_seconds"] += time.perf_counter() - start
+
+        start = time.perf_counter()
+        offset = 0
+        for item in batch:
+            count = len(item["pieces"])
+            try:
+                self.indexer.persist(
+                    item["document_id"], item["doc_info"], item["pieces"],
+                    vectors[offset:offset + count], item["analysis"]
+                )
+            except Exception as e:
+                self.totals["failed"] += 1
+                self.failures.append({"path": item["path"], "error": f"gravação: {str(e)}"})
+                print(f"Falha ao gravar {item['path']}: {str(e)}")
+            else:
+                self.totals["ingested"] += 1
+                self.totals["bytes"] += item["bytes"]
+                self.totals["pages"] += item["pages"]
+                self.totals["degraded_pages"] += item["degraded_pages"]
+                self.totals["chunks"] += count
+                self.ingested.append(item["document_id"])
+            offset += count
+        self.totals["save_seconds"] += time.perf_counter() - start
+
+    def _executor(self) -> ProcessPoolExecutor:
+        # spawn: os workers não herdam o modelo nem threads do processo principal
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.store.base_dir, self.max_file_mb)
+        )
+
+    def run(self) -> Dict[str, Any]:
+        paths: Deque[str] = deque(find_pdfs(self.root))
+        total = len(paths)
+        print(f"{total} PDFs em {self.root}; store em {self.store.base_dir}")
+        start = time.perf_counter()
+        interrupted = False
+        executor = self._executor()
+        running: Dict[Future, str] = {}
+        # Um worker que morre (ex.: falha nativa no parser) quebra o pool inteiro:
+        # os arquivos em voo são refeitos uma vez em um pool novo
+        retried: Set[str] = set()
+        progress = 0
+        try:
+            while paths or running:
+                # Poucos documentos em voo: o texto extraído não se acumula na memória
+                while paths and len(running) < 2 * self.workers:
+                    path = paths.popleft()
+                    running[executor.submit(_parse, path, self.root, self.profile)] = path
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                broken = False
+                for future in done:
+                    path = running.pop(future)
+                    try:
+                        self._collect(future.result())
+                    except BrokenProcessPool:
+                        broken = True
+                        if path in retried:
+                            self._collect({"path": path, "status": "failed", "error": "worker de parsing morreu", "parse_seconds": 0.0})
+                        else:
+                            retried.add(path)
+                            paths.appendleft(path)
+                if broken:
+                    for future, path in running.items():
+                        retried.add(path)
+                        paths.appendleft(path)
+                    running.clear()
+                    executor.shutdown(wait=False)
+                    executor = self._executor()
+                if not running:
+                    self._flush()
+                if self.totals["files"] // 100 > progress:
+                    progress = self.totals["files"] // 100
+                    print(f"{self.totals['files']}/{total} arquivos, {self.totals['ingested']} ingeridos")
+            self._flush()
+        except KeyboardInterrupt:
+            interrupted = True
+            print("Interrompido: gravando os documentos já processados")
+            executor.shutdown(wait=False, cancel_futures=True)
+            self._flush()
+        finally:
+            executor.shutdown(wait=not interrupted, cancel_futures=True)
+        return self.report(time.perf_counter() - start, total, interrupted)
+
+    def report(self, seconds: float, total: int, interrupted: bool) -> Dict[str, Any]:
+        totals = self.totals
+        return {
+            **totals,
+            "found": total,
+            "interrupted": interrupted,
+            "seconds": seconds,
+            "files_per_second": totals["files"] / seconds if seconds else 0.0,
+            "pages_per_second": totals["pages"] / seconds if seconds else 0.0,
+            "chunks_per_second": totals["chunks"] / seconds if seconds else 0.0,
+            "mb_per_second": totals["bytes"] / 1e6 / seconds if seconds else 0.0,
+            "failures": self.failures
+        }
+
+
+def summarize_sections(store_dir: str, document_ids: List[str], concurrency: int) -> None:
+    """Resumos de seção dos documentos ingeridos (busca em dois estágios); usa o LLM"""
+    import asyncio
+
+    from api.services.embeddings.embedding_provider import get_embeddings
+    from api.services.llm.llm_service import LLMService
+    from api.services.storage.document_store import DocumentStore
+    from api.services.storage.section_summarizer import SectionSummarizer
+
+    summarizer = SectionSummarizer(
+        LLMService(),
+        get_embeddings(),
+        DocumentStore(store_dir),
+        concurrency=concurrency,
+        min_sections=int(os.getenv("SECTION_SUMMARY_MIN_SECTIONS", "4"))
+    )
+
+    async def run() -> None:
+        await asyncio.gather(*(
+            summarizer.summarize(document_id)
+            for document_id in document_ids
+            if summarizer.needs_summaries(document_id)
+        ))
+
+    asyncio.run(run())
+
+
+def print_report(report: Dict[str, Any], failures: int = 20) -> None:
+    print(f"\nArquivos: {report['files']}/{report['found']}  ingeridos: {report['ingested']}  "
+          f"já no store: {report['skipped']}  duplicados: {report['duplicates']}  falhas: {report['failed']}")
+    print(f"Tempo: {report['seconds']:.1f} s  ({report['files_per_second']:.2f} arquivos/s, "
+          f"{report['pages_per_second']:.1f} páginas/s, {report['chunks_per_second']:.1f} trechos/s, "
+          f"{report['mb_per_second']:.2f} MB/s)")
+    print(f"Parsing (soma dos workers): {report['parse_seconds']:.1f} s  embedding: {report['embed_seconds']:.1f} s  "
+          f"gravação: {report['save_seconds']:.1f} s  páginas degradadas: {report['degraded_pages']}")
+    for failure in report["failures"][:failures]:
+        print(f"  {failure['path']}: {failure['error']}")
+    if len(report["failures"]) > failures:
+        print(f"  ... mais {len(report['failures']) - failures} falhas (veja --report)")
+    if report["interrupted"]:
+        print("Execução interrompida: rode de novo para continuar de onde parou")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingestão offline de uma árvore de PDFs no store da API")
+    parser.add_argument("root", help="Diretório (ou arquivo) com os PDFs")
+    parser.add_argument("--store-dir", default=os.getenv("DOCUMENT_STORE_DIR", "data/documents"))
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) - 1), help="Processos de parsing")
+    parser.add_argument("--embed-batch", type=int, default=512, help="Trechos por lote de embedding")
+    parser.add_argument("--profile", choices=["accurate", "fast", "auto"], help="Perfil de extração (padrão: PDF_EXTRACTION_PROFILE)")
+    parser.add_argument("--max-file-mb", type=float, default=10.0)
+    parser.add_argument("--section-summaries", action="store_true", help="Gera os resumos de seção no final (usa o LLM)")
+    parser.add_argument("--report", help="Arquivo JSON com o relatório completo")
+    args = parser.parse_args()
+
+    ingestor = BulkIngestor(
+        args.root,
+        args.store_dir,
+        workers=args.workers,
+        embed_batch=args.embed_batch,
+        profile=args.profile,
+        max_file_mb=args.max_file_mb
+    )
+    report = ingestor.run()
+    if args.section_summaries and ingestor.ingested:
+        start = time.perf_counter()
+        summarize_sections(args.store_dir, ingestor.ingested, int(os.getenv("SECTION_SUMMARY_CONCURRENCY", "2")))
+        report["summary_seconds"] = time.perf_counter() - start
+    print_report(report)
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+    sys.exit(1 if report["failed"] else 0)
+
+
+if __name__ == "__main__":
+    main()
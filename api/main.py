@@ -1,20 +1,114 @@
-from fastapi import FastAPI, File, UploadFile, HTTPException, Query
+from fastapi import FastAPI, File, UploadFile, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from typing import Dict, Optional
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional
 import asyncio
+import json
+import os
+import time
 
-from api.services.extractors.pdf_extractor import PDFExtractor
-from api.services.extractors.text_analyzer import TextAnalyzer
-from api.services.agents.agent_orchestrator import AgentOrchestrator
-from api.models.state import ConversationState, DocumentInfo
-from api.models.responses import (
-    HealthResponse,
-    ChatResponse,
-    ProcessPDFResponse,
-    ConversationHistoryResponse
-)
+from api.services.monitoring.startup import startup_report
+
+with startup_report.phase("api.services", "import"):
+    from api.services.extractors.pdf_extractor import PDFExtractor
+    from api.services.extractors.text_analyzer import TextAnalyzer
+    from api.services.agents.agent_orchestrator import AgentOrchestrator
+    from api.services.embeddings.embedding_provider import get_embeddings
+    from api.services.storage.document_store import (
+        DocumentStore,
+        enforce_memory_budget,
+        memory_budget,
+        memory_consumers,
+        open_documents,
+        register_memory_consumer
+    )
+    from api.services.storage.document_indexer import DocumentIndexer
+    from api.services.storage.section_summarizer import get_section_summarizer
+    from api.services.llm.llm_service import LLMService
+    from api.services.monitoring.metrics import (
+        registry,
+        time_stage,
+        record_cache,
+        REQUEST_LATENCY,
+        SLOW_REQUESTS,
+        STRATEGY_OUTCOMES,
+        IN_FLIGHT,
+        MEMORY_BYTES
+    )
+    from api.services.monitoring.tracing import trace_recorder, span
+    from api.services.monitoring.profiler import SamplingProfiler
+    from api.services.concurrency.cancellation import run_cancellable, iterate_cancellable, RequestCancelled
+    from api.services.concurrency.admission import AdmissionController, Overloaded, per_worker_limit
+    from api.services.concurrency.conversation_locks import ConversationLocks, RequestCoalescer
+    from api.services.concurrency.scheduler import work_class, INTERACTIVE, PRIORITIES
+    from api.services.memory.message_history import MessageHistory
+    from api.services.memory.conversation_memory import state_memory_usage
+    from api.models.state import ConversationState, DocumentInfo
+    from api.models.responses import (
+        HealthResponse,
+        ChatResponse,
+        ProcessPDFResponse,
+        ConversationHistoryResponse,
+        CreateConversationRequest,
+        ConversationResponse,
+        DocumentResponse,
+        AskBatchRequest,
+        BatchAnswer,
+        BatchSummary
+    )
+
+def _warmup() -> None:
+    """
+    Fase explícita de aquecimento: importa as dependências pesadas, carrega
+    o modelo de embeddings e valida um embedding de teste antes do /ready
+    """
+    try:
+        with startup_report.phase("pdfplumber", "import"):
+            import pdfplumber
+        with startup_report.phase("faiss", "import"):
+            import faiss
+        with startup_report.phase("langchain_openai", "import"):
+            import langchain_openai
+        with startup_report.phase("llm_client", "model"):
+            for agent in agent_orchestrator.agents:
+                agent.llm.llm
+        with startup_report.phase("tokenizer", "model"):
+            agent_orchestrator.agents[0].llm.tokens.encoding
+
+        embeddings = get_embeddings()
+        embeddings.load()
+        with startup_report.phase("dummy_embed", "warmup"):
+            if not embeddings.embed_query("aquecimento do modelo"):
+                raise RuntimeError("Embedding de aquecimento vazio")
+
+        startup_report.mark_ready()
+        print(f"Aplicação pronta em {startup_report.ready_at:.2f} segundos")
+    except Exception as e:
+        startup_report.mark_failed(str(e))
+        print(f"Erro no aquecimento: {str(e)}")
 
-app = FastAPI(title="PDF Chat API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Processos de extração de páginas: um conjunto por processo do servidor, nunca herdado por fork
+    if pdf_extractor.page_workers is not None:
+        await asyncio.to_thread(pdf_extractor.page_workers.start)
+    # O servidor aceita conexões (/health) enquanto o aquecimento roda em segundo plano
+    if os.getenv("WARMUP_ON_STARTUP", "true").lower() == "true":
+        app.state.warmup_task = asyncio.create_task(asyncio.to_thread(_warmup))
+    else:
+        startup_report.mark_ready()
+    yield
+
+app = FastAPI(title="PDF Chat API", lifespan=lifespan)
+
+# Endpoints com trace por requisição; ?profile=1 só é aceito em modo de depuração
+TRACED_ENDPOINTS = {"process-pdf", "chat", "conversations"}
+PROFILING_ENABLED = os.getenv("DEBUG_PROFILING", "false").lower() == "true"
+
+# Prazo do servidor por endpoint (0 desativa); a UI lê as mesmas variáveis e espera 5 s a mais
+CHAT_TIMEOUT = float(os.getenv("CHAT_TIMEOUT_SECONDS", "30"))
+PROCESS_PDF_TIMEOUT = float(os.getenv("PROCESS_PDF_TIMEOUT_SECONDS", "65"))
 
 # CORS middleware
 app.add_middleware(
@@ -25,73 +119,343 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def track_requests(request: Request, call_next):
+    """Mede a duração, as requisições em andamento e o trace de cada endpoint"""
+    if request.url.path == "/metrics":
+        return await call_next(request)
+    start = time.perf_counter()
+    endpoint = request.url.path.split("/")[1]
+    # Rotas desconhecidas são agrupadas para não criar séries sem limite
+    if endpoint not in _ENDPOINTS:
+        endpoint = "other"
+
+    if endpoint not in TRACED_ENDPOINTS or not trace_recorder.enabled:
+        with IN_FLIGHT.track(endpoint=endpoint):
+            response = await call_next(request)
+        REQUEST_LATENCY.observe(time.perf_counter() - start, endpoint=endpoint)
+        return response
+
+    profile = PROFILING_ENABLED and request.query_params.get("profile") == "1"
+    profiler = SamplingProfiler().start() if profile else None
+    with IN_FLIGHT.track(endpoint=endpoint), trace_recorder.trace(
+        f"{request.method} /{endpoint}", path=request.url.path
+    ) as trace:
+        response = await call_next(request)
+        trace.root.attributes["status"] = response.status_code
+        if profiler is not None:
+            # Consome a resposta para devolvê-la junto com o trace e o profile
+            body = b"".join([chunk async for chunk in response.body_iterator])
+    REQUEST_LATENCY.observe(time.perf_counter() - start, endpoint=endpoint)
+    trace_recorder.record(trace)
+
+    if profiler is not None:
+        profiler.stop()
+        try:
+            content = json.loads(body)
+        except ValueError:
+            content = body.decode("utf-8", errors="replace")
+        return JSONResponse(
+            status_code=response.status_code,
+            content={"response": content, "trace": trace.to_dict(), "profile": profiler.to_dict()},
+            headers={"X-Trace-Id": trace.trace_id}
+        )
+    response.headers["X-Trace-Id"] = trace.trace_id
+    return response
+
 # Serviços
 pdf_extractor = PDFExtractor()
 text_analyzer = TextAnalyzer()
 agent_orchestrator = AgentOrchestrator()
+document_store = DocumentStore()
+document_indexer = DocumentIndexer(get_embeddings(), document_store)
+# Resumos de seção em segundo plano (SECTION_SUMMARIES=true), para a busca em dois estágios
+section_summarizer = get_section_summarizer(LLMService(), get_embeddings(), document_store)
+
+# Concorrência do /chat: um turno por conversa, perguntas idênticas simultâneas
+# viram um único turno e o total de turnos é limitado pelo SLO de latência (RNF02)
+CHAT_LATENCY_SLO = float(os.getenv("CHAT_LATENCY_SLO_SECONDS", "5"))
+conversation_locks = ConversationLocks("chat", max_wait=CHAT_LATENCY_SLO)
+chat_coalescer = RequestCoalescer("chat")
+chat_admission = AdmissionController(
+    "chat",
+    # Limite global: com API_WORKERS > 1, cada worker fica com a sua parte
+    max_concurrent=per_worker_limit(int(os.getenv("CHAT_MAX_CONCURRENT", "16"))),
+    latency_slo=CHAT_LATENCY_SLO
+)
+
+# Lotes de perguntas fixas (/documents/{id}/ask-batch): fora do histórico das conversas e,
+# por padrão, com prioridade de fundo no LLM e nos embeddings para não atrasar o /chat
+ASK_BATCH_MAX_QUESTIONS = int(os.getenv("ASK_BATCH_MAX_QUESTIONS", "100"))
+ASK_BATCH_TIMEOUT = float(os.getenv("ASK_BATCH_TIMEOUT_SECONDS", "300"))
+ASK_BATCH_PRIORITY = os.getenv("ASK_BATCH_PRIORITY", "background")
+if ASK_BATCH_PRIORITY not in PRIORITIES:
+    raise ValueError(f"ASK_BATCH_PRIORITY inválida: {ASK_BATCH_PRIORITY}")
 
 # Estado global (em produção, usar banco de dados)
 CONVERSATION_STATES: Dict[str, ConversationState] = {}
 
+# Índice persistido conversa -> documentos, usado para restaurar conversas após reinício
+CONVERSATION_DOCUMENTS: Dict[str, List[str]] = document_store.load_conversations()
+
+# As conversas contam no orçamento global de memória (MEMORY_BUDGET_MB); quem
+# cede espaço são os documentos abertos menos usados, que voltam do disco
+register_memory_consumer(
+    "conversations",
+    lambda: sum(sum(state_memory_usage(state).values()) for state in list(CONVERSATION_STATES.values()))
+)
+
+def _new_conversation_state(doc_info: DocumentInfo, document_ids: List[str]) -> ConversationState:
+    """Cria o estado inicial de uma conversa"""
+    return {
+        "document": doc_info,
+        "document_ids": document_ids,
+        "sources": [],
+        "conversation_history": MessageHistory(),
+        "current_question": "",
+        "web_results": [],
+        "selected_strategy": "",
+        "answer_path": "",
+        "answer": None,
+        "error": None
+    }
+
+def _get_conversation_state(conversation_id: str) -> Optional[ConversationState]:
+    """Retorna o estado da conversa, restaurando do disco se necessário"""
+    state = CONVERSATION_STATES.get(conversation_id)
+    record_cache("conversation_state", state is not None)
+    if state is None:
+        if conversation_id not in CONVERSATION_DOCUMENTS:
+            # Pode ter sido criada por outro worker depois que este carregou o índice
+            CONVERSATION_DOCUMENTS.update(document_store.load_conversations())
+        document_ids = [
+            document_id for document_id in CONVERSATION_DOCUMENTS.get(conversation_id, [])
+            if document_store.exists(document_id)
+        ]
+        if not document_ids:
+            return None
+        doc_info = document_store.load(document_ids[0]).to_document_info()
+        state = CONVERSATION_STATES.setdefault(
+            conversation_id,
+            _new_conversation_state(doc_info, document_ids)
+        )
+    return state
+
+def _cancelled_response(error: RequestCancelled) -> JSONResponse:
+    """Resposta de uma requisição cancelada: 504 no prazo do servidor, 499 na desconexão"""
+    if error.reason == "timeout":
+        # Mesmo corpo de um HTTPException(504), mas devolvido: quem chama só retorna a resposta
+        return JSONResponse(status_code=504, content={"detail": "Tempo limite de processamento excedido"})
+    # O cliente já desconectou: ninguém vai ler esta resposta
+    return JSONResponse(status_code=499, content={"detail": "Cliente desconectou"})
+
+def _create_conversation(doc_info: DocumentInfo, document_ids: List[str]) -> str:
+    """Registra uma nova conversa sobre um conjunto de documentos"""
+    conversation_id, conversations = document_store.add_conversation(document_ids)
+    CONVERSATION_DOCUMENTS.update(conversations)
+    CONVERSATION_STATES[conversation_id] = _new_conversation_state(doc_info, CONVERSATION_DOCUMENTS[conversation_id])
+    return conversation_id
+
 @app.get("/health", response_model=HealthResponse)
 async def health_check():
     """Endpoint de health check"""
     return HealthResponse(status="ok")
 
+@app.get("/ready", response_model=HealthResponse, responses={503: {"model": HealthResponse}})
+async def readiness_check():
+    """Indica se os modelos foram carregados e o embedding de teste funcionou"""
+    if startup_report.ready:
+        return HealthResponse(status="ready")
+    status = "error" if startup_report.error else "starting"
+    return JSONResponse(status_code=503, content={"status": status})
+
+@app.get("/startup-report")
+async def get_startup_report():
+    """Tempo de cold start por fase: imports, carga de modelos e aquecimento"""
+    return startup_report.to_dict()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Métricas no formato texto do Prometheus"""
+    _memory_snapshot()
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/traces")
+async def list_traces(
+    slow: bool = Query(False, description="Apenas requisições acima do limite"),
+    limit: int = Query(50, ge=1, le=500)
+):
+    """Traces recentes (ring buffer), do mais novo para o mais antigo"""
+    return {
+        "slow_threshold_seconds": trace_recorder.slow_threshold,
+        "traces": trace_recorder.list(slow_only=slow, limit=limit)
+    }
+
+@app.get("/traces/{trace_id}")
+async def get_trace(trace_id: str):
+    """Árvore de spans de uma requisição, em JSON"""
+    trace = trace_recorder.get(trace_id)
+    if trace is None:
+        raise HTTPException(404, "Trace não encontrado")
+    return trace.to_dict()
+
+def _memory_snapshot():
+    """Memória por documento aberto e por conversa; atualiza os gauges de memória"""
+    documents = []
+    for stored in open_documents():
+        usage = stored.memory_usage()
+        documents.append({
+            "document_id": stored.document_id,
+            "name": stored.name,
+            "mapped_bytes": usage["mapped"],
+            "heap_bytes": usage["heap"],
+            "indexes": sorted(stored.indexes),
+            "last_access": stored.last_access
+        })
+    conversations = []
+    for conversation_id, state in list(CONVERSATION_STATES.items()):
+        usage = state_memory_usage(state)
+        conversations.append({
+            "conversation_id": conversation_id,
+            "document_ids": list(state["document_ids"]),
+            "history_messages": len(state["conversation_history"]),
+            "bytes": sum(usage.values()),
+            **{f"{kind}_bytes": value for kind, value in usage.items()}
+        })
+    totals = {
+        "document_mapped": sum(item["mapped_bytes"] for item in documents),
+        "document_heap": sum(item["heap_bytes"] for item in documents),
+        "conversations": memory_consumers().get("conversations", 0)
+    }
+    for kind, value in totals.items():
+        MEMORY_BYTES.set(value, kind=kind)
+    return documents, conversations, totals
+
+@app.get("/admin/memory")
+async def memory_report():
+    """Memória contabilizada por documento aberto e por conversa, e o orçamento global"""
+    documents, conversations, totals = _memory_snapshot()
+    return {
+        "budget_bytes": memory_budget() or None,
+        "total_bytes": sum(totals.values()),
+        "totals": totals,
+        "documents": sorted(documents, key=lambda item: item["last_access"], reverse=True),
+        "conversations": sorted(conversations, key=lambda item: item["bytes"], reverse=True)
+    }
+
 @app.post("/process-pdf", response_model=ProcessPDFResponse)
-async def process_pdf(file: UploadFile = File(...)):
+async def process_pdf(
+    request: Request,
+    file: UploadFile = File(...),
+    conversation_id: Optional[str] = Query(None, description="Adiciona o documento a uma conversa existente"),
+    profile: Optional[str] = Query(
+        None,
+        pattern="^(accurate|fast|auto)$",
+        description="Perfil de extração (padrão: PDF_EXTRACTION_PROFILE)"
+    )
+):
     """
     Processa um arquivo PDF
     Implementa RF01, RF02, RF12
     """
     try:
+        # Cancela extração e indexação se o cliente desconectar ou o prazo expirar
+        return await run_cancellable(
+            request,
+            lambda: _process_pdf(file, conversation_id, profile),
+            endpoint="process-pdf",
+            timeout=PROCESS_PDF_TIMEOUT
+        )
+    except RequestCancelled as e:
+        return _cancelled_response(e)
+
+async def _process_pdf(file: UploadFile, conversation_id: Optional[str], profile: Optional[str] = None) -> ProcessPDFResponse:
+    try:
+        if conversation_id is not None and _get_conversation_state(conversation_id) is None:
+            raise HTTPException(404, "Conversa não encontrada")
+
         # RNF01: Limite de tamanho do arquivo
         file_size = 0
         chunk_size = 1024
-        while chunk := await file.read(chunk_size):
-            file_size += len(chunk)
-            if file_size > 10 * 1024 * 1024:  # 10MB
-                raise HTTPException(400, "Arquivo excede 10MB")
-        await file.seek(0)
+        data = bytearray()
+        with time_stage("upload"):
+            while chunk := await file.read(chunk_size):
+                file_size += len(chunk)
+                if file_size > 10 * 1024 * 1024:  # 10MB
+                    raise HTTPException(400, "Arquivo excede 10MB")
+                data += chunk
+            await file.seek(0)
+        document_id = DocumentStore.compute_document_id(bytes(data))
         
-        # Processa o PDF
         start_time = asyncio.get_event_loop().time()
-        doc_info: DocumentInfo = await pdf_extractor.process_pdf(file.file)
-        
-        # Analisa o conteúdo
-        analysis = text_analyzer.analyze_content(
-            doc_info["content"],
-            doc_info["sections"]
-        )
+        reused = document_store.exists(document_id)
+        record_cache("document", reused)
+        if reused:
+            # Documento já processado: reutiliza os artefatos persistidos
+            stored = document_store.load(document_id)
+            doc_info = stored.to_document_info()
+            analysis = stored.meta.get("analysis")
+            if analysis is None:
+                with time_stage("analysis"):
+                    analysis = await asyncio.to_thread(
+                        text_analyzer.analyze_content,
+                        doc_info["content"],
+                        doc_info["sections"]
+                    )
+        else:
+            # Processa o PDF
+            with time_stage("extraction"):
+                doc_info: DocumentInfo = await pdf_extractor.process_pdf(file.file, profile)
+            doc_info["document_id"] = document_id
+            doc_info["metadata"]["filename"] = file.filename
+            
+            # Analisa o conteúdo (em thread, para não bloquear o event loop)
+            with time_stage("analysis"):
+                analysis = await asyncio.to_thread(
+                    text_analyzer.analyze_content,
+                    doc_info["content"],
+                    doc_info["sections"]
+                )
+            
+            # Gera os embeddings dos trechos e persiste em disco
+            with span("indexing"):
+                await asyncio.to_thread(document_indexer.index, document_id, doc_info, analysis)
+
+        if section_summarizer is not None:
+            # Não bloqueia a resposta: a busca usa os resumos assim que forem gravados
+            section_summarizer.schedule(document_id)
         
         # Verifica tempo de processamento (RNF01)
         process_time = asyncio.get_event_loop().time() - start_time
         if process_time > 60:  # 1 minuto
-            print(f"Alerta: Processamento demorou {process_time:.2f} segundos")
+            SLOW_REQUESTS.inc(endpoint="process-pdf")
         
-        # Inicializa estado da conversa
-        conversation_id = f"conv_{len(CONVERSATION_STATES) + 1}"
-        CONVERSATION_STATES[conversation_id] = {
-            "document": doc_info,
-            "conversation_history": [],
-            "current_question": "",
-            "web_results": [],
-            "selected_strategy": "",
-            "answer": None,
-            "error": None
-        }
+        if conversation_id is None:
+            # Inicializa estado da conversa; o texto fica só no documento persistido
+            conversation_id = _create_conversation(document_store.load(document_id).to_document_info(), [document_id])
+        elif document_id not in CONVERSATION_DOCUMENTS[conversation_id]:
+            # Adiciona o documento ao conjunto da conversa existente
+            CONVERSATION_DOCUMENTS.update(document_store.add_conversation_document(conversation_id, document_id))
+            CONVERSATION_STATES[conversation_id]["document_ids"] = CONVERSATION_DOCUMENTS[conversation_id]
         
         return ProcessPDFResponse(
             conversation_id=conversation_id,
+            document_id=document_id,
             message="PDF processado com sucesso",
-            analysis=analysis
+            analysis=analysis,
+            dedup=doc_info["metadata"].get("dedup"),
+            degraded_pages=doc_info["metadata"].get("degraded_pages"),
+            extraction_profile=doc_info["metadata"].get("extraction_profile")
         )
         
+    except (HTTPException, RequestCancelled):
+        raise
     except Exception as e:
         raise HTTPException(500, f"Erro ao processar PDF: {str(e)}")
 
 @app.post("/chat/{conversation_id}", response_model=ChatResponse)
 async def chat(
+    request: Request,
     conversation_id: str,
     question: str = Query(..., description="Pergunta sobre o documento"),
     force_web_search: bool = Query(False, description="Força busca na web")
@@ -101,10 +465,37 @@ async def chat(
     Implementa RF03, RF04, RF05, RF09, RF10
     """
     try:
-        # Verifica se a conversa existe
-        if conversation_id not in CONVERSATION_STATES:
-            raise HTTPException(404, "Conversa não encontrada")
-            
+        # Cancela orquestrador, LLM e busca web se o cliente desconectar ou o prazo expirar
+        return await run_cancellable(
+            request,
+            lambda: _chat(conversation_id, question),
+            endpoint="chat",
+            timeout=CHAT_TIMEOUT
+        )
+    except RequestCancelled as e:
+        return _cancelled_response(e)
+    except Overloaded as e:
+        raise HTTPException(503, str(e), headers={"Retry-After": str(e.retry_after)})
+
+async def _chat(conversation_id: str, question: str) -> ChatResponse:
+    # Verifica se a conversa existe
+    if _get_conversation_state(conversation_id) is None:
+        raise HTTPException(404, "Conversa não encontrada")
+
+    # Perguntas idênticas simultâneas na mesma conversa compartilham o turno
+    key = (conversation_id, " ".join(question.lower().split()))
+    return await chat_coalescer.run(key, lambda: _chat_turn(conversation_id, question))
+
+async def _chat_turn(conversation_id: str, question: str) -> ChatResponse:
+    # A vaga global só é ocupada depois do lock: turnos na fila da própria
+    # conversa não consomem capacidade dos demais
+    async with conversation_locks.hold(conversation_id), chat_admission.slot():
+        # LLM e embeddings do turno têm prioridade, com revezamento entre conversas
+        with work_class(INTERACTIVE, tenant=conversation_id):
+            return await _answer(conversation_id, question)
+
+async def _answer(conversation_id: str, question: str) -> ChatResponse:
+    try:
         state = CONVERSATION_STATES[conversation_id]
         state["current_question"] = question
         
@@ -117,33 +508,123 @@ async def chat(
         # Verifica tempo de resposta
         process_time = asyncio.get_event_loop().time() - start_time
         if process_time > 5:
-            print(f"Alerta: Resposta demorou {process_time:.2f} segundos")
+            SLOW_REQUESTS.inc(endpoint="chat")
+        STRATEGY_OUTCOMES.inc(strategy=state["selected_strategy"] or "unknown")
         
         # Atualiza estado
         CONVERSATION_STATES[conversation_id] = state
+
+        # O histórico cresceu: confere o orçamento global (descarta documentos pouco usados)
+        if memory_budget():
+            await asyncio.to_thread(enforce_memory_budget)
         
         return ChatResponse(
             answer=state["answer"],
             source=state["selected_strategy"],
-            web_results=state["web_results"] if state["web_results"] else None
+            web_results=state["web_results"] if state["web_results"] else None,
+            sources=state["sources"] if state.get("sources") else None,
+            answer_path=state.get("answer_path") or None
         )
         
+    except (HTTPException, RequestCancelled):
+        raise
     except Exception as e:
         raise HTTPException(500, f"Erro ao processar pergunta: {str(e)}")
 
+@app.post("/conversations", response_model=ConversationResponse)
+async def create_conversation(request: CreateConversationRequest):
+    """Cria uma conversa sobre um conjunto de documentos já processados"""
+    document_ids = list(dict.fromkeys(request.document_ids))
+    missing = [d for d in document_ids if not document_store.exists(d)]
+    if not document_ids or missing:
+        raise HTTPException(404, f"Documentos não encontrados: {', '.join(missing)}")
+    
+    doc_info = document_store.load(document_ids[0]).to_document_info()
+    conversation_id = _create_conversation(doc_info, document_ids)
+    return ConversationResponse(conversation_id=conversation_id, document_ids=document_ids)
+
+@app.get("/documents/{document_id}", response_model=DocumentResponse)
+async def get_document(document_id: str):
+    """
+    Consulta um documento já processado pelo SHA-256 do PDF. Clientes que
+    calculam o hash localmente evitam reenviar um arquivo que o servidor já tem
+    """
+    if not document_store.exists(document_id):
+        raise HTTPException(404, "Documento não encontrado")
+    stored = document_store.load(document_id)
+    metadata = stored.meta.get("metadata", {})
+    return DocumentResponse(
+        document_id=document_id,
+        name=stored.name,
+        num_chunks=len(stored),
+        analysis=stored.meta.get("analysis"),
+        degraded_pages=metadata.get("degraded_pages"),
+        extraction_profile=metadata.get("extraction_profile")
+    )
+
 @app.get("/conversations/{conversation_id}/history", response_model=ConversationHistoryResponse)
 async def get_conversation_history(conversation_id: str):
     """Retorna o histórico da conversa"""
-    if conversation_id not in CONVERSATION_STATES:
+    state = _get_conversation_state(conversation_id)
+    if state is None:
         raise HTTPException(404, "Conversa não encontrada")
         
-    state = CONVERSATION_STATES[conversation_id]
     history = [
         {
-            "role": msg.type,
-            "content": msg.content
+            "role": msg.role,
+            "content": msg.text
         }
         for msg in state["conversation_history"]
     ]
     
-    return ConversationHistoryResponse(history=history)
\ No newline at end of file
+    return ConversationHistoryResponse(history=history)
+
+@app.post("/documents/{document_id}/ask-batch", response_class=StreamingResponse)
+async def ask_batch(document_id: str, request: AskBatchRequest):
+    """
+    Responde uma lista de perguntas sobre um documento já processado, sem
+    criar nem alterar conversas. A resposta é NDJSON: uma linha por pergunta
+    (BatchAnswer, na ordem de conclusão) e uma linha final (BatchSummary)
+    """
+    if not document_store.exists(document_id):
+        raise HTTPException(404, "Documento não encontrado")
+    questions = [question.strip() for question in request.questions]
+    if not questions or not all(questions):
+        raise HTTPException(400, "Informe ao menos uma pergunta, sem perguntas vazias")
+    if len(questions) > ASK_BATCH_MAX_QUESTIONS:
+        raise HTTPException(400, f"Máximo de {ASK_BATCH_MAX_QUESTIONS} perguntas por lote")
+    return StreamingResponse(_ask_batch_lines(document_id, questions), media_type="application/x-ndjson")
+
+async def _ask_batch_items(document_id: str, questions: List[str]):
+    with work_class(ASK_BATCH_PRIORITY, tenant=document_id):
+        async for result in agent_orchestrator.agents[0].answer_batch(document_id, questions):
+            yield result
+
+async def _ask_batch_lines(document_id: str, questions: List[str]):
+    start = time.perf_counter()
+    answered = 0
+    error = None
+    try:
+        async for result in iterate_cancellable(
+            lambda: _ask_batch_items(document_id, questions),
+            endpoint="documents",
+            timeout=ASK_BATCH_TIMEOUT
+        ):
+            answered += 1
+            yield BatchAnswer(**result).model_dump_json(exclude_none=True) + "\n"
+    except RequestCancelled as e:
+        error = e.reason
+    except Exception as e:
+        # Os cabeçalhos já foram enviados: o erro vai na linha final
+        print(f"Erro no lote de perguntas: {str(e)}")
+        error = str(e)
+    yield BatchSummary(
+        done=error is None,
+        answered=answered,
+        total=len(questions),
+        seconds=round(time.perf_counter() - start, 3),
+        error=error
+    ).model_dump_json(exclude_none=True) + "\n"
+
+# Primeiro segmento de cada rota registrada, usado como label das métricas
+_ENDPOINTS = {route.path.split("/")[1] for route in app.routes}
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional, List, Dict, Union
+from typing import Optional, List, Dict, Union, Any
 
 class HealthResponse(BaseModel):
     status: str
@@ -8,10 +8,19 @@ class WebResult(BaseModel):
     text: str
     url: str
 
+class DocumentSource(BaseModel):
+    document_id: str
+    document_name: str
+    section: str
+    text: str
+    score: float
+
 class ChatResponse(BaseModel):
     answer: str
     source: Optional[str] = None
     web_results: Optional[List[WebResult]] = None
+    sources: Optional[List[DocumentSource]] = None
+    answer_path: Optional[str] = None
 
 class LanguageMetrics(BaseModel):
     num_sentences: int
@@ -26,8 +35,49 @@ class DocumentAnalysis(BaseModel):
 
 class ProcessPDFResponse(BaseModel):
     conversation_id: str
+    document_id: Optional[str] = None
     message: str
     analysis: DocumentAnalysis
+    dedup: Optional[Dict[str, Any]] = None
+    degraded_pages: Optional[List[Dict[str, Any]]] = None
+    extraction_profile: Optional[str] = None
+
+class DocumentResponse(BaseModel):
+    """Documento já processado, consultado pelo SHA-256 do PDF"""
+    document_id: str
+    name: str
+    num_chunks: int
+    analysis: Optional[DocumentAnalysis] = None
+    degraded_pages: Optional[List[Dict[str, Any]]] = None
+    extraction_profile: Optional[str] = None
+
+class CreateConversationRequest(BaseModel):
+    document_ids: List[str]
+
+class ConversationResponse(BaseModel):
+    conversation_id: str
+    document_ids: List[str]
 
 class ConversationHistoryResponse(BaseModel):
-    history: List[Dict[str, str]]
\ No newline at end of file
+    history: List[Dict[str, str]]
+
+class AskBatchRequest(BaseModel):
+    questions: List[str]
+
+class BatchAnswer(BaseModel):
+    """Uma linha do NDJSON de /documents/{id}/ask-batch"""
+    index: int
+    question: str
+    answer: Optional[str] = None
+    source: Optional[str] = None
+    sources: Optional[List[DocumentSource]] = None
+    answer_path: Optional[str] = None
+    error: Optional[str] = None
+
+class BatchSummary(BaseModel):
+    """Última linha do NDJSON: done=false se o lote foi interrompido"""
+    done: bool
+    answered: int
+    total: int
+    seconds: float
+    error: Optional[str] = None
\ No newline at end of file
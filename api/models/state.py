@@ -1,7 +1,8 @@
 from typing import TypedDict, List, Optional, Dict
-from langchain_core.messages import BaseMessage
+from api.services.memory.message_history import MessageHistory
 
 class DocumentInfo(TypedDict):
+    document_id: str
     content: str
     sections: Dict[str, str]
     metadata: Dict[str, any]
@@ -11,11 +12,21 @@ class WebResult(TypedDict):
     url: str
     relevance: float
 
+class Source(TypedDict):
+    document_id: str
+    document_name: str
+    section: str
+    text: str
+    score: float
+
 class ConversationState(TypedDict):
     document: DocumentInfo
-    conversation_history: List[BaseMessage]
+    document_ids: List[str]
+    sources: List[Source]
+    conversation_history: MessageHistory
     current_question: str
     web_results: List[WebResult]
     selected_strategy: str
+    answer_path: str
     answer: Optional[str]
     error: Optional[str]
\ No newline at end of file
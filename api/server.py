@@ -0,0 +1,169 @@
+import argparse
+import gc
+import math
+import os
+import signal
+import socket
+import sys
+import time
+from typing import Dict
+
+
+def cpu_allotment() -> int:
+    """CPUs que o processo pode usar: afinidade e cota do cgroup (limite do contêiner)"""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    for quota_path, period_path in (
+        ("/sys/fs/cgroup/cpu.max", None),  # cgroup v2: "<cota> <período>"
+        ("/sys/fs/cgroup/cpu/cpu.cfs_quota_us", "/sys/fs/cgroup/cpu/cpu.cfs_period_us")
+    ):
+        try:
+            with open(quota_path) as f:
+                values = f.read().split()
+            if period_path is not None:
+                with open(period_path) as f:
+                    values.append(f.read().strip())
+            quota, period = values[0], values[1]
+            if quota not in ("max", "-1"):
+                cpus = min(cpus, max(1, math.floor(int(quota) / int(period))))
+            break
+        except (OSError, ValueError, IndexError):
+            continue
+    return max(1, cpus)
+
+
+def limit_threads(threads: int) -> None:
+    """Limita as threads de cálculo (OpenMP, BLAS, torch, faiss) do processo atual"""
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[var] = str(threads)
+    torch = sys.modules.get("torch")
+    if torch is not None:
+        torch.set_num_threads(threads)
+    faiss = sys.modules.get("faiss")
+    if faiss is not None:
+        faiss.omp_set_num_threads(threads)
+
+
+def preload():
+    """
+    Importa a aplicação e aquece modelo e tokenizer no processo pai. Os
+    workers criados por fork compartilham essas páginas por copy-on-write
+    """
+    # Nenhum pool de threads do OpenMP ou do tokenizer pode existir no fork
+    os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+    limit_threads(1)
+    from api import main
+
+    main._warmup()
+    if not main.startup_report.ready:
+        raise RuntimeError(f"Falha no aquecimento: {main.startup_report.error}")
+    # Objetos do pai saem da coleta de lixo: o gc dos workers não escreve nas páginas compartilhadas
+    gc.collect()
+    gc.freeze()
+    return main.app
+
+
+def _serve_worker(app, sock: socket.socket, threads: int, log_level: str) -> None:
+    import uvicorn
+
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    limit_threads(threads)
+    # O pai já aqueceu; o lifespan do worker só marca a aplicação como pronta
+    os.environ["WARMUP_ON_STARTUP"] = "false"
+    uvicorn.Server(uvicorn.Config(app, log_level=log_level)).run(sockets=[sock])
+
+
+def serve(host: str, port: int, workers: int, threads: int, log_level: str = "info") -> None:
+    """
+    Servidor pré-fork: um processo pai carrega tudo uma vez, abre o socket e
+    cria os workers, que dividem as conexões do mesmo socket. Workers que
+    morrem são recriados a partir do pai, já aquecidos
+    """
+    # Lido pela aplicação ao ser importada: limites globais são divididos entre os workers
+    os.environ["API_WORKERS"] = str(workers)
+    app = preload()
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    print(f"Servidor em http://{host}:{port} com {workers} workers de {threads} threads")
+
+    children: Dict[int, float] = {}
+    stopping = False
+
+    def spawn() -> None:
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                _serve_worker(app, sock, threads, log_level)
+            except BaseException as e:
+                print(f"Erro no worker {os.getpid()}: {str(e)}")
+                code = 1
+            finally:
+                # Não executa os handlers de saída herdados do pai
+                os._exit(code)
+        children[pid] = time.monotonic()
+
+    def stop(signum, frame) -> None:
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for _ in range(workers):
+        spawn()
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        started = children.pop(pid, time.monotonic())
+        if stopping:
+            continue
+        print(f"Worker {pid} terminou (status {status}); criando outro")
+        # Evita recriar em laço um worker que falha logo ao iniciar
+        if time.monotonic() - started < 1.0:
+            time.sleep(1.0)
+        spawn()
+    sock.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="API com vários workers compartilhando o modelo carregado")
+    parser.add_argument("--host", default=os.getenv("API_HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("API_PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("API_WORKERS", "1")))
+    parser.add_argument(
+        "--threads",
+        type=int,
+        default=int(os.getenv("WORKER_THREADS", "0")),
+        help="Threads de cálculo por worker (0: CPUs disponíveis divididas pelos workers)"
+    )
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+
+    workers = max(1, args.workers)
+    threads = args.threads or max(1, cpu_allotment() // workers)
+    if workers == 1:
+        # Um processo só: uvicorn direto, com /health disponível durante o aquecimento
+        import uvicorn
+
+        os.environ["API_WORKERS"] = "1"
+        limit_threads(threads)
+        uvicorn.run("api.main:app", host=args.host, port=args.port, log_level=args.log_level)
+        return
+    serve(args.host, args.port, workers, threads, args.log_level)
+
+
+if __name__ == "__main__":
+    main()
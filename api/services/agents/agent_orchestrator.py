@@ -1,9 +1,13 @@
+import asyncio
 from typing import List, Dict, Any
 from api.services.agents.base_agent import BaseAgent
-from api.services.agents.document_agent import DocumentAgent
+from api.services.agents.document_agent import DocumentAgent, OUT_OF_CONTEXT_ANSWER
 from api.services.agents.web_agent import WebAgent
 from api.models.state import ConversationState
 from api.services.memory.conversation_memory import ConversationMemory
+from api.services.monitoring.metrics import time_stage
+from api.services.monitoring.tracing import span
+from api.services.concurrency.cancellation import check_cancelled, RequestCancelled
 
 class AgentOrchestrator:
     """
@@ -20,38 +24,73 @@ class AgentOrchestrator:
         
     async def process_question(self, state: ConversationState) -> ConversationState:
         """Processa uma pergunta usando os agentes disponíveis"""
+        with span("orchestrator", question_chars=len(state["current_question"])) as current:
+            state = await self._process_question(state)
+            if current is not None:
+                current.attributes["strategy"] = state["selected_strategy"]
+            return state
+
+    def _can_handle_sync(self, agent: BaseAgent, state: ConversationState) -> float:
+        # A thread pode começar depois do cancelamento: evita embedar à toa
+        check_cancelled("routing")
+        with span(f"{type(agent).__name__}.can_handle") as current:
+            confidence = agent.can_handle(state)
+            if current is not None:
+                current.attributes["confidence"] = round(confidence, 4)
+            return confidence
+
+    async def _can_handle(self, agent: BaseAgent, state: ConversationState) -> float:
+        # can_handle gera embeddings: roda fora do event loop para que as
+        # requisições concorrentes sejam agrupadas pelo EmbeddingBatcher
+        return await asyncio.to_thread(self._can_handle_sync, agent, state)
+
+    async def _execute(self, agent: BaseAgent, state: ConversationState) -> ConversationState:
+        with span(f"{type(agent).__name__}.execute"):
+            return await agent.execute(state)
+
+    async def _process_question(self, state: ConversationState) -> ConversationState:
         try:
             # Atualiza o histórico da conversa
-            state = self.memory.update_history(state)
+            with span("memory.update_history"):
+                state = await asyncio.to_thread(self.memory.update_history, state)
+            state["sources"] = []
+            state["answer_path"] = "none"
             
             # Verifica se a pergunta está totalmente fora do contexto
-            max_similarity = max(
-                agent.can_handle(state)
-                for agent in self.agents
-            )
+            with time_stage("routing"):
+                max_similarity = max(await asyncio.gather(*(
+                    self._can_handle(agent, state)
+                    for agent in self.agents
+                )))
             
             if max_similarity < 0.2:
-                state["answer"] = "Esta pergunta parece não ter relação com o contexto fornecido. Por favor, reformule ou faça uma pergunta relacionada ao documento."
+                state["answer"] = OUT_OF_CONTEXT_ANSWER
                 state["selected_strategy"] = "out_of_context"
                 return state
 
             # Primeira tentativa com DocumentAgent
             doc_agent = self.agents[0]  # DocumentAgent
-            doc_confidence = doc_agent.can_handle(state)
+            with time_stage("routing"):
+                doc_confidence = await self._can_handle(doc_agent, state)
             
             if doc_confidence > 0.3:
-                state = await doc_agent.execute(state)
+                state = await self._execute(doc_agent, state)
                 
-                # Se encontrou resposta satisfatória no documento
-                if state["answer"] and "NAO_ENCONTRADO" not in state["answer"]:
+                # Se encontrou resposta satisfatória no documento (e a web não foi pedida)
+                if (
+                    state["answer"] and "NAO_ENCONTRADO" not in state["answer"]
+                    and not WebAgent.explicitly_requested(state["current_question"])
+                ):
                     return state
 
             # Se necessário, tenta com WebAgent
             web_agent = self.agents[1]  # WebAgent
-            web_confidence = web_agent.can_handle(state)
+            with time_stage("routing"):
+                web_confidence = await self._can_handle(web_agent, state)
             
             if web_confidence > 0.3:
-                web_state = await web_agent.execute(state)
+                # Cópia rasa: o WebAgent não sobrescreve a resposta do documento usada abaixo
+                web_state = await self._execute(web_agent, dict(state))
                 
                 # Se o DocumentAgent encontrou algo parcial, combina as respostas
                 if state["answer"] and "NAO_ENCONTRADO" not in state["answer"]:
@@ -67,6 +106,8 @@ class AgentOrchestrator:
 
             return state
             
+        except RequestCancelled:
+            raise
         except Exception as e:
             state["error"] = f"Erro no orchestrator: {str(e)}"
             return state
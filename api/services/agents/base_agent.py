@@ -1,15 +1,19 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Any
+from typing import Dict, Any, List
+import numpy as np
 from api.models.state import ConversationState
-from langchain_community.embeddings import HuggingFaceEmbeddings
+from api.services.embeddings.embedding_provider import get_embeddings
+from api.services.storage.document_store import DocumentStore
+from api.services.retrieval.sharded_retriever import ShardedRetriever
 
 class BaseAgent(ABC):
     """Classe base abstrata para todos os agentes"""
     
     def __init__(self):
-        self.embeddings = HuggingFaceEmbeddings(
-            model_name="sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
-        )
+        self.embeddings = get_embeddings()
+        # Documentos persistidos e roteamento pelos centróides, usados por _document_similarity
+        self.store = DocumentStore()
+        self.retriever = ShardedRetriever(self.embeddings, self.store)
         
     @abstractmethod
     def can_handle(self, state: ConversationState) -> float:
@@ -53,6 +57,36 @@ class BaseAgent(ABC):
             union = len(words1.union(words2))
             return intersection / union if union > 0 else 0.0
 
+    def _document_ids(self, state: ConversationState) -> List[str]:
+        """Documentos persistidos associados à conversa"""
+        document_ids = state.get("document_ids") or [state["document"].get("document_id")]
+        return [
+            document_id for document_id in document_ids
+            if document_id and self.store.exists(document_id)
+        ]
+
+    def _document_similarity(self, state: ConversationState, query: np.ndarray) -> float:
+        """
+        Similaridade da pergunta com os documentos da conversa pelos centróides
+        gravados na ingestão: só a pergunta é embedada, nunca o conteúdo
+        """
+        document_ids = self._document_ids(state)
+        if document_ids:
+            # Melhor pontuação de roteamento entre os documentos da conversa
+            routed = self.retriever.route(query, document_ids)
+            return routed[0][1] if routed else 0.0
+
+        # Documento não persistido: fração das palavras da pergunta presentes nas seções
+        words = {word for word in state["current_question"].lower().split() if len(word) > 3}
+        if not words:
+            return 0.0
+        found = set()
+        for text in state["document"].get("sections", {}).values():
+            found.update(word for word in words if word in text.lower())
+            if found == words:
+                break
+        return len(found) / len(words)
+
     def _should_use_web_search(self, state: ConversationState) -> bool:
         """Determina se deve usar busca na web"""
         # Verifica se é solicitação explícita
@@ -64,11 +98,9 @@ class BaseAgent(ABC):
         if state.get("answer") == "NAO_ENCONTRADO":
             return True
             
-        # Se a similaridade com o documento é baixa
-        similarity = self._calculate_similarity(
-            state["current_question"],
-            state["document"]["content"]
-        )
+        # Se a similaridade com o documento (centróides) é baixa
+        query = self.retriever.embed_query(state["current_question"])
+        similarity = self._document_similarity(state, query)
         if similarity < 0.2:
             return True
             
@@ -90,25 +122,3 @@ class BaseAgent(ABC):
             text = text[:497] + "..."
             
         return text.strip()
-
-    def _get_relevant_context(self, state: ConversationState) -> str:
-        """Obtém contexto relevante do documento"""
-        try:
-            question = state["current_question"]
-            sections = state["document"]["sections"]
-            
-            # Calcula similaridade com cada seção
-            section_scores = []
-            for section_name, content in sections.items():
-                score = self._calculate_similarity(question, content)
-                section_scores.append((score, content))
-                
-            # Ordena por similaridade e pega as 2 seções mais relevantes
-            section_scores.sort(reverse=True)
-            relevant_sections = [content for _, content in section_scores[:2]]
-            
-            return "\n\n".join(relevant_sections)
-            
-        except Exception as e:
-            print(f"Erro ao obter contexto: {str(e)}")
-            return state["document"]["content"]
\ No newline at end of file
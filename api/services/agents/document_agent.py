@@ -1,16 +1,37 @@
-from typing import Dict, Any
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+import asyncio
+import os
+import re
+import numpy as np
 from .base_agent import BaseAgent
-from ...models.state import ConversationState
+from ...models.state import ConversationState, Source
 from api.services.llm.llm_service import LLMService
-from langchain_community.vectorstores import FAISS
-from langchain_community.embeddings import HuggingFaceEmbeddings
+from api.services.llm.context_assembler import ContextAssembler
+from api.services.extractors.text_chunker import TextChunker
+from api.services.monitoring.tracing import current_span, span
+from api.services.monitoring.metrics import ANSWER_PATHS
+from api.services.concurrency.cancellation import RequestCancelled
+from api.services.retrieval.extractive_answerer import ExtractiveAnswerer
+
+OUT_OF_CONTEXT_ANSWER = (
+    "Esta pergunta parece não ter relação com o contexto fornecido. "
+    "Por favor, reformule ou faça uma pergunta relacionada ao documento."
+)
 
 class DocumentAgent(BaseAgent):
-    def __init__(self):
+    def __init__(self, top_k: int = 8):
+        super().__init__()
         self.llm = LLMService()
-        self.embeddings = HuggingFaceEmbeddings(
-            model_name="sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+        # Candidatos recuperados; o ContextAssembler escolhe os que cabem no orçamento
+        self.top_k = top_k
+        self.assembler = ContextAssembler(
+            counter=self.llm.tokens,
+            context_window=self.llm.context_window,
+            max_tokens=self.llm.max_tokens
         )
+        # Atalho extrativo opcional: responde sem o LLM quando a confiança é alta
+        self.extractive_enabled = os.getenv("EXTRACTIVE_ANSWERS", "false").lower() == "true"
+        self.extractive = ExtractiveAnswerer(self.embeddings)
 
     def can_handle(self, state: ConversationState) -> float:
         """
@@ -18,24 +39,16 @@ class DocumentAgent(BaseAgent):
         através de análise de similaridade semântica
         """
         try:
-            # Calcula similaridade entre a pergunta e o conteúdo do documento
-            similarity = self._calculate_similarity(
-                state["current_question"],
-                state["document"]["content"]
-            )
-            
-            # Verifica histórico de conversa para manter contexto
-            if state["conversation_history"]:
-                last_messages = state["conversation_history"][-3:]  # últimas 3 mensagens
-                context_similarity = max(
-                    self._calculate_similarity(
-                        state["current_question"],
-                        str(msg.content)
-                    )
-                    for msg in last_messages
-                )
+            query = self.retriever.embed_query(state["current_question"])
+            # Centróides dos documentos da conversa; o conteúdo não é lido nem embedado
+            similarity = self._document_similarity(state, query)
+
+            # Verifica histórico de conversa para manter contexto; as mensagens
+            # já guardam seus embeddings, então não há chamadas ao modelo aqui
+            context_similarity = state["conversation_history"].similarities(query, last=3)  # últimas 3 mensagens
+            if len(context_similarity):
                 # Aumenta a pontuação se houver contexto relevante
-                similarity = max(similarity, context_similarity)
+                similarity = max(similarity, float(context_similarity.max()))
             
             return similarity
         except Exception as e:
@@ -45,40 +58,167 @@ class DocumentAgent(BaseAgent):
     async def execute(self, state: ConversationState) -> ConversationState:
         """Processa a pergunta usando o documento como contexto"""
         try:
-            # Cria base de conhecimento vetorial
-            texts = [
-                state["document"]["content"]
-            ] + list(state["document"]["sections"].values())
+            question = state["current_question"]
+            query = await self.retriever.aembed_query(question)
+            # A busca é bloqueante: roda em uma thread para não travar o event loop
+            candidates = await asyncio.to_thread(self._retrieve_passages, state, query)
+            if not candidates:
+                candidates = await asyncio.to_thread(self._retrieve_context, state)
+
+            answer, sources, path = await self._answer(question, candidates, query)
+            state["answer"] = answer
+            state["sources"] = sources
+            state["selected_strategy"] = "document"
+            state["answer_path"] = path
             
-            db = FAISS.from_texts(texts, self.embeddings)
-            relevant_docs = db.similarity_search(
-                state["current_question"],
-                k=2
-            )
-            context = " ".join(doc.page_content for doc in relevant_docs)
+            return state
             
-            # Gera resposta baseada no contexto
-            prompt = f"""
+        except RequestCancelled:
+            raise
+        except Exception as e:
+            state["error"] = f"Erro no DocumentAgent: {str(e)}"
+            return state
+
+    async def _answer(self, question: str, candidates: List[Source], query: np.ndarray) -> Tuple[str, List[Source], str]:
+        """Resposta, trechos citados e caminho (extractive ou llm) a partir dos candidatos"""
+        if self.extractive_enabled and candidates:
+            with span("extractive") as current:
+                sentence, passage, confidence = await asyncio.to_thread(
+                    self.extractive.answer, question, candidates, query
+                )
+                if current is not None:
+                    current.attributes["confidence"] = round(confidence, 4)
+            if sentence is not None:
+                ANSWER_PATHS.inc(path="extractive")
+                return f"{sentence}\n\nFonte: {self._format_sources([passage])}", [passage], "extractive"
+
+        # Empacota os melhores trechos dentro do orçamento de tokens
+        packed = self.assembler.pack(candidates, self._build_prompt("", question))
+        passages = packed.passages
+        current = current_span()
+        if current is not None:
+            current.attributes.update(
+                context_tokens=packed.tokens,
+                passages=len(passages),
+                dropped_passages=packed.dropped
+            )
+        
+        # Chamada assíncrona: é abortada se a requisição for cancelada
+        answer = await self.llm.agenerate_response(self._build_prompt(packed.text, question))
+        cited = self._cited_passages(answer, passages)
+        if cited and "NAO_ENCONTRADO" not in answer:
+            answer = f"{answer}\n\nFonte: {self._format_sources(cited)}"
+        ANSWER_PATHS.inc(path="llm")
+        return answer, cited, "llm"
+
+    async def answer_batch(self, document_id: str, questions: List[str]) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Responde várias perguntas sobre um documento persistido, sem estado de
+        conversa: um lote de embeddings, uma busca matricial e as chamadas ao
+        LLM concorrentes (limitadas pelo scheduler compartilhado). Os
+        resultados saem na ordem em que ficam prontos, com o índice da pergunta
+        """
+        queries = await self.retriever.aembed_queries(questions)
+        candidates, routing = await asyncio.to_thread(self.retriever.retrieve_batch, document_id, queries, self.top_k)
+
+        async def answer(index: int) -> Dict[str, Any]:
+            result: Dict[str, Any] = {"index": index, "question": questions[index]}
+            # Mesmo limiar do orquestrador para perguntas fora do contexto; o lote não busca na web
+            if routing[index] < 0.2 or not candidates[index]:
+                result.update(answer=OUT_OF_CONTEXT_ANSWER, source="out_of_context", answer_path="none")
+                return result
+            try:
+                answer, sources, path = await self._answer(questions[index], candidates[index], queries[index])
+            except RequestCancelled:
+                raise
+            except Exception as e:
+                print(f"Erro na pergunta {index} do lote: {str(e)}")
+                result["error"] = str(e)
+                return result
+            result.update(answer=answer, source="document", sources=sources, answer_path=path)
+            return result
+
+        tasks = [asyncio.ensure_future(answer(index)) for index in range(len(questions))]
+        try:
+            for task in asyncio.as_completed(tasks):
+                yield await task
+        finally:
+            # Lote interrompido (desconexão ou prazo): não deixa chamadas ao LLM órfãs
+            for task in tasks:
+                task.cancel()
+
+    def _build_prompt(self, context: str, question: str) -> str:
+        """Prompt de resposta baseada no contexto"""
+        return f"""
             Com base no seguinte contexto do documento, responda à pergunta.
             Se a informação não estiver disponível no contexto, responda exatamente: NAO_ENCONTRADO
+            Indique o número do trecho usado na resposta, por exemplo: [1]
 
             Contexto:
             {context}
 
-            Pergunta: {state["current_question"]}
+            Pergunta: {question}
 
             Lembre-se: 
             - Use apenas informações do contexto
             - Seja direto e objetivo
             - Responda em até 3 linhas
             """
-            
-            answer = self.llm.generate_response(prompt)
-            state["answer"] = answer
-            state["selected_strategy"] = "document"
-            
-            return state
-            
-        except Exception as e:
-            state["error"] = f"Erro no DocumentAgent: {str(e)}"
-            return state
\ No newline at end of file
+
+    def _retrieve_passages(self, state: ConversationState, query: Optional[np.ndarray] = None) -> List[Source]:
+        """Busca os trechos mais relevantes entre os documentos persistidos da conversa"""
+        document_ids = self._document_ids(state)
+        if not document_ids:
+            return []
+        # Usa os embeddings persistidos: apenas a pergunta é embedada
+        return self.retriever.retrieve(state["current_question"], document_ids, k=self.top_k, query=query)
+
+    def _cited_passages(self, answer: str, passages: List[Source]) -> List[Source]:
+        """Trechos citados na resposta ([n]); se nenhum, o mais relevante"""
+        if not passages:
+            return []
+        cited = []
+        for number in re.findall(r"\[(\d+)\]", answer):
+            index = int(number) - 1
+            if 0 <= index < len(passages) and passages[index] not in cited:
+                cited.append(passages[index])
+        return cited or passages[:1]
+
+    def _format_sources(self, sources: List[Source]) -> str:
+        """Formata as fontes citadas: documento e seção"""
+        labels = []
+        for source in sources:
+            label = f"{source['document_name']} ({source['section']})"
+            if label not in labels:
+                labels.append(label)
+        return "; ".join(labels)
+
+    def _retrieve_context(self, state: ConversationState) -> List[Source]:
+        """Documento não persistido: cria base de conhecimento vetorial temporária"""
+        from langchain_community.vectorstores import FAISS
+
+        # Indexa trechos, não o documento inteiro, para o contexto caber no prompt
+        pieces = TextChunker().split_sections(state["document"]["sections"])
+        if not pieces:
+            return []
+        db = FAISS.from_texts(
+            [text for _, text in pieces],
+            self.embeddings,
+            metadatas=[{"section": section} for section, _ in pieces]
+        )
+        relevant_docs = db.similarity_search_with_score(
+            state["current_question"],
+            k=self.top_k
+        )
+        name = state["document"].get("metadata", {}).get("filename", "documento")
+        return [
+            {
+                "document_id": state["document"].get("document_id", ""),
+                "document_name": name,
+                "section": doc.metadata["section"],
+                "text": doc.page_content,
+                # Distância L2: menor é melhor
+                "score": -float(distance)
+            }
+            for doc, distance in relevant_docs
+        ]
\ No newline at end of file
@@ -1,14 +1,29 @@
-from typing import Dict, Any
+import asyncio
+from typing import Dict, Any, List
 from .base_agent import BaseAgent
 from ...models.state import ConversationState, WebResult
 from ..llm.llm_service import LLMService
+from ..llm.context_assembler import ContextAssembler
 from ..search.web_search_service import WebSearchService
+from ..concurrency.cancellation import RequestCancelled
 
 class WebAgent(BaseAgent):
     def __init__(self):
+        super().__init__()
         self.llm = LLMService()
+        # Resultados da web empacotados no orçamento de tokens, como os trechos do documento
+        self.assembler = ContextAssembler(
+            counter=self.llm.tokens,
+            context_window=self.llm.context_window,
+            max_tokens=self.llm.max_tokens
+        )
         self.web_search = WebSearchService()
 
+    @staticmethod
+    def explicitly_requested(question: str) -> bool:
+        """O usuário pediu a busca na web na própria pergunta"""
+        return "busque na web" in question.lower()
+
     def can_handle(self, state: ConversationState) -> float:
         """
         Determina se deve usar busca na web baseado em:
@@ -17,18 +32,16 @@ class WebAgent(BaseAgent):
         3. Se a pergunta tem baixa similaridade com o documento
         """
         # Verifica se é solicitação explícita de busca web
-        if "busque na web" in state["current_question"].lower():
+        if self.explicitly_requested(state["current_question"]):
             return 1.0
 
         # Se já tem uma resposta do documento que não é NAO_ENCONTRADO
         if state.get("answer") and "NAO_ENCONTRADO" not in state["answer"]:
             return 0.0
 
-        # Calcula similaridade com o documento
-        doc_similarity = self._calculate_similarity(
-            state["current_question"],
-            state["document"]["content"]
-        )
+        # Similaridade com o documento pelos centróides: o conteúdo não é embedado a cada turno
+        query = self.retriever.embed_query(state["current_question"])
+        doc_similarity = self._document_similarity(state, query)
 
         # Se a similaridade for muito baixa, indica que devemos buscar na web
         if doc_similarity < 0.2:
@@ -40,12 +53,14 @@ class WebAgent(BaseAgent):
         """Realiza busca na web e processa os resultados"""
         try:
             # Realiza a busca
-            results = self.web_search.search(state["current_question"])
+            # Chamadas bloqueantes (HTTP e embeddings) rodam em threads; o LLM é assíncrono
+            results = await asyncio.to_thread(self.web_search.search, state["current_question"])
             
             # Seleciona até 2 resultados mais relevantes
             relevant_results: List[WebResult] = []
             for result in results[:2]:
-                relevance = self._calculate_similarity(
+                relevance = await asyncio.to_thread(
+                    self._calculate_similarity,
                     state["current_question"],
                     result["text"]
                 )
@@ -62,19 +77,21 @@ class WebAgent(BaseAgent):
                 return state
 
             # Se temos resultados relevantes
-            web_context = "\n".join(r["text"] for r in relevant_results)
-            
-            prompt = f"""
+            template = """
             Com base nas informações encontradas na web, responda à pergunta de forma clara e direta.
             Use no máximo 3 linhas.
 
             Informações:
-            {web_context}
+            {context}
 
-            Pergunta: {state["current_question"]}
+            Pergunta: {question}
             """
+            # O orçamento desconta instruções e pergunta: o texto da web é que é cortado
+            base_prompt = template.format(context="", question=state["current_question"])
+            web_context = self.assembler.pack_texts([r["text"] for r in relevant_results], base_prompt)
+            prompt = template.format(context=web_context, question=state["current_question"])
             
-            answer = self.llm.generate_response(prompt)
+            answer = await self.llm.agenerate_response(prompt)
             
             # Adiciona os links no final da resposta
             links = [f"[{r['url']}]" for r in relevant_results[:1]]  # limita a 1 link
@@ -84,9 +101,12 @@ class WebAgent(BaseAgent):
             state["answer"] = answer
             state["web_results"] = relevant_results
             state["selected_strategy"] = "web"
+            state["answer_path"] = "llm"
             
             return state
             
+        except RequestCancelled:
+            raise
         except Exception as e:
             state["error"] = f"Erro no WebAgent: {str(e)}"
             return state
\ No newline at end of file
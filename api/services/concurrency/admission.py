@@ -0,0 +1,122 @@
+import asyncio
+import math
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Deque
+
+from api.services.monitoring.metrics import ADMISSION_QUEUE_WAIT, SHED_REQUESTS
+
+
+def worker_count() -> int:
+    """Workers do servidor pré-fork (api.server define API_WORKERS antes de carregar a aplicação)"""
+    return max(1, int(os.getenv("API_WORKERS", "1")))
+
+
+def per_worker_limit(limit: int) -> int:
+    """
+    Parte de um limite global que cabe a cada worker: os contadores são por
+    processo, e com N workers o limite efetivo seria N vezes o configurado
+    """
+    return max(1, math.ceil(limit / worker_count()))
+
+
+class Overloaded(Exception):
+    """Servidor sobrecarregado: o cliente deve tentar de novo após retry_after segundos"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Servidor sobrecarregado, tente novamente em {retry_after} s")
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Limita os turnos simultâneos de um endpoint. Acima do limite, os pedidos
+    esperam em fila FIFO, mas só enquanto a espera estimada mais o tempo de
+    serviço couberem no SLO de latência; caso contrário são rejeitados na
+    hora (503 + Retry-After) em vez de estourar o prazo de todos.
+    O tempo de serviço é uma média móvel exponencial dos turnos concluídos
+    """
+
+    def __init__(
+        self,
+        endpoint: str,
+        max_concurrent: int = 16,
+        latency_slo: float = 5.0,
+        initial_service_time: float = 1.0,
+        smoothing: float = 0.2
+    ):
+        self.endpoint = endpoint
+        self.max_concurrent = max(1, max_concurrent)
+        self.latency_slo = latency_slo
+        self.service_time = initial_service_time
+        self.smoothing = smoothing
+        self.active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    def estimated_wait(self) -> float:
+        """Espera estimada de um novo pedido: filas à frente dividida entre as vagas"""
+        if self.active < self.max_concurrent and not self._waiters:
+            return 0.0
+        return (len(self._waiters) + 1) / self.max_concurrent * self.service_time
+
+    def _shed(self, wait: float) -> Overloaded:
+        SHED_REQUESTS.inc(endpoint=self.endpoint)
+        return Overloaded(max(1, math.ceil(wait)))
+
+    async def acquire(self) -> None:
+        if self.active < self.max_concurrent and not self._waiters:
+            self.active += 1
+            ADMISSION_QUEUE_WAIT.observe(0.0, endpoint=self.endpoint)
+            return
+
+        wait = self.estimated_wait()
+        budget = self.latency_slo - self.service_time
+        if wait > budget:
+            raise self._shed(wait)
+
+        start = time.perf_counter()
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), timeout=max(budget, 0.0))
+        except asyncio.TimeoutError:
+            if not waiter.done():
+                raise self._shed(self.estimated_wait())
+        except BaseException:
+            # Cancelado na fila: devolve a vaga se ela já tinha sido repassada
+            if waiter.done() and not waiter.cancelled():
+                self._release_slot()
+            raise
+        finally:
+            if not waiter.done():
+                waiter.cancel()
+            try:
+                self._waiters.remove(waiter)
+            except ValueError:
+                pass
+        ADMISSION_QUEUE_WAIT.observe(time.perf_counter() - start, endpoint=self.endpoint)
+
+    def _release_slot(self) -> None:
+        # Repassa a vaga diretamente ao primeiro da fila, sem liberar o contador
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+    def release(self, duration: float) -> None:
+        self.service_time += self.smoothing * (duration - self.service_time)
+        self._release_slot()
+
+    @asynccontextmanager
+    async def slot(self):
+        """Ocupa uma vaga durante o bloco; levanta Overloaded se o pedido for rejeitado"""
+        await self.acquire()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.release(time.perf_counter() - start)
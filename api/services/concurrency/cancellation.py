@@ -0,0 +1,160 @@
+import asyncio
+import contextvars
+import threading
+from typing import AsyncIterator, Awaitable, Callable, Optional, TypeVar
+
+from api.services.monitoring.metrics import CANCELLED_REQUESTS, CANCELLED_WORK
+
+T = TypeVar("T")
+
+_CURRENT_TOKEN: contextvars.ContextVar[Optional["CancelToken"]] = contextvars.ContextVar(
+    "cancel_token", default=None
+)
+
+
+class RequestCancelled(Exception):
+    """A requisição foi cancelada (cliente desconectou ou o prazo expirou)"""
+
+    def __init__(self, reason: str):
+        super().__init__(f"Requisição cancelada: {reason}")
+        self.reason = reason
+
+
+class CancelToken:
+    """
+    Sinal de cancelamento compartilhado entre o event loop e as threads da
+    requisição. O cancelamento da task interrompe os awaits; o trabalho que
+    já está em uma thread (asyncio.to_thread) consulta o token entre etapas
+    """
+
+    __slots__ = ("_event", "reason")
+
+    def __init__(self):
+        self._event = threading.Event()
+        self.reason = ""
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self, reason: str) -> None:
+        if not self._event.is_set():
+            self.reason = reason
+            self._event.set()
+
+
+def current_token() -> Optional[CancelToken]:
+    return _CURRENT_TOKEN.get()
+
+
+def check_cancelled(stage: str) -> None:
+    """Interrompe a etapa se a requisição atual foi cancelada (no-op fora de uma)"""
+    token = _CURRENT_TOKEN.get()
+    if token is not None and token.cancelled:
+        CANCELLED_WORK.inc(stage=stage)
+        raise RequestCancelled(token.reason)
+
+
+async def _wait_disconnect(request) -> None:
+    """Retorna quando o servidor ASGI avisa que o cliente desconectou"""
+    # Aguarda receive() em vez de consultar is_disconnected(): atrás de um
+    # middleware @app.middleware("http") a consulta não enxerga a desconexão
+    while True:
+        message = await request.receive()
+        if message["type"] == "http.disconnect":
+            return
+
+
+async def run_cancellable(
+    request,
+    work: Callable[[], Awaitable[T]],
+    endpoint: str,
+    timeout: Optional[float] = None
+) -> T:
+    """
+    Executa work() como task e a cancela se o cliente desconectar ou se o
+    prazo do servidor expirar (timeout em segundos; None ou 0 desativa).
+    Levanta RequestCancelled com o motivo ("disconnect" ou "timeout").
+    O corpo da requisição já deve ter sido lido pelo endpoint
+    """
+    token = CancelToken()
+    reset = _CURRENT_TOKEN.set(token)
+    try:
+        # A task copia o contexto atual: o token chega às threads via to_thread
+        task = asyncio.ensure_future(work())
+    finally:
+        _CURRENT_TOKEN.reset(reset)
+    watcher = asyncio.ensure_future(_wait_disconnect(request))
+
+    try:
+        await asyncio.wait({task, watcher}, timeout=timeout or None, return_when=asyncio.FIRST_COMPLETED)
+    except asyncio.CancelledError:
+        # Encerramento do servidor ou cancelamento externo
+        token.cancel("shutdown")
+        task.cancel()
+        raise
+    finally:
+        watcher.cancel()
+
+    if task.done():
+        return task.result()
+
+    reason = "disconnect" if watcher.done() and not watcher.cancelled() else "timeout"
+    token.cancel(reason)
+    task.cancel()
+    CANCELLED_REQUESTS.inc(endpoint=endpoint, reason=reason)
+    await asyncio.wait({task})
+    raise RequestCancelled(reason)
+
+
+_DONE = object()
+
+
+async def iterate_cancellable(
+    items: Callable[[], AsyncIterator[T]],
+    endpoint: str,
+    timeout: Optional[float] = None
+) -> AsyncIterator[T]:
+    """
+    Versão de run_cancellable para respostas em streaming: items() roda em
+    uma task com token de cancelamento e os itens são repassados conforme
+    ficam prontos. Se quem consome parar (o StreamingResponse cancela o
+    gerador quando o cliente desconecta) ou o prazo total expirar, o trabalho
+    pendente é cancelado; no prazo, levanta RequestCancelled("timeout")
+    """
+    token = CancelToken()
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async def pump() -> None:
+        try:
+            async for item in items():
+                queue.put_nowait(item)
+        finally:
+            queue.put_nowait(_DONE)
+
+    reset = _CURRENT_TOKEN.set(token)
+    try:
+        task = asyncio.ensure_future(pump())
+    finally:
+        _CURRENT_TOKEN.reset(reset)
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout if timeout else None
+    reason = "disconnect"
+    try:
+        while True:
+            try:
+                item = await asyncio.wait_for(queue.get(), None if deadline is None else max(0.0, deadline - loop.time()))
+            except asyncio.TimeoutError:
+                reason = "timeout"
+                raise RequestCancelled(reason)
+            if item is _DONE:
+                break
+            yield item
+        # Propaga o erro de items(), se houver
+        await task
+    finally:
+        if not task.done():
+            token.cancel(reason)
+            task.cancel()
+            CANCELLED_REQUESTS.inc(endpoint=endpoint, reason=reason)
@@ -0,0 +1,82 @@
+import asyncio
+import math
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, TypeVar
+
+from api.services.concurrency.admission import Overloaded
+from api.services.monitoring.metrics import COALESCED_REQUESTS, SHED_REQUESTS
+
+T = TypeVar("T")
+
+
+class ConversationLocks:
+    """
+    Um asyncio.Lock por conversa: turnos da mesma conversa rodam em série,
+    sem intercalar current_question, answer e conversation_history.
+    A espera pelo lock é limitada por max_wait (Overloaded ao estourar).
+    Locks sem uso são descartados para o dicionário não crescer sem limite
+    """
+
+    def __init__(self, endpoint: str, max_wait: Optional[float] = None):
+        self.endpoint = endpoint
+        self.max_wait = max_wait
+        # conversa -> [lock, usuários (com o lock ou esperando)]
+        self._locks: Dict[str, List[Any]] = {}
+
+    @asynccontextmanager
+    async def hold(self, conversation_id: str):
+        entry = self._locks.setdefault(conversation_id, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            try:
+                await asyncio.wait_for(entry[0].acquire(), timeout=self.max_wait)
+            except asyncio.TimeoutError:
+                SHED_REQUESTS.inc(endpoint=self.endpoint)
+                raise Overloaded(max(1, math.ceil(self.max_wait)))
+            try:
+                yield
+            finally:
+                entry[0].release()
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._locks[conversation_id]
+
+
+class RequestCoalescer:
+    """
+    Junta chamadas idênticas concorrentes: a primeira executa o trabalho e as
+    demais aguardam o mesmo resultado. Se a primeira for cancelada (cliente
+    desconectou), a próxima que ainda espera assume a execução
+    """
+
+    def __init__(self, endpoint: str):
+        self.endpoint = endpoint
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+
+    async def run(self, key: Hashable, work: Callable[[], Awaitable[T]]) -> T:
+        while key in self._inflight:
+            future = self._inflight[key]
+            COALESCED_REQUESTS.inc(endpoint=self.endpoint)
+            # asyncio.wait não propaga o cancelamento de quem espera para o líder
+            await asyncio.wait({future})
+            if not future.cancelled():
+                return future.result()
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await work()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Marca a exceção como consumida quando ninguém mais espera por ela
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._inflight[key]
@@ -0,0 +1,186 @@
+import asyncio
+import contextvars
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, Deque, Dict, Optional, Tuple
+
+from api.services.concurrency.admission import per_worker_limit
+from api.services.monitoring.metrics import WORK_QUEUE_DEPTH, WORK_QUEUE_WAIT
+
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+# Ordem de atendimento: turnos do /chat sempre antes de trabalho de fundo
+PRIORITIES = (INTERACTIVE, BACKGROUND)
+
+_WORK_CLASS: contextvars.ContextVar[Tuple[str, str]] = contextvars.ContextVar(
+    "work_class", default=(INTERACTIVE, "default")
+)
+
+
+@contextmanager
+def work_class(priority: str, tenant: str = "default"):
+    """
+    Classe de prioridade e tenant (conversa ou documento) do trabalho feito
+    no bloco; propaga para threads via asyncio.to_thread
+    """
+    if priority not in PRIORITIES:
+        raise ValueError(f"Prioridade desconhecida: {priority}")
+    reset = _WORK_CLASS.set((priority, tenant))
+    try:
+        yield
+    finally:
+        _WORK_CLASS.reset(reset)
+
+
+def current_work_class() -> Tuple[str, str]:
+    return _WORK_CLASS.get()
+
+
+def background_share() -> float:
+    """Fração da capacidade que o trabalho de fundo pode ocupar"""
+    return min(1.0, max(0.0, float(os.getenv("BACKGROUND_SHARE", "0.25"))))
+
+
+class FairQueue:
+    """
+    Filas por prioridade com revezamento (round-robin) entre tenants: uma
+    conversa com muitos pedidos não passa na frente das outras.
+    Não é thread-safe; quem usa protege com o próprio lock
+    """
+
+    def __init__(self):
+        self._queues: Dict[str, "OrderedDict[str, Deque[Any]]"] = {p: OrderedDict() for p in PRIORITIES}
+        self._sizes: Dict[str, int] = {p: 0 for p in PRIORITIES}
+
+    def push(self, item: Any, priority: str, tenant: str) -> None:
+        self._queues[priority].setdefault(tenant, deque()).append(item)
+        self._sizes[priority] += 1
+
+    def peek(self, priority: str) -> Optional[Any]:
+        tenants = self._queues[priority]
+        if not tenants:
+            return None
+        return next(iter(tenants.values()))[0]
+
+    def pop(self, priority: str) -> Optional[Any]:
+        tenants = self._queues[priority]
+        if not tenants:
+            return None
+        tenant, items = next(iter(tenants.items()))
+        item = items.popleft()
+        # O tenant atendido vai para o fim da fila
+        del tenants[tenant]
+        if items:
+            tenants[tenant] = items
+        self._sizes[priority] -= 1
+        return item
+
+    def size(self, priority: str) -> int:
+        return self._sizes[priority]
+
+    def __len__(self) -> int:
+        return sum(self._sizes.values())
+
+
+class WorkScheduler:
+    """
+    Vagas de um recurso compartilhado (ex.: chamadas simultâneas ao LLM).
+    Pedidos interativos são atendidos antes dos de fundo; dentro de cada
+    classe, os tenants se revezam. O trabalho de fundo nunca ocupa mais que
+    background_share das vagas, deixando folga para o /chat.
+    Funciona a partir de threads (slot) e corrotinas (aslot)
+    """
+
+    def __init__(self, resource: str, capacity: int, background_share: float = 0.25):
+        self.resource = resource
+        self.capacity = max(1, capacity)
+        self.background_limit = max(1, int(self.capacity * background_share))
+        self.running: Dict[str, int] = {p: 0 for p in PRIORITIES}
+        self._pending = FairQueue()
+        self._lock = threading.Lock()
+
+    def _can_start(self, priority: str) -> bool:
+        if sum(self.running.values()) >= self.capacity:
+            return False
+        if priority == BACKGROUND:
+            return self.running[BACKGROUND] < self.background_limit and not self._pending.size(INTERACTIVE)
+        return True
+
+    def _update_depth(self) -> None:
+        for priority in PRIORITIES:
+            WORK_QUEUE_DEPTH.set(self._pending.size(priority), resource=self.resource, priority=priority)
+
+    def submit(self) -> Tuple[Future, str]:
+        """Pede uma vaga; o Future é concluído quando ela for concedida"""
+        priority, tenant = current_work_class()
+        future: Future = Future()
+        with self._lock:
+            if not self._pending.size(priority) and self._can_start(priority):
+                future.set_running_or_notify_cancel()
+                self.running[priority] += 1
+                future.set_result(None)
+                WORK_QUEUE_WAIT.observe(0.0, resource=self.resource, priority=priority)
+            else:
+                self._pending.push((future, time.perf_counter()), priority, tenant)
+                self._update_depth()
+        return future, priority
+
+    def release(self, priority: str) -> None:
+        with self._lock:
+            self.running[priority] -= 1
+            self._dispatch()
+
+    def _dispatch(self) -> None:
+        # Chamado com o lock
+        for priority in PRIORITIES:
+            while self._pending.size(priority) and self._can_start(priority):
+                future, enqueued = self._pending.pop(priority)
+                # Pedidos cancelados enquanto esperavam são descartados
+                if not future.set_running_or_notify_cancel():
+                    continue
+                self.running[priority] += 1
+                future.set_result(None)
+                WORK_QUEUE_WAIT.observe(time.perf_counter() - enqueued, resource=self.resource, priority=priority)
+        self._update_depth()
+
+    @contextmanager
+    def slot(self):
+        future, priority = self.submit()
+        future.result()
+        try:
+            yield
+        finally:
+            self.release(priority)
+
+    @asynccontextmanager
+    async def aslot(self):
+        future, priority = self.submit()
+        try:
+            await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            # cancel() falha se a vaga já foi concedida: devolve para o próximo
+            if not future.cancel():
+                self.release(priority)
+            raise
+        try:
+            yield
+        finally:
+            self.release(priority)
+
+
+_SCHEDULERS: Dict[str, WorkScheduler] = {}
+_SCHEDULERS_LOCK = threading.Lock()
+
+
+def get_scheduler(resource: str) -> WorkScheduler:
+    """Scheduler compartilhado do recurso; a capacidade vem de <RECURSO>_MAX_CONCURRENT"""
+    with _SCHEDULERS_LOCK:
+        if resource not in _SCHEDULERS:
+            # Limite global dividido entre os workers do servidor pré-fork
+            capacity = per_worker_limit(int(os.getenv(f"{resource.upper()}_MAX_CONCURRENT", "8")))
+            _SCHEDULERS[resource] = WorkScheduler(resource, capacity, background_share())
+        return _SCHEDULERS[resource]
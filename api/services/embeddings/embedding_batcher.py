@@ -0,0 +1,217 @@
+import asyncio
+import os
+import threading
+import time
+import weakref
+from concurrent.futures import Future, InvalidStateError
+from typing import Callable, List, Optional
+
+from api.services.concurrency.scheduler import BACKGROUND, INTERACTIVE, PRIORITIES, FairQueue, current_work_class
+from api.services.monitoring.metrics import (
+    EMBEDDING_BATCH_SIZE,
+    EMBEDDING_QUEUE_WAIT,
+    CANCELLED_WORK,
+    WORK_QUEUE_DEPTH,
+    WORK_QUEUE_WAIT
+)
+
+
+class _Request:
+    """Pedido de embedding de um chamador; pode ser dividido em partes"""
+
+    __slots__ = ("future", "results", "remaining", "lock")
+
+    def __init__(self, size: int, parts: int):
+        self.future: Future = Future()
+        self.results: List[Optional[List[float]]] = [None] * size
+        self.remaining = parts
+        self.lock = threading.Lock()
+
+    def fill(self, offset: int, vectors: List[List[float]]) -> None:
+        self.results[offset:offset + len(vectors)] = vectors
+        with self.lock:
+            self.remaining -= 1
+            done = self.remaining == 0
+        if done and not self.future.done():
+            try:
+                self.future.set_result(self.results)
+            except InvalidStateError:
+                # Cancelado (aembed) entre o done() e o set_result
+                pass
+
+    def fail(self, error: BaseException) -> None:
+        if not self.future.done():
+            try:
+                self.future.set_exception(error)
+            except InvalidStateError:
+                pass
+
+
+class _Part:
+    __slots__ = ("request", "offset", "texts", "priority", "enqueued")
+
+    def __init__(self, request: _Request, offset: int, texts: List[str], priority: str):
+        self.request = request
+        self.offset = offset
+        self.texts = texts
+        self.priority = priority
+        self.enqueued = time.perf_counter()
+
+
+class EmbeddingBatcher:
+    """
+    Agrupa pedidos de embedding de várias threads e corrotinas em lotes.
+    Uma única thread chama o modelo: o primeiro pedido espera no máximo
+    max_wait pelos seguintes (ou até max_batch textos) e o lote é executado
+    de uma vez, com os resultados devolvidos a cada chamador. Pedidos grandes
+    (ingestão) são divididos em partes de até max_batch textos.
+    Consultas interativas entram nos lotes antes do trabalho de fundo, que
+    ocupa no máximo background_share de um lote com consultas; os tenants
+    (conversas, documentos) se revezam dentro de cada classe
+    """
+
+    def __init__(
+        self,
+        embed_fn: Callable[[List[str]], List[List[float]]],
+        max_batch: int = 64,
+        max_wait: float = 0.002,
+        background_share: float = 0.25
+    ):
+        self.embed_fn = embed_fn
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max(0.0, max_wait)
+        # Partes de fundo menores: uma consulta nunca espera um lote inteiro de ingestão
+        self.background_batch = max(1, int(self.max_batch * background_share))
+        self._pending = FairQueue()
+        self._ready = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        _BATCHERS.add(self)
+
+    def _after_fork(self) -> None:
+        # Threads não sobrevivem ao fork: o worker recria a sua no primeiro pedido
+        self._pending = FairQueue()
+        self._ready = threading.Condition()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _ensure_worker(self) -> None:
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+                    self._thread.start()
+
+    def submit(self, texts: List[str]) -> Future:
+        """Enfileira os textos; o Future recebe os vetores na mesma ordem"""
+        texts = list(texts)
+        priority, tenant = current_work_class()
+        step = self.max_batch if priority == INTERACTIVE else self.background_batch
+        slices = range(0, len(texts), step)
+        request = _Request(len(texts), len(slices))
+        if not texts:
+            request.future.set_result([])
+            return request.future
+        self._ensure_worker()
+        with self._ready:
+            for offset in slices:
+                self._pending.push(_Part(request, offset, texts[offset:offset + step], priority), priority, tenant)
+            self._update_depth()
+            self._ready.notify()
+        return request.future
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        return self.submit(texts).result()
+
+    async def aembed(self, texts: List[str]) -> List[List[float]]:
+        return await asyncio.wrap_future(self.submit(texts))
+
+    def _update_depth(self) -> None:
+        for priority in PRIORITIES:
+            WORK_QUEUE_DEPTH.set(self._pending.size(priority), resource="embedding", priority=priority)
+
+    def _select(self, room: int, background_room: int) -> Optional[_Part]:
+        """Próxima parte que cabe no lote: interativas primeiro (chamado com o lock)"""
+        part = self._pending.peek(INTERACTIVE)
+        if part is not None:
+            return self._pending.pop(INTERACTIVE) if len(part.texts) <= room else None
+        part = self._pending.peek(BACKGROUND)
+        if part is not None and len(part.texts) <= min(room, background_room):
+            return self._pending.pop(BACKGROUND)
+        return None
+
+    def _collect(self) -> List[_Part]:
+        with self._ready:
+            while not self._pending:
+                self._ready.wait()
+            batch = [self._pending.pop(INTERACTIVE) or self._pending.pop(BACKGROUND)]
+            size = len(batch[0].texts)
+            deadline = time.perf_counter() + self.max_wait
+            while size < self.max_batch:
+                interactive = any(part.priority == INTERACTIVE for part in batch)
+                background = sum(len(part.texts) for part in batch if part.priority == BACKGROUND)
+                # Sem consultas no lote, a ingestão pode ocupá-lo por inteiro
+                background_room = self.background_batch - background if interactive else self.max_batch
+                part = self._select(self.max_batch - size, background_room)
+                if part is None:
+                    timeout = deadline - time.perf_counter()
+                    if timeout <= 0:
+                        break
+                    self._ready.wait(timeout)
+                    continue
+                batch.append(part)
+                size += len(part.texts)
+            self._update_depth()
+        return batch
+
+    def _execute(self, batch: List[_Part]) -> None:
+        # Pedidos cancelados (aembed de uma requisição cancelada) saem do lote
+        cancelled = sum(1 for part in batch if part.request.future.cancelled())
+        if cancelled:
+            CANCELLED_WORK.inc(cancelled, stage="embedding")
+        batch = [part for part in batch if not part.request.future.done()]
+        if not batch:
+            return
+        texts = [text for part in batch for text in part.texts]
+        now = time.perf_counter()
+        for part in batch:
+            EMBEDDING_QUEUE_WAIT.observe(now - part.enqueued)
+            WORK_QUEUE_WAIT.observe(now - part.enqueued, resource="embedding", priority=part.priority)
+        EMBEDDING_BATCH_SIZE.observe(len(texts))
+        try:
+            vectors = self.embed_fn(texts)
+            if len(vectors) != len(texts):
+                raise ValueError(f"Modelo devolveu {len(vectors)} vetores para {len(texts)} textos")
+        except Exception as e:
+            for part in batch:
+                part.request.fail(e)
+            return
+
+        position = 0
+        for part in batch:
+            part.request.fill(part.offset, vectors[position:position + len(part.texts)])
+            position += len(part.texts)
+
+    def _run(self) -> None:
+        while True:
+            batch: List[_Part] = []
+            try:
+                batch = self._collect()
+                self._execute(batch)
+            except Exception as e:
+                # Um lote com erro falha só os seus pedidos: a thread continua atendendo os próximos
+                print(f"Erro no lote de embeddings: {str(e)}")
+                for part in batch:
+                    part.request.fail(e)
+
+
+_BATCHERS: "weakref.WeakSet[EmbeddingBatcher]" = weakref.WeakSet()
+
+
+def _reset_after_fork() -> None:
+    for batcher in list(_BATCHERS):
+        batcher._after_fork()
+
+
+# Workers criados por fork (api.server) herdam o batcher aquecido no processo pai
+os.register_at_fork(after_in_child=_reset_after_fork)
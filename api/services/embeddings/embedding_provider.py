@@ -0,0 +1,95 @@
+import os
+import threading
+from typing import List, Optional
+
+from langchain_core.embeddings import Embeddings
+
+from api.services.concurrency.scheduler import background_share
+from api.services.embeddings.embedding_batcher import EmbeddingBatcher
+from api.services.monitoring.startup import startup_report
+
+DEFAULT_EMBEDDING_MODEL = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+
+
+class LazyEmbeddings(Embeddings):
+    """
+    Modelo de embeddings compartilhado pelo processo, carregado apenas no
+    primeiro uso (ou no aquecimento), evitando imports pesados de torch e
+    transformers no import da aplicação
+    """
+
+    def __init__(self, model_name: str, backend: str = "huggingface", batcher_options: Optional[dict] = None):
+        self.model_name = model_name
+        self.backend = backend
+        self._model: Optional[Embeddings] = None
+        self._lock = threading.Lock()
+        # Pedidos concorrentes são agrupados em lotes executados por uma única thread
+        self.batcher: Optional[EmbeddingBatcher] = None
+        if batcher_options is not None:
+            self.batcher = EmbeddingBatcher(self._embed_batch, **batcher_options)
+
+    @property
+    def loaded(self) -> bool:
+        return self._model is not None
+
+    def load(self) -> Embeddings:
+        """Importa as dependências e carrega o modelo uma única vez"""
+        if self._model is None:
+            with self._lock:
+                if self._model is None and self.backend == "hashing":
+                    from api.services.embeddings.hashing_embeddings import HashingEmbeddings
+                    self._model = HashingEmbeddings()
+                if self._model is None:
+                    with startup_report.phase("langchain_community.embeddings", "import"):
+                        from langchain_community.embeddings import HuggingFaceEmbeddings
+                    with startup_report.phase(self.model_name, "model"):
+                        self._model = HuggingFaceEmbeddings(model_name=self.model_name)
+        return self._model
+
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        # Consultas e documentos usam o mesmo encoder nos backends suportados
+        return self.load().embed_documents(texts)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if self.batcher is not None:
+            return self.batcher.embed(texts)
+        return self.load().embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        if self.batcher is not None:
+            return self.batcher.embed([text])[0]
+        return self.load().embed_query(text)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        if self.batcher is not None:
+            return await self.batcher.aembed(texts)
+        return await super().aembed_documents(texts)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        if self.batcher is not None:
+            return (await self.batcher.aembed([text]))[0]
+        return await super().aembed_query(text)
+
+
+_EMBEDDINGS: Optional[LazyEmbeddings] = None
+_EMBEDDINGS_LOCK = threading.Lock()
+
+
+def get_embeddings() -> LazyEmbeddings:
+    """Retorna o modelo de embeddings compartilhado por todos os componentes"""
+    global _EMBEDDINGS
+    with _EMBEDDINGS_LOCK:
+        if _EMBEDDINGS is None:
+            batcher_options = None
+            if os.getenv("EMBEDDING_BATCHING", "true").lower() == "true":
+                batcher_options = {
+                    "max_batch": int(os.getenv("EMBEDDING_MAX_BATCH", "64")),
+                    "max_wait": float(os.getenv("EMBEDDING_BATCH_WAIT_MS", "2")) / 1000,
+                    "background_share": background_share()
+                }
+            _EMBEDDINGS = LazyEmbeddings(
+                os.getenv("EMBEDDING_MODEL", DEFAULT_EMBEDDING_MODEL),
+                backend=os.getenv("EMBEDDING_BACKEND", "huggingface"),
+                batcher_options=batcher_options
+            )
+        return _EMBEDDINGS
@@ -0,0 +1,40 @@
+import hashlib
+import re
+from typing import List
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+
+class HashingEmbeddings(Embeddings):
+    """
+    Embeddings determinísticos por hashing de palavras e bigramas.
+    Não exigem download de modelo: usados em benchmarks, testes de carga
+    e ambientes offline (EMBEDDING_BACKEND=hashing)
+    """
+
+    def __init__(self, dimension: int = 384):
+        self.dimension = dimension
+
+    def _bucket(self, token: str) -> int:
+        digest = hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest()
+        return int.from_bytes(digest, "little")
+
+    def _embed(self, text: str) -> List[float]:
+        vector = np.zeros(self.dimension, dtype=np.float32)
+        words = re.findall(r"\w+", text.lower())
+        tokens = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+        for token in tokens:
+            bucket = self._bucket(token)
+            # O bit mais alto define o sinal, reduzindo colisões sistemáticas
+            vector[bucket % self.dimension] += 1.0 if bucket >> 63 else -1.0
+        norm = np.linalg.norm(vector)
+        if norm:
+            vector /= norm
+        return vector.tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
@@ -0,0 +1,204 @@
+import hashlib
+import os
+import re
+from collections import Counter
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+_WORD = re.compile(r"\w+")
+_DIGITS = re.compile(r"\d+")
+_BIT_SHIFTS = np.arange(64, dtype=np.uint64)
+
+
+def _hash64(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def simhash(text: str, shingle: int = 3) -> int:
+    """Assinatura SimHash de 64 bits sobre shingles de palavras"""
+    words = _WORD.findall(text.lower())
+    if not words:
+        return 0
+    if len(words) < shingle:
+        shingles = [" ".join(words)]
+    else:
+        shingles = [" ".join(words[i:i + shingle]) for i in range(len(words) - shingle + 1)]
+
+    counted = Counter(shingles)
+    hashes = np.fromiter((_hash64(value) for value in counted), dtype=np.uint64, count=len(counted))
+    counts = np.fromiter(counted.values(), dtype=np.int64, count=len(counted))
+    bits = (hashes[:, None] >> _BIT_SHIFTS) & np.uint64(1)
+    weights = (counts[:, None] * (2 * bits.astype(np.int64) - 1)).sum(axis=0)
+    return int(sum(1 << bit for bit in np.flatnonzero(weights > 0).tolist()))
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+def normalize_line(line: str) -> str:
+    """Normaliza uma linha para comparação entre páginas (números de página variam)"""
+    return " ".join(_DIGITS.sub("#", line.lower()).split())
+
+
+class Deduplicator:
+    """
+    Remove repetições na ingestão: cabeçalhos e rodapés que se repetem nas
+    bordas das páginas e trechos repetidos (cláusulas padrão, tabelas
+    repetidas). Por padrão só saem trechos idênticos após normalizar espaços
+    e maiúsculas; com max_distance > 0, também os quase idênticos, por
+    SimHash com índice por bandas
+    """
+
+    def __init__(
+        self,
+        edge_lines: int = 3,
+        min_page_ratio: float = 0.5,
+        max_distance: Optional[int] = None,
+        bands: int = 8
+    ):
+        self.edge_lines = edge_lines
+        self.min_page_ratio = min_page_ratio
+        # Em trechos de ~800 caracteres, trocar uma palavra muda ~5 bits: qualquer limiar
+        # acima de 0 pode juntar cláusulas que diferem só em um valor, data ou nome
+        if max_distance is None:
+            max_distance = int(os.getenv("DEDUP_MAX_DISTANCE", "0"))
+        self.max_distance = max(0, max_distance)
+        # Com distância <= bands - 1, trechos parecidos coincidem em ao menos uma banda
+        self.bands = max(bands, self.max_distance + 1)
+
+    def strip_page_boilerplate(self, pages: Sequence[str]) -> Tuple[List[str], Dict[str, Any]]:
+        """Remove das bordas de cada página as linhas repetidas na maioria das páginas"""
+        report = {"pages": len(pages), "boilerplate_lines": 0, "boilerplate_chars": 0, "boilerplate_patterns": []}
+        if len(pages) < 2:
+            return list(pages), report
+
+        page_lines = [page.split("\n") for page in pages]
+        top: Counter = Counter()
+        bottom: Counter = Counter()
+        for lines in page_lines:
+            top.update({normalize_line(line) for line in lines[:self.edge_lines] if line.strip()})
+            bottom.update({normalize_line(line) for line in lines[-self.edge_lines:] if line.strip()})
+
+        minimum = max(2, int(self.min_page_ratio * len(pages) + 0.5))
+        repeated_top = {line for line, count in top.items() if count >= minimum}
+        repeated_bottom = {line for line, count in bottom.items() if count >= minimum}
+        report["boilerplate_patterns"] = sorted(repeated_top | repeated_bottom)
+        if not report["boilerplate_patterns"]:
+            return list(pages), report
+
+        cleaned = []
+        for lines in page_lines:
+            # Só remove nas bordas: o mesmo texto no meio da página é conteúdo
+            edges = [(index, repeated_top) for index in range(min(self.edge_lines, len(lines)))]
+            edges += [
+                (index, repeated_bottom)
+                for index in range(max(self.edge_lines, len(lines) - self.edge_lines), len(lines))
+            ]
+            removed = {
+                index for index, repeated in edges
+                if lines[index].strip() and normalize_line(lines[index]) in repeated
+            }
+            for index in removed:
+                report["boilerplate_lines"] += 1
+                report["boilerplate_chars"] += len(lines[index])
+            cleaned.append("\n".join(line for index, line in enumerate(lines) if index not in removed))
+        return cleaned, report
+
+    def strip_repeated_blocks(self, pages: Sequence[str], window: int = 3, min_chars: int = 60) -> Tuple[List[str], Dict[str, Any]]:
+        """
+        Remove blocos de `window` linhas idênticas que se repetem na maioria
+        das páginas (avisos e cláusulas padrão fora das bordas), mantendo a
+        primeira ocorrência. Um bloco repetido em poucas páginas é conteúdo
+        """
+        report = {"repeated_block_lines": 0, "repeated_block_chars": 0}
+        if len(pages) < 2:
+            return list(pages), report
+
+        page_lines = [page.split("\n") for page in pages]
+        page_blocks: List[List[Tuple[int, int]]] = []
+        counts: Counter = Counter()
+        for lines in page_lines:
+            normalized = [" ".join(line.split()) for line in lines]
+            blocks = []
+            for start in range(len(lines) - window + 1):
+                block = normalized[start:start + window]
+                if all(block) and sum(len(line) for line in block) >= min_chars:
+                    blocks.append((start, _hash64("\n".join(block))))
+            page_blocks.append(blocks)
+            counts.update({key for _, key in blocks})
+
+        minimum = max(2, int(self.min_page_ratio * len(pages) + 0.5))
+        repeated = {key for key, count in counts.items() if count >= minimum}
+        if not repeated:
+            return list(pages), report
+
+        seen = set()
+        cleaned = []
+        for lines, blocks in zip(page_lines, page_blocks):
+            removed = set()
+            for start, key in blocks:
+                if key not in repeated:
+                    continue
+                if key in seen:
+                    removed.update(range(start, start + window))
+                else:
+                    seen.add(key)
+            for index in removed:
+                report["repeated_block_lines"] += 1
+                report["repeated_block_chars"] += len(lines[index])
+            cleaned.append("\n".join(line for index, line in enumerate(lines) if index not in removed))
+        return cleaned, report
+
+    def clean_pages(self, pages: Sequence[str]) -> Tuple[List[str], Dict[str, Any]]:
+        """Aplica a remoção de cabeçalhos/rodapés e de blocos repetidos"""
+        pages, report = self.strip_page_boilerplate(pages)
+        pages, blocks = self.strip_repeated_blocks(pages)
+        report.update(blocks)
+        return pages, report
+
+    def _bands(self, signature: int) -> List[Tuple[int, int]]:
+        width = 64 // self.bands
+        mask = (1 << width) - 1
+        return [(band, signature >> (band * width) & mask) for band in range(self.bands)]
+
+    def dedupe_chunks(self, pieces: Sequence[Tuple[str, str]]) -> Tuple[List[Tuple[str, str]], Dict[str, Any]]:
+        """Mantém a primeira ocorrência de cada grupo de trechos repetidos"""
+        buckets: Dict[Tuple[int, int], List[int]] = {}
+        signatures: List[int] = []
+        exact = set()
+        kept: List[Tuple[str, str]] = []
+        removed_chars = 0
+
+        for section, chunk in pieces:
+            if self.max_distance == 0:
+                # Só duplicatas exatas: números, datas e nomes continuam distinguindo os trechos
+                key = _hash64(" ".join(chunk.lower().split()))
+                if key in exact:
+                    removed_chars += len(chunk)
+                    continue
+                exact.add(key)
+                kept.append((section, chunk))
+                continue
+            signature = simhash(chunk)
+            bands = self._bands(signature)
+            duplicate = any(
+                hamming(signature, signatures[other]) <= self.max_distance
+                for band in bands
+                for other in buckets.get(band, ())
+            )
+            if duplicate:
+                removed_chars += len(chunk)
+                continue
+            for band in bands:
+                buckets.setdefault(band, []).append(len(signatures))
+            signatures.append(signature)
+            kept.append((section, chunk))
+
+        return kept, {
+            "chunks_before": len(pieces),
+            "chunks_after": len(kept),
+            "duplicate_chunks": len(pieces) - len(kept),
+            "duplicate_chars": removed_chars
+        }
@@ -0,0 +1,128 @@
+import os
+from difflib import SequenceMatcher
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Perfis de extração de texto
+ACCURATE = "accurate"  # page.extract_text do pdfplumber: agrupa caracteres em palavras e linhas
+FAST = "fast"  # fluxo de caracteres do pdfminer, sem análise de layout nem desenhos vetoriais
+AUTO = "auto"  # escolhe entre os dois por uma sonda nas primeiras páginas
+PROFILES = (ACCURATE, FAST, AUTO)
+
+# A sonda usa a primeira página com texto suficiente entre as primeiras
+PROBE_PAGES = 3
+PROBE_MIN_CHARS = 200
+
+
+def default_profile() -> str:
+    profile = os.getenv("PDF_EXTRACTION_PROFILE", AUTO).lower()
+    return profile if profile in PROFILES else AUTO
+
+
+@lru_cache(maxsize=1)
+def _fast_classes():
+    # Import tardio: pdfminer só é carregado no primeiro upload
+    from pdfminer.pdfdevice import PDFTextDevice
+    from pdfminer.pdffont import PDFUnicodeNotDefined
+    from pdfminer.pdfinterp import PDFPageInterpreter
+
+    class TextOnlyInterpreter(PDFPageInterpreter):
+        def _skip(self, *args):
+            pass
+
+        # Operadores de caminho, pintura e sombreamento viram no-ops
+        do_m = do_l = do_c = do_v = do_y = do_h = do_re = _skip
+        do_S = do_s = do_f = do_F = do_f_a = do_B = do_B_a = do_b = do_b_a = do_n = _skip
+        do_W = do_W_a = do_sh = _skip
+
+    class CharCollector(PDFTextDevice):
+        def __init__(self, rsrcmgr):
+            super().__init__(rsrcmgr)
+            self.parts: List[str] = []
+            self.last: Optional[Tuple[float, float, float]] = None
+
+        def render_char(self, matrix, font, fontsize, scaling, rise, cid, ncs, graphicstate):
+            try:
+                text = font.to_unichr(cid)
+            except PDFUnicodeNotDefined:
+                text = ""
+            advance = font.char_width(cid) * fontsize * scaling
+            x, y = matrix[4], matrix[5]
+            if self.last is not None:
+                end, line, size = self.last
+                if abs(y - line) > size * 0.5:
+                    self.parts.append("\n")
+                elif x > end + size * 0.2 and not text.isspace():
+                    self.parts.append(" ")
+            self.parts.append(text)
+            self.last = (x + advance * matrix[0], y, abs(matrix[3]) * fontsize or fontsize)
+            return advance
+
+    return TextOnlyInterpreter, CharCollector
+
+
+def fast_text(pdf, page) -> str:
+    """
+    Só os caracteres, na ordem em que aparecem no conteúdo da página, com
+    quebras de linha e espaços deduzidos das posições
+    """
+    interpreter, collector = _fast_classes()
+    device = collector(pdf.rsrcmgr)
+    interpreter(pdf.rsrcmgr, device).process_page(page.page_obj)
+    return "".join(device.parts)
+
+
+def page_text(pdf, page, profile: str) -> str:
+    """Texto de uma página do pdfplumber no perfil ACCURATE ou FAST"""
+    if profile == FAST:
+        return fast_text(pdf, page)
+    return page.extract_text() or ""
+
+
+def _lines(text: str) -> List[str]:
+    return [" ".join(line.split()) for line in text.splitlines() if line.strip()]
+
+
+def profile_agreement(accurate: str, fast: str) -> float:
+    """
+    Fração das linhas do perfil preciso que o rápido reproduz na mesma ordem
+    (títulos de seção são linhas, e a ordem decide a seção de cada trecho)
+    """
+    expected, produced = _lines(accurate), _lines(fast)
+    if not expected:
+        return 0.0
+    matcher = SequenceMatcher(None, expected, produced, autojunk=False)
+    return sum(block.size for block in matcher.get_matching_blocks()) / len(expected)
+
+
+def probe_profile(
+    extract: Callable[[int, str], Optional[str]],
+    total_pages: int,
+    threshold: float = 0.9
+) -> Tuple[str, Dict[str, Any], Dict[Tuple[int, str], str]]:
+    """
+    Extrai uma página de amostra nos dois perfis e escolhe FAST se ele
+    reproduz as linhas do ACCURATE (colunas, texto girado e ordem de desenho
+    estranha derrubam a concordância). Sem amostra com texto, fica ACCURATE.
+    Retorna o perfil, o relatório da sonda e os textos já extraídos
+    """
+    extracted: Dict[Tuple[int, str], str] = {}
+    for index in range(min(PROBE_PAGES, total_pages)):
+        accurate = extract(index, ACCURATE)
+        if accurate is None:
+            continue
+        extracted[(index, ACCURATE)] = accurate
+        if len(accurate) < PROBE_MIN_CHARS:
+            continue
+        fast = extract(index, FAST)
+        if fast is None:
+            continue
+        extracted[(index, FAST)] = fast
+        agreement = profile_agreement(accurate, fast)
+        profile = FAST if agreement >= threshold else ACCURATE
+        return profile, {"page": index + 1, "agreement": round(agreement, 3)}, extracted
+    return ACCURATE, {"page": None, "agreement": None}, extracted
+
+
+def probe_threshold() -> float:
+    return float(os.getenv("PDF_PROBE_AGREEMENT", "0.9"))
@@ -0,0 +1,297 @@
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from io import BytesIO
+from typing import Any, Dict, List, Optional, Tuple
+
+from api.services.concurrency.cancellation import check_cancelled, RequestCancelled
+from api.services.extractors.page_text import ACCURATE, AUTO, FAST, page_text, probe_profile, probe_threshold
+from api.services.monitoring.metrics import DEGRADED_PAGES, PAGE_WORKER_RESTARTS
+from api.services.monitoring.tracing import span
+
+# Intervalo em que o processo pai confere prazo, memória e cancelamento
+_POLL_INTERVAL = 0.05
+
+
+class PageBudgetExceeded(Exception):
+    """A página estourou o orçamento (timeout, memory) ou derrubou o worker (crash)"""
+
+    def __init__(self, reason: str):
+        super().__init__(f"Orçamento da página excedido: {reason}")
+        self.reason = reason
+
+
+class PageExtractionError(Exception):
+    """Erro do pdfplumber/pdfminer ao extrair; o worker continua utilizável"""
+
+
+def _worker_main(conn) -> None:
+    """Laço do processo isolado: abre um PDF e extrai páginas sob demanda"""
+    import pdfplumber
+
+    pdf = None
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            # O processo pai terminou
+            break
+        try:
+            if message[0] == "open":
+                if pdf is not None:
+                    pdf.close()
+                pdf = pdfplumber.open(BytesIO(message[1]))
+                conn.send(("ok", {"total_pages": len(pdf.pages), "pdf_info": pdf.metadata}))
+            elif message[0] == "page":
+                _, index, profile = message
+                page = pdf.pages[index]
+                text = page_text(pdf, page, profile)
+                # Descarta os objetos da página: documentos grandes não acumulam memória
+                page.flush_cache()
+                conn.send(("ok", text or ""))
+            elif message[0] == "close":
+                if pdf is not None:
+                    pdf.close()
+                    pdf = None
+                conn.send(("ok", None))
+        except MemoryError:
+            conn.send(("memory", None))
+        except Exception as e:
+            conn.send(("error", f"{type(e).__name__}: {str(e)}"))
+
+
+class PageWorker:
+    """
+    Processo isolado de extração. Cada pedido tem prazo e limite de memória
+    (RSS); ao estourar, o processo é morto e recriado no pedido seguinte
+    """
+
+    def __init__(self, context):
+        self._context = context
+        self.process = None
+        self.conn = None
+        # Id do documento aberto no processo (some junto com ele ao ser morto)
+        self.document: Optional[int] = None
+
+    def start(self) -> None:
+        if self.process is None or not self.process.is_alive():
+            self._start()
+
+    def _start(self) -> None:
+        parent, child = self._context.Pipe()
+        self.process = self._context.Process(target=_worker_main, args=(child,), name="pdf-page-worker", daemon=True)
+        self.process.start()
+        child.close()
+        self.conn = parent
+        self.document = None
+
+    def kill(self, reason: str) -> None:
+        if self.process is not None:
+            PAGE_WORKER_RESTARTS.inc(reason=reason)
+            self.process.kill()
+            self.process.join()
+            self.conn.close()
+        self.process = None
+        self.conn = None
+        self.document = None
+
+    def _rss(self) -> int:
+        try:
+            with open(f"/proc/{self.process.pid}/statm") as f:
+                return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except (OSError, ValueError, IndexError):
+            # Sem /proc: só o prazo é aplicado
+            return 0
+
+    def call(self, message: Tuple, timeout: float, memory_limit: int = 0) -> Any:
+        """Envia um pedido e espera a resposta dentro do orçamento"""
+        self.start()
+        self.conn.send(message)
+        deadline = time.monotonic() + timeout
+        while not self.conn.poll(_POLL_INTERVAL):
+            try:
+                # Upload cancelado: não espera a página terminar
+                check_cancelled("extraction")
+            except RequestCancelled:
+                self.kill("cancelled")
+                raise
+            if time.monotonic() > deadline:
+                self.kill("timeout")
+                raise PageBudgetExceeded("timeout")
+            if memory_limit and self._rss() > memory_limit:
+                self.kill("memory")
+                raise PageBudgetExceeded("memory")
+        try:
+            status, value = self.conn.recv()
+        except (EOFError, OSError):
+            self.kill("crash")
+            raise PageBudgetExceeded("crash")
+        if status == "memory":
+            self.kill("memory")
+            raise PageBudgetExceeded("memory")
+        if status == "error":
+            raise PageExtractionError(value)
+        return value
+
+
+class PageWorkerPool:
+    """
+    Extrai as páginas de um PDF em processos isolados, com orçamento de tempo
+    e memória por página. Páginas que estouram o orçamento são refeitas no
+    perfil rápido (só caracteres) e, se ainda assim estourarem, puladas;
+    passado o orçamento do documento, as páginas restantes vão direto ao
+    perfil rápido.
+    As páginas degradadas são listadas em metadata["degraded_pages"]
+    """
+
+    def __init__(
+        self,
+        size: int = 2,
+        page_timeout: float = 5.0,
+        page_memory_mb: int = 1024,
+        document_budget: float = 45.0,
+        open_timeout: float = 15.0
+    ):
+        # spawn: o processo novo não herda threads, modelo nem pools do servidor
+        context = multiprocessing.get_context("spawn")
+        self._workers = [PageWorker(context) for _ in range(max(1, size))]
+        self._idle: "queue.Queue[PageWorker]" = queue.Queue()
+        for worker in self._workers:
+            self._idle.put(worker)
+        self.page_timeout = page_timeout
+        self.memory_limit = page_memory_mb * 1024 * 1024
+        self.document_budget = document_budget
+        self.open_timeout = open_timeout
+
+    def start(self) -> None:
+        """Sobe os processos antes do primeiro upload (o spawn importa o pdfplumber)"""
+        for worker in self._workers:
+            worker.start()
+
+    @contextmanager
+    def _borrow(self):
+        while True:
+            try:
+                worker = self._idle.get(timeout=_POLL_INTERVAL)
+                break
+            except queue.Empty:
+                check_cancelled("extraction")
+        try:
+            yield worker
+        finally:
+            self._idle.put(worker)
+
+    def _open(self, worker: PageWorker, data: bytes) -> Dict[str, Any]:
+        try:
+            metadata = worker.call(("open", data), self.open_timeout, self.memory_limit)
+        except PageBudgetExceeded as e:
+            raise ValueError(f"PDF não pôde ser aberto dentro do orçamento ({e.reason})")
+        worker.document = id(data)
+        return metadata
+
+    def _page(self, worker: PageWorker, data: bytes, index: int, profile: str) -> str:
+        if worker.document != id(data):
+            # Worker recriado depois de um estouro: reabre o documento
+            self._open(worker, data)
+        return worker.call(("page", index, profile), self.page_timeout, self.memory_limit)
+
+    def _probe(self, worker: PageWorker, data: bytes, index: int, profile: str) -> Optional[str]:
+        try:
+            return self._page(worker, data, index, profile)
+        except (PageBudgetExceeded, PageExtractionError):
+            # A página é refeita (e reportada) na extração normal
+            return None
+
+    def _extract_page(
+        self,
+        worker: PageWorker,
+        data: bytes,
+        index: int,
+        profile: str,
+        over_budget: bool
+    ) -> Tuple[str, Optional[Dict[str, Any]]]:
+        start = time.monotonic()
+        reason = "document_budget" if over_budget and profile != FAST else None
+        for mode in ([FAST] if over_budget or profile == FAST else [ACCURATE, FAST]):
+            try:
+                text = self._page(worker, data, index, mode)
+            except PageBudgetExceeded as e:
+                reason = e.reason
+                continue
+            except PageExtractionError as e:
+                print(f"Erro ao extrair página {index + 1} ({mode}): {str(e)}")
+                reason = "error"
+                continue
+            if reason is None:
+                return text, None
+            DEGRADED_PAGES.inc(reason=reason, outcome=mode)
+            return text, {"page": index + 1, "reason": reason, "mode": mode, "seconds": round(time.monotonic() - start, 3)}
+        DEGRADED_PAGES.inc(reason=reason, outcome="skipped")
+        return "", {"page": index + 1, "reason": reason, "mode": "skipped", "seconds": round(time.monotonic() - start, 3)}
+
+    def extract(self, data: bytes, profile: str = ACCURATE) -> Tuple[List[str], Dict[str, Any]]:
+        """Texto de cada página no perfil pedido (ACCURATE, FAST ou AUTO) e os metadados do PDF"""
+        with self._borrow() as worker:
+            metadata = self._open(worker, data)
+            deadline = time.monotonic() + self.document_budget
+            probed: Dict[Tuple[int, str], str] = {}
+            if profile == AUTO:
+                with span("pdf.probe"):
+                    profile, metadata["profile_probe"], probed = probe_profile(
+                        lambda index, mode: self._probe(worker, data, index, mode),
+                        metadata["total_pages"],
+                        probe_threshold()
+                    )
+            metadata["extraction_profile"] = profile
+            pages: List[str] = []
+            degraded: List[Dict[str, Any]] = []
+            for index in range(metadata["total_pages"]):
+                check_cancelled("extraction")
+                if (index, profile) in probed:
+                    # Página já extraída pela sonda no perfil escolhido
+                    pages.append(probed[(index, profile)])
+                    continue
+                with span("pdf.page", page=index + 1):
+                    text, report = self._extract_page(
+                        worker, data, index, profile, over_budget=time.monotonic() > deadline
+                    )
+                pages.append(text)
+                if report is not None:
+                    degraded.append(report)
+            if worker.document == id(data):
+                worker.call(("close",), self.open_timeout)
+                worker.document = None
+        if degraded:
+            metadata["degraded_pages"] = degraded
+        return pages, metadata
+
+
+_POOL: Optional[PageWorkerPool] = None
+_POOL_LOCK = threading.Lock()
+
+
+def _reset_after_fork() -> None:
+    # Os processos de extração pertencem ao pai: workers do api.server criam os seus
+    global _POOL, _POOL_LOCK
+    _POOL = None
+    _POOL_LOCK = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def get_page_worker_pool() -> PageWorkerPool:
+    """Pool compartilhado pelo processo, configurado pelo ambiente"""
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = PageWorkerPool(
+                size=int(os.getenv("PDF_PAGE_WORKERS", "2")),
+                page_timeout=float(os.getenv("PDF_PAGE_TIMEOUT_SECONDS", "5")),
+                page_memory_mb=int(os.getenv("PDF_PAGE_MEMORY_MB", "1024")),
+                document_budget=float(os.getenv("PDF_EXTRACTION_BUDGET_SECONDS", "45"))
+            )
+        return _POOL
@@ -1,19 +1,54 @@
-import pdfplumber
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
+import asyncio
+import os
 import re
 from api.models.state import DocumentInfo
+from api.services.monitoring.tracing import span
+from api.services.extractors.deduplicator import Deduplicator
+from api.services.extractors.page_text import AUTO, PROFILES, default_profile, page_text, probe_profile, probe_threshold
+from api.services.extractors.page_worker import PageWorkerPool, get_page_worker_pool
+from api.services.concurrency.cancellation import check_cancelled, RequestCancelled
+
+# Heurísticas de título de seção, compiladas uma vez
+SECTION_TITLE_PATTERNS = (
+    re.compile(r'^[\d.]+ [A-Z]'),  # Numeração: "2.1 Resultados"
+    re.compile(r'^[A-Z][a-z]+ \d+'),  # Palavra capitalizada + número: "Capítulo 3"
+)
+TITLE_CANDIDATE_PATTERNS = (
+    re.compile(r'^\d+[\.\s]+[A-Z]'),  # Começa com número
+    re.compile(r'^[A-Z][a-z]+\s+\d+'),  # Palavra capitalizada + número
+)
 
 class PDFExtractor:
     """
     Responsável por processar e extrair informações de PDFs
     """
     
-    def __init__(self):
+    def __init__(self, deduplicator: Optional[Deduplicator] = None, page_workers: Optional[PageWorkerPool] = None):
         self.max_file_size = 10 * 1024 * 1024  # 10MB (RNF01)
+        # Remove cabeçalhos e rodapés repetidos antes de montar seções e conteúdo
+        if deduplicator is None and os.getenv("DEDUP_ENABLED", "true").lower() == "true":
+            deduplicator = Deduplicator()
+        self.deduplicator = deduplicator
+        # Páginas extraídas em processos isolados, com orçamento de tempo e memória por página
+        if page_workers is None and os.getenv("PDF_PAGE_ISOLATION", "true").lower() == "true":
+            page_workers = get_page_worker_pool()
+        self.page_workers = page_workers
+        # Perfil usado quando o upload não pede um: accurate, fast ou auto (sonda na primeira página)
+        self.default_profile = default_profile()
 
-    async def process_pdf(self, file) -> DocumentInfo:
+    async def process_pdf(self, file, profile: Optional[str] = None) -> DocumentInfo:
         """Processa o PDF e extrai informações estruturadas"""
+        # A extração é CPU-bound: roda em uma thread para não bloquear o event loop
+        return await asyncio.to_thread(self.extract, file, profile)
+
+    def extract(self, file, profile: Optional[str] = None) -> DocumentInfo:
+        """Versão síncrona de process_pdf"""
+        profile = profile or self.default_profile
         try:
+            if profile not in PROFILES:
+                raise ValueError(f"Perfil de extração desconhecido: {profile}")
+
             # Verifica tamanho do arquivo
             file.seek(0, 2)
             size = file.tell()
@@ -22,58 +57,100 @@ class PDFExtractor:
             if size > self.max_file_size:
                 raise ValueError("Arquivo excede o tamanho máximo de 10MB")
 
-            text_content = ""
-            sections: Dict[str, str] = {}
-            metadata: Dict[str, Any] = {}
-            
-            with pdfplumber.open(file) as pdf:
-                metadata = {
-                    "total_pages": len(pdf.pages),
-                    "pdf_info": pdf.metadata
-                }
-                
-                # Extrai texto de cada página
-                current_section = "main"
-                section_text = []
-                
-                for page in pdf.pages:
-                    text = page.extract_text()
-                    if text:
-                        # Identifica possíveis títulos de seção
-                        lines = text.split('\n')
-                        for line in lines:
-                            # Heurística para identificar títulos de seção
-                            if len(line.strip()) < 100 and (
-                                line.isupper() or 
-                                re.match(r'^[\d.]+ [A-Z]', line) or
-                                re.match(r'^[A-Z][a-z]+ \d+', line)
-                            ):
-                                if section_text:
-                                    sections[current_section] = '\n'.join(section_text)
-                                    section_text = []
-                                current_section = line.strip()
-                            else:
-                                section_text.append(line)
-                            
-                        text_content += text + "\n"
-                
-                # Adiciona última seção
-                if section_text:
-                    sections[current_section] = '\n'.join(section_text)
-                
-                # Se não encontrou seções, usa o texto completo
-                if not sections:
-                    sections["main"] = text_content
-                
-                return {
-                    "content": text_content,
-                    "sections": sections,
-                    "metadata": metadata
-                }
+            if self.page_workers is not None:
+                pages, metadata = self.page_workers.extract(file.read(), profile)
+            else:
+                pages, metadata = self._extract_pages(file, profile)
+
+            if self.deduplicator is not None:
+                pages, report = self.deduplicator.clean_pages(pages)
+                metadata["dedup"] = report
+
+            text_content, sections = self._build_sections(pages)
+            return {
+                "content": text_content,
+                "sections": sections,
+                "metadata": metadata
+            }
                 
+        except RequestCancelled:
+            raise
         except Exception as e:
             raise Exception(f"Erro ao processar PDF: {str(e)}")
 
+    def _extract_pages(self, file, profile: str):
+        """Extração no próprio processo, sem orçamento por página"""
+        # Import tardio: pdfplumber/pdfminer só são carregados no primeiro upload
+        import pdfplumber
+
+        with pdfplumber.open(file) as pdf:
+            metadata: Dict[str, Any] = {
+                "total_pages": len(pdf.pages),
+                "pdf_info": pdf.metadata
+            }
+            probed = {}
+            if profile == AUTO:
+                with span("pdf.probe"):
+                    profile, metadata["profile_probe"], probed = probe_profile(
+                        lambda index, mode: page_text(pdf, pdf.pages[index], mode),
+                        len(pdf.pages),
+                        probe_threshold()
+                    )
+            metadata["extraction_profile"] = profile
+
+            # Extrai texto de cada página
+            pages: List[str] = []
+            for number, page in enumerate(pdf.pages, start=1):
+                # Para entre páginas se o cliente desistiu do upload
+                check_cancelled("extraction")
+                if (number - 1, profile) in probed:
+                    pages.append(probed[(number - 1, profile)])
+                    continue
+                with span("pdf.page", page=number):
+                    pages.append(page_text(pdf, page, profile))
+        return pages, metadata
+
+    def _build_sections(self, pages: List[str]):
+        """Monta o conteúdo completo e as seções a partir do texto das páginas"""
+        text_content = ""
+        sections: Dict[str, str] = {}
+        current_section = "main"
+        section_text = []
+
+        def close_section():
+            # Títulos repetidos acumulam o texto em vez de sobrescrever a seção anterior
+            text = '\n'.join(section_text)
+            sections[current_section] = f"{sections[current_section]}\n{text}" if current_section in sections else text
+
+        for text in pages:
+            if text:
+                # Identifica possíveis títulos de seção
+                lines = text.split('\n')
+                for line in lines:
+                    # Heurística para identificar títulos de seção
+                    if len(line.strip()) < 100 and (
+                        line.isupper() or
+                        any(pattern.match(line) for pattern in SECTION_TITLE_PATTERNS)
+                    ):
+                        if section_text:
+                            close_section()
+                            section_text = []
+                        current_section = line.strip()
+                    else:
+                        section_text.append(line)
+                    
+                text_content += text + "\n"
+        
+        # Adiciona última seção
+        if section_text:
+            close_section()
+        
+        # Se não encontrou seções, usa o texto completo
+        if not sections:
+            sections["main"] = text_content
+
+        return text_content, sections
+
     def _detect_section_titles(self, text: str) -> List[str]:
         """Detecta possíveis títulos de seção no texto"""
         potential_titles = []
@@ -84,8 +161,7 @@ class PDFExtractor:
             # Heurísticas para identificar títulos
             if (len(line) < 100 and  # Títulos geralmente são curtos
                 (line.isupper() or  # Todo em maiúsculas
-                 re.match(r'^\d+[\.\s]+[A-Z]', line) or  # Começa com número
-                 re.match(r'^[A-Z][a-z]+\s+\d+', line) or  # Palavra capitalizada + número
+                 any(pattern.match(line) for pattern in TITLE_CANDIDATE_PATTERNS) or
                  line.endswith(':'))):  # Termina com dois pontos
                 potential_titles.append(line)
         
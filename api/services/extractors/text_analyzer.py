@@ -1,5 +1,5 @@
 from typing import List, Dict, Any
-from langchain_community.embeddings import HuggingFaceEmbeddings
+from api.services.embeddings.embedding_provider import get_embeddings
 import re
 
 class TextAnalyzer:
@@ -9,9 +9,7 @@ class TextAnalyzer:
     """
     
     def __init__(self):
-        self.embeddings = HuggingFaceEmbeddings(
-            model_name="sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
-        )
+        self.embeddings = get_embeddings()
 
     def analyze_content(self, text: str, sections: Dict[str, str]) -> Dict[str, Any]:
         """Analisa o conteúdo do texto e suas seções"""
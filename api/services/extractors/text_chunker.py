@@ -0,0 +1,56 @@
+from typing import Dict, List, Tuple
+
+
+class TextChunker:
+    """
+    Divide o texto das seções em trechos de tamanho limitado,
+    com sobreposição, para indexação vetorial
+    """
+
+    def __init__(self, chunk_size: int = 800, chunk_overlap: int = 100):
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+
+    def split_text(self, text: str) -> List[str]:
+        """Divide um texto respeitando quebras de linha, frases e palavras"""
+        text = text.strip()
+        if not text:
+            return []
+        if len(text) <= self.chunk_size:
+            return [text]
+
+        chunks = []
+        start = 0
+        length = len(text)
+        while start < length:
+            end = min(start + self.chunk_size, length)
+            if end < length:
+                # Prefere cortar no fim de uma linha ou frase
+                cut = max(text.rfind("\n", start, end), text.rfind(". ", start, end))
+                if cut > start + self.chunk_size // 2:
+                    end = cut + 1
+                else:
+                    space = text.rfind(" ", start, end)
+                    if space > start:
+                        end = space
+
+            chunk = text[start:end].strip()
+            if chunk:
+                chunks.append(chunk)
+            if end >= length:
+                break
+
+            # Recua para criar a sobreposição, começando no início de uma palavra
+            next_start = max(end - self.chunk_overlap, start + 1)
+            space = text.find(" ", next_start, end)
+            start = space + 1 if space != -1 else end
+
+        return chunks
+
+    def split_sections(self, sections: Dict[str, str]) -> List[Tuple[str, str]]:
+        """Divide cada seção em trechos, mantendo o nome da seção de origem"""
+        return [
+            (name, chunk)
+            for name, content in sections.items()
+            for chunk in self.split_text(content)
+        ]
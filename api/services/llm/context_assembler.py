@@ -0,0 +1,188 @@
+import os
+import re
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from api.models.state import Source
+
+_WORD = re.compile(r"\w+|[^\w\s]")
+
+
+class TokenCounter:
+    """
+    Conta tokens com o tokenizer do modelo (tiktoken). Se o tiktoken não
+    estiver disponível ou não conseguir carregar o vocabulário (ex.: sem
+    rede), usa uma estimativa conservadora por palavras e pontuação.
+    """
+
+    def __init__(self, model: str = "gpt-3.5-turbo"):
+        self.model = model
+        self._encoding = None
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    @property
+    def encoding(self):
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    try:
+                        import tiktoken
+                        self._encoding = tiktoken.encoding_for_model(self.model)
+                    except Exception as e:
+                        print(f"Tokenizer indisponível, usando estimativa: {str(e)}")
+                    self._loaded = True
+        return self._encoding
+
+    @property
+    def exact(self) -> bool:
+        return self.encoding is not None
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        if self.encoding is not None:
+            return len(self.encoding.encode(text, disallowed_special=()))
+        # Palavras longas viram vários tokens (~4 caracteres por token)
+        return sum((len(piece) + 3) // 4 for piece in _WORD.findall(text))
+
+    def truncate(self, text: str, max_tokens: int, from_end: bool = False) -> str:
+        """Corta o texto para caber em max_tokens (from_end mantém o final do texto)"""
+        if max_tokens <= 0:
+            return ""
+        if self.encoding is not None:
+            tokens = self.encoding.encode(text, disallowed_special=())
+            if len(tokens) <= max_tokens:
+                return text
+            return self.encoding.decode(tokens[-max_tokens:] if from_end else tokens[:max_tokens])
+        total = self.count(text)
+        if total <= max_tokens:
+            return text
+        # Estimativa proporcional, ajustada até caber
+        size = int(len(text) * max_tokens / total)
+        piece = lambda n: text[len(text) - n:] if from_end else text[:n]
+        while size > 0 and self.count(piece(size)) > max_tokens:
+            size = int(size * 0.9)
+        return piece(size) if size > 0 else ""
+
+
+_COUNTER: Optional[TokenCounter] = None
+
+
+def get_token_counter() -> TokenCounter:
+    """Tokenizer compartilhado pelo processo (o vocabulário é carregado uma vez)"""
+    global _COUNTER
+    if _COUNTER is None:
+        _COUNTER = TokenCounter(os.getenv("LLM_MODEL", "gpt-3.5-turbo"))
+    return _COUNTER
+
+
+class PackedContext:
+    """Trechos escolhidos para o prompt e o total de tokens do contexto"""
+
+    def __init__(self, passages: List[Source], text: str, tokens: int, dropped: int):
+        self.passages = passages
+        self.text = text
+        self.tokens = tokens
+        self.dropped = dropped
+
+
+class ContextAssembler:
+    """
+    Monta o contexto do prompt dentro de um orçamento de tokens: ordena os
+    trechos pela pontuação, descarta os que se sobrepõem a um já escolhido
+    e empacota até o orçamento, reservando espaço para a resposta (max_tokens)
+    """
+
+    def __init__(
+        self,
+        counter: Optional[TokenCounter] = None,
+        budget: Optional[int] = None,
+        context_window: Optional[int] = None,
+        max_tokens: Optional[int] = None,
+        overlap_threshold: float = 0.6
+    ):
+        self.counter = counter or get_token_counter()
+        self.budget = budget or int(os.getenv("CONTEXT_TOKEN_BUDGET", "1500"))
+        self.context_window = context_window or int(os.getenv("LLM_CONTEXT_WINDOW", "4096"))
+        self.max_tokens = max_tokens or int(os.getenv("LLM_MAX_TOKENS", "150"))
+        self.overlap_threshold = overlap_threshold
+
+    def available(self, prompt: str = "") -> int:
+        """Tokens disponíveis para o contexto, dado o restante do prompt"""
+        # Margem para as mensagens de sistema e a formatação do chat
+        reserved = self.max_tokens + self.counter.count(prompt) + 64
+        return max(0, min(self.budget, self.context_window - reserved))
+
+    @staticmethod
+    def _shingles(text: str) -> set:
+        words = text.lower().split()
+        return {" ".join(words[i:i + 3]) for i in range(max(1, len(words) - 2))}
+
+    def _overlaps(self, shingles: set, chosen: Sequence[set]) -> bool:
+        if not shingles:
+            return False
+        for other in chosen:
+            # Fração do trecho menor que já está no outro (chunks com sobreposição)
+            smaller = min(len(shingles), len(other)) or 1
+            if len(shingles & other) / smaller >= self.overlap_threshold:
+                return True
+        return False
+
+    def pack(self, passages: Sequence[Source], prompt: str = "") -> PackedContext:
+        """
+        Seleciona os trechos de maior pontuação que cabem no orçamento.
+        prompt é o restante do prompt (instruções e pergunta), sem o contexto.
+        """
+        budget = self.available(prompt)
+        ranked = sorted(passages, key=lambda p: p.get("score", 0.0), reverse=True)
+
+        chosen: List[Tuple[Source, str]] = []
+        chosen_shingles: List[set] = []
+        used = 0
+        dropped = 0
+        for passage in ranked:
+            shingles = self._shingles(passage["text"])
+            if self._overlaps(shingles, chosen_shingles):
+                dropped += 1
+                continue
+
+            label = f"[{len(chosen) + 1}] ({passage['document_name']} - {passage['section']}) "
+            entry = label + passage["text"]
+            tokens = self.counter.count(entry) + 2  # separador entre trechos
+            if used + tokens > budget:
+                if chosen:
+                    dropped += 1
+                    continue
+                # Nem o melhor trecho cabe: usa o início dele
+                entry = self.counter.truncate(entry, budget - 2)
+                tokens = self.counter.count(entry) + 2
+                if not entry:
+                    break
+
+            chosen.append((passage, entry))
+            chosen_shingles.append(shingles)
+            used += tokens
+
+        return PackedContext(
+            passages=[passage for passage, _ in chosen],
+            text="\n\n".join(entry for _, entry in chosen),
+            tokens=used,
+            dropped=dropped
+        )
+
+    def pack_texts(self, texts: Sequence[str], prompt: str = "") -> str:
+        """Empacota textos simples (ex.: resultados da web), mantendo a ordem"""
+        budget = self.available(prompt)
+        packed: List[str] = []
+        used = 0
+        for text in texts:
+            tokens = self.counter.count(text) + 1
+            if used + tokens > budget:
+                text = self.counter.truncate(text, budget - used - 1)
+                if text:
+                    packed.append(text)
+                break
+            packed.append(text)
+            used += tokens
+        return "\n".join(packed)
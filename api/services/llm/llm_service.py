@@ -1,9 +1,14 @@
 from typing import Dict, List
+import asyncio
 import os
 import re
 from dotenv import load_dotenv
-from langchain_openai import ChatOpenAI
 from langchain_core.messages import HumanMessage, SystemMessage
+from api.services.llm.context_assembler import get_token_counter
+from api.services.monitoring.metrics import time_stage, PROMPT_TOKENS, CANCELLED_WORK
+from api.services.monitoring.tracing import current_span
+from api.services.concurrency.cancellation import check_cancelled, RequestCancelled
+from api.services.concurrency.scheduler import get_scheduler
 
 load_dotenv()
 
@@ -14,12 +19,28 @@ class LLMService:
             print("Erro: API key da OpenAI não está configurada")
             raise ValueError("API key não configurada")
         
-        self.llm = ChatOpenAI(
-            model="gpt-3.5-turbo",
-            openai_api_key=self.api_key,
-            temperature=0.1,
-            max_tokens=150
-        )
+        self.model = os.getenv("LLM_MODEL", "gpt-3.5-turbo")
+        self.max_tokens = int(os.getenv("LLM_MAX_TOKENS", "150"))
+        self.context_window = int(os.getenv("LLM_CONTEXT_WINDOW", "4096"))
+        self.tokens = get_token_counter()
+        # Vagas de chamadas simultâneas, com prioridade do /chat sobre trabalho de fundo
+        self.scheduler = get_scheduler("llm")
+        self._llm = None
+
+    @property
+    def llm(self):
+        """Cliente do modelo, criado no primeiro uso (import tardio do langchain_openai)"""
+        if self._llm is None:
+            from langchain_openai import ChatOpenAI
+            self._llm = ChatOpenAI(
+                model=self.model,
+                openai_api_key=self.api_key,
+                # Permite apontar para um servidor compatível (ex.: testes de carga offline)
+                openai_api_base=os.getenv("OPENAI_BASE_URL"),
+                temperature=0.1,
+                max_tokens=self.max_tokens
+            )
+        return self._llm
 
     def _clean_response(self, text: str) -> str:
         """Limpa e formata a resposta do LLM"""
@@ -31,43 +52,103 @@ class LLMService:
         text = re.sub(r'^(Resposta:|R:|Assistant:|A:)', '', text)
         return text.strip()
 
+    def _messages(self, prompt: str):
+        """Mensagens do chat, com o prompt truncado para caber na janela de contexto"""
+        system = (
+            "Você é um assistente objetivo que analisa documentos "
+            "e responde perguntas usando apenas as informações fornecidas. "
+            "Mantenha as respostas curtas e diretas."
+        )
+        # Nunca ultrapassa a janela de contexto, reservando espaço para a resposta
+        limit = self.context_window - self.max_tokens - self.tokens.count(system) - 16
+        if self.tokens.count(prompt) > limit:
+            # Corta o meio (o contexto), preservando as instruções do início e a pergunta do final
+            tail = self.tokens.truncate(prompt, min(256, limit // 2), from_end=True)
+            head = self.tokens.truncate(prompt, limit - self.tokens.count(tail) - 4)
+            prompt = f"{head}\n...\n{tail}"
+        prompt_tokens = self.tokens.count(system) + self.tokens.count(prompt)
+        PROMPT_TOKENS.observe(prompt_tokens)
+
+        span = current_span()
+        if span is not None:
+            span.attributes["prompt_tokens"] = prompt_tokens
+        return [
+            SystemMessage(content=system),
+            HumanMessage(content=prompt)
+        ]
+
+    def _finish(self, content: str) -> str:
+        cleaned_text = self._clean_response(content)
+        
+        # Limita o tamanho da resposta
+        if len(cleaned_text.split()) > 50:
+            cleaned_text = " ".join(cleaned_text.split()[:50]) + "..."
+        
+        return cleaned_text if cleaned_text else "Não foi possível gerar uma resposta adequada."
+
     def generate_response(self, prompt: str) -> str:
         """Gera uma resposta usando o LLM"""
         try:
-            messages = [
-                SystemMessage(content=(
-                    "Você é um assistente objetivo que analisa documentos "
-                    "e responde perguntas usando apenas as informações fornecidas. "
-                    "Mantenha as respostas curtas e diretas."
-                )),
-                HumanMessage(content=prompt)
-            ]
-            
-            response = self.llm.invoke(messages)
-            cleaned_text = self._clean_response(response.content)
-            
-            # Limita o tamanho da resposta
-            if len(cleaned_text.split()) > 50:
-                cleaned_text = " ".join(cleaned_text.split()[:50]) + "..."
-            
-            return cleaned_text if cleaned_text else "Não foi possível gerar uma resposta adequada."
+            with self.scheduler.slot():
+                # Requisição cancelada (inclusive durante a espera): não gasta uma chamada à OpenAI
+                check_cancelled("llm")
+                with time_stage("llm"):
+                    response = self.llm.invoke(self._messages(prompt))
+            return self._finish(response.content)
             
+        except RequestCancelled:
+            raise
         except Exception as e:
             print(f"Erro ao gerar resposta: {str(e)}")
             return "Erro ao processar sua solicitação."
 
-    def generate_section_summary(self, section_text: str) -> str:
-        """Gera um resumo de uma seção do documento"""
+    async def agenerate_response(self, prompt: str) -> str:
+        """
+        Versão assíncrona de generate_response: se a requisição for cancelada,
+        a chamada HTTP à OpenAI é abortada em vez de continuar em uma thread
+        """
         try:
-            prompt = f"""
+            check_cancelled("llm")
+            async with self.scheduler.aslot():
+                with time_stage("llm"):
+                    response = await self.llm.ainvoke(self._messages(prompt))
+            return self._finish(response.content)
+            
+        except asyncio.CancelledError:
+            CANCELLED_WORK.inc(stage="llm")
+            raise
+        except RequestCancelled:
+            raise
+        except Exception as e:
+            print(f"Erro ao gerar resposta: {str(e)}")
+            return "Erro ao processar sua solicitação."
+
+    def _summary_prompt(self, section_text: str, max_tokens: int = 1000) -> str:
+        return f"""
             Faça um resumo conciso desta seção do documento em até 2 linhas.
             Mantenha apenas as informações mais importantes.
 
             Seção:
-            {section_text}
+            {self.tokens.truncate(section_text, max_tokens)}
             """
-            
-            return self.generate_response(prompt)
+
+    def generate_section_summary(self, section_text: str) -> str:
+        """Gera um resumo de uma seção do documento"""
+        try:
+            return self.generate_response(self._summary_prompt(section_text))
+        except Exception as e:
+            print(f"Erro ao gerar resumo: {str(e)}")
+            return ""
+
+    async def agenerate_section_summary(self, section_text: str) -> str:
+        """Versão assíncrona de generate_section_summary; vazio se o LLM falhar"""
+        try:
+            async with self.scheduler.aslot():
+                with time_stage("llm"):
+                    response = await self.llm.ainvoke(self._messages(self._summary_prompt(section_text)))
+            return self._finish(response.content)
+        except asyncio.CancelledError:
+            raise
         except Exception as e:
             print(f"Erro ao gerar resumo: {str(e)}")
-            return ""
\ No newline at end of file
+            return ""
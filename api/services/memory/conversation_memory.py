@@ -1,84 +1,98 @@
-from typing import List, Dict
-from langchain_core.messages import BaseMessage, HumanMessage, AIMessage
+import sys
+from typing import Dict, List, Optional
 from api.models.state import ConversationState
-from langchain_community.embeddings import HuggingFaceEmbeddings
+from api.services.embeddings.embedding_provider import get_embeddings
+from api.services.memory.message_history import AI, HUMAN, MessageRecord, default_capacity
+
+def _text_bytes(value) -> int:
+    """Bytes das strings contidas em um valor (dicionários e listas incluídos)"""
+    if isinstance(value, str):
+        return sys.getsizeof(value)
+    if isinstance(value, dict):
+        return sum(_text_bytes(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(_text_bytes(item) for item in value)
+    return 0
+
+
+def state_memory_usage(state: ConversationState) -> Dict[str, int]:
+    """
+    Bytes de uma conversa: histórico, textos do último turno e, se o estado
+    guardar uma cópia do documento (dict), o texto dele. Documentos persistidos
+    entram como DocumentView e são contados no documento aberto
+    """
+    document = state.get("document")
+    turn = [state.get("current_question"), state.get("answer"), state.get("sources"), state.get("web_results")]
+    return {
+        "history": state["conversation_history"].nbytes,
+        "turn": _text_bytes(turn),
+        "document": _text_bytes(document) if isinstance(document, dict) else 0
+    }
+
 
 class ConversationMemory:
     """
     Gerencia o histórico da conversa e mantém o contexto
     """
-    
-    def __init__(self, max_history: int = 5):
-        self.max_history = max_history
-        self.embeddings = HuggingFaceEmbeddings(
-            model_name="sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
-        )
+
+    def __init__(self, max_history: Optional[int] = None):
+        # max_history conta interações (pergunta e resposta): o buffer guarda o dobro de mensagens.
+        # Sem ele, vale CONVERSATION_HISTORY_MESSAGES, a capacidade de cada MessageHistory
+        self.capacity = max_history * 2 if max_history is not None else None
+        self.max_history = max_history if max_history is not None else default_capacity() // 2
+        self.embeddings = get_embeddings()
 
     def update_history(self, state: ConversationState) -> ConversationState:
         """Atualiza o histórico da conversa no estado"""
         try:
             # Adiciona a nova pergunta ao histórico
-            state["conversation_history"].append(
-                HumanMessage(content=state["current_question"])
-            )
-            
+            messages = [(HUMAN, state["current_question"])]
+
             # Se houver uma resposta anterior, adiciona também
             if state.get("answer"):
-                state["conversation_history"].append(
-                    AIMessage(content=state["answer"])
-                )
-            
-            # Mantém apenas as últimas mensagens
-            if len(state["conversation_history"]) > self.max_history * 2:
-                state["conversation_history"] = state["conversation_history"][-self.max_history*2:]
-            
+                messages.append((AI, state["answer"]))
+
+            # Embeddings calculados uma única vez, ao entrar no histórico;
+            # o buffer circular descarta as mensagens mais antigas
+            vectors = self.embeddings.embed_documents([text for _, text in messages])
+            history = state["conversation_history"]
+            if self.capacity is not None:
+                history.resize(self.capacity)
+            for (role, text), vector in zip(messages, vectors):
+                history.append(role, text, vector)
+
             return state
-            
+
         except Exception as e:
             print(f"Erro ao atualizar histórico: {str(e)}")
             return state
 
-    def get_relevant_history(self, state: ConversationState, question: str) -> List[BaseMessage]:
+    def get_relevant_history(self, state: ConversationState, question: str) -> List[MessageRecord]:
         """Retorna as mensagens do histórico relevantes para a pergunta atual"""
         try:
-            # Gera embedding para a pergunta atual
+            # Só a pergunta atual é embedada: as mensagens já têm seus embeddings
             question_embedding = self.embeddings.embed_query(question)
-            
-            # Calcula similaridade com cada mensagem do histórico
-            message_scores = []
-            for msg in state["conversation_history"]:
-                msg_embedding = self.embeddings.embed_query(msg.content)
-                similarity = self._calculate_similarity(
-                    question_embedding,
-                    msg_embedding
-                )
-                message_scores.append((similarity, msg))
-            
-            # Ordena por similaridade
-            message_scores.sort(reverse=True)
-            
-            # Retorna as mensagens mais relevantes
-            return [msg for _, msg in message_scores[:4]]
-            
+            return state["conversation_history"].most_relevant(question_embedding, 4)
+
         except Exception as e:
             print(f"Erro ao obter histórico relevante: {str(e)}")
-            return state["conversation_history"][-4:]
+            return state["conversation_history"].last(4)
 
     def _calculate_similarity(self, embedding1: List[float], embedding2: List[float]) -> float:
         """Calcula similaridade de cosseno entre embeddings"""
         try:
             # Calcula produto escalar
             dot_product = sum(a * b for a, b in zip(embedding1, embedding2))
-            
+
             # Calcula magnitudes
             magnitude1 = sum(a * a for a in embedding1) ** 0.5
             magnitude2 = sum(b * b for b in embedding2) ** 0.5
-            
+
             if magnitude1 * magnitude2 == 0:
                 return 0.0
-                
+
             return dot_product / (magnitude1 * magnitude2)
-            
+
         except Exception as e:
             print(f"Erro ao calcular similaridade: {str(e)}")
             return 0.0
@@ -88,25 +102,25 @@ class ConversationMemory:
         try:
             if not state["conversation_history"]:
                 return ""
-                
+
             # Pega as últimas mensagens
-            recent_messages = state["conversation_history"][-6:]  # últimas 3 interações
-            
+            recent_messages = state["conversation_history"].last(6)  # últimas 3 interações
+
             # Formata o resumo
             summary = []
             for i in range(0, len(recent_messages), 2):
                 if i + 1 < len(recent_messages):
-                    q = recent_messages[i].content
-                    a = recent_messages[i + 1].content
+                    q = recent_messages[i].text
+                    a = recent_messages[i + 1].text
                     summary.append(f"Q: {q}\nA: {a}")
-            
+
             return "\n\n".join(summary)
-            
+
         except Exception as e:
             print(f"Erro ao gerar resumo: {str(e)}")
             return ""
 
     def clear_history(self, state: ConversationState) -> ConversationState:
         """Limpa o histórico da conversa"""
-        state["conversation_history"] = []
-        return state
\ No newline at end of file
+        state["conversation_history"].clear()
+        return state
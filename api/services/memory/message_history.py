@@ -0,0 +1,131 @@
+import os
+import sys
+import time
+from typing import Iterator, List, Optional, Sequence
+
+import numpy as np
+
+HUMAN = "human"
+AI = "ai"
+
+
+def default_capacity() -> int:
+    """Mensagens guardadas por conversa (perguntas e respostas)"""
+    return int(os.getenv("CONVERSATION_HISTORY_MESSAGES", "10"))
+
+
+class MessageRecord:
+    """Mensagem do histórico: texto, papel e horário (o embedding fica na matriz do histórico)"""
+
+    __slots__ = ("role", "text", "timestamp")
+
+    def __init__(self, role: str, text: str, timestamp: float):
+        self.role = role
+        self.text = text
+        self.timestamp = timestamp
+
+    def __repr__(self) -> str:
+        return f"MessageRecord(role={self.role!r}, text={self.text[:40]!r})"
+
+
+class MessageHistory:
+    """
+    Histórico de uma conversa em um buffer circular de capacidade fixa.
+    O embedding de cada mensagem é calculado uma única vez, ao entrar no
+    histórico, e fica em uma matriz contígua: a relevância das mensagens
+    anteriores para uma pergunta é um único produto matricial, sem chamar
+    o modelo. Quando o buffer enche, a mensagem mais antiga é sobrescrita.
+    """
+
+    def __init__(self, capacity: Optional[int] = None):
+        self.capacity = max(1, default_capacity() if capacity is None else capacity)
+        self._records: List[Optional[MessageRecord]] = [None] * self.capacity
+        # Alocada no primeiro append, quando a dimensão dos embeddings é conhecida
+        self._vectors: Optional[np.ndarray] = None
+        self._next = 0
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self) -> Iterator[MessageRecord]:
+        """Mensagens em ordem cronológica"""
+        return (self._records[slot] for slot in self._slots())
+
+    def _slots(self, last: Optional[int] = None) -> np.ndarray:
+        """Posições no buffer, da mais antiga para a mais recente"""
+        count = self._count if last is None else min(last, self._count)
+        return np.arange(self._next - count, self._next) % self.capacity
+
+    @staticmethod
+    def _normalize(embedding: Sequence[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def append(self, role: str, text: str, embedding: Sequence[float]) -> MessageRecord:
+        """Adiciona uma mensagem, sobrescrevendo a mais antiga se o buffer estiver cheio"""
+        vector = self._normalize(embedding)
+        if self._vectors is None:
+            self._vectors = np.zeros((self.capacity, len(vector)), dtype=np.float32)
+        slot = self._next
+        self._vectors[slot] = vector
+        record = MessageRecord(role, text, time.time())
+        self._records[slot] = record
+        self._next = (slot + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+        return record
+
+    @property
+    def nbytes(self) -> int:
+        """Memória do histórico: matriz de embeddings, registros e textos"""
+        total = self._vectors.nbytes if self._vectors is not None else 0
+        for record in self:
+            total += sys.getsizeof(record) + sys.getsizeof(record.text)
+        return total
+
+    def last(self, n: int) -> List[MessageRecord]:
+        """As n mensagens mais recentes, em ordem cronológica"""
+        return [self._records[slot] for slot in self._slots(n)]
+
+    def similarities(self, query: Sequence[float], last: Optional[int] = None) -> np.ndarray:
+        """Similaridade de cosseno da consulta com cada mensagem (ordem cronológica)"""
+        if not self._count:
+            return np.zeros(0, dtype=np.float32)
+        query = self._normalize(query)
+        if len(query) != self._vectors.shape[1]:
+            return np.zeros(0, dtype=np.float32)
+        return self._vectors[self._slots(last)] @ query
+
+    def most_relevant(self, query: Sequence[float], k: int) -> List[MessageRecord]:
+        """As k mensagens mais parecidas com a consulta, da mais para a menos relevante"""
+        scores = self.similarities(query)
+        if not len(scores):
+            return []
+        slots = self._slots()
+        # Estável: em caso de empate, a mensagem mais recente vem primeiro
+        order = np.argsort(-scores[::-1], kind="stable")[:k]
+        return [self._records[slots[len(slots) - 1 - i]] for i in order]
+
+    def resize(self, capacity: int) -> None:
+        """Muda a capacidade do buffer, mantendo as mensagens mais recentes"""
+        capacity = max(1, capacity)
+        if capacity == self.capacity:
+            return
+        slots = self._slots(capacity)
+        records = [self._records[slot] for slot in slots]
+        vectors = None
+        if self._vectors is not None:
+            vectors = np.zeros((capacity, self._vectors.shape[1]), dtype=np.float32)
+            vectors[:len(records)] = self._vectors[slots]
+        self.capacity = capacity
+        self._records = records + [None] * (capacity - len(records))
+        self._vectors = vectors
+        self._count = len(records)
+        self._next = len(records) % capacity
+
+    def clear(self) -> None:
+        self._records = [None] * self.capacity
+        self._vectors = None
+        self._next = 0
+        self._count = 0
@@ -0,0 +1,326 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, List, Sequence, Tuple
+
+from api.services.monitoring.tracing import span
+
+# Buckets em segundos: de 1 ms (consultas vetoriais) a 2 min (PDFs grandes)
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+def _format_labels(labelnames: Sequence[str], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return self.header() + [
+            f"{self.name}{_format_labels(self.labelnames, key)} {value}"
+            for key, value in items
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    @contextmanager
+    def track(self, **labels):
+        """Incrementa durante a execução do bloco (ex.: requisições em andamento)"""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Por combinação de labels: contagens por bucket (não cumulativas), soma e total
+        self._series: Dict[Tuple[str, ...], List] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def time(self, **labels) -> "_Timer":
+        """Mede a duração do bloco em segundos"""
+        return _Timer(self, labels)
+
+    def count(self, **labels) -> int:
+        series = self._series.get(self._key(labels))
+        return series[2] if series else 0
+
+    def sum(self, **labels) -> float:
+        series = self._series.get(self._key(labels))
+        return series[1] if series else 0.0
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = [(key, (list(s[0]), s[1], s[2])) for key, s in self._series.items()]
+        lines = self.header()
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            labels = _format_labels(self.labelnames, key)
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                bucket_labels = _format_labels(self.labelnames, key, 'le="%s"' % bound)
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            bucket_labels = _format_labels(self.labelnames, key, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{bucket_labels} {count}")
+            lines.append(f"{self.name}_sum{labels} {total}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class _Timer:
+    """Context manager leve (sem gerador) para medir blocos no caminho crítico"""
+
+    __slots__ = ("histogram", "labels", "start")
+
+    def __init__(self, histogram: Histogram, labels: Dict[str, str]):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self) -> "_Timer":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> bool:
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+        return False
+
+
+class _StageTimer(_Timer):
+    """Mede a etapa no histograma e, dentro de um trace, também como span"""
+
+    __slots__ = ("span",)
+
+    def __init__(self, histogram: Histogram, stage: str):
+        super().__init__(histogram, {"stage": stage})
+        self.span = span(stage)
+
+    def __enter__(self) -> "_StageTimer":
+        self.span.__enter__()
+        return super().__enter__()
+
+    def __exit__(self, *exc) -> bool:
+        super().__exit__(*exc)
+        return self.span.__exit__(*exc)
+
+
+class MetricsRegistry:
+    """Conjunto de métricas exposto no formato texto do Prometheus"""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+STAGE_LATENCY: Histogram = registry.register(Histogram(
+    "pdfchat_stage_duration_seconds",
+    "Duração de cada etapa (upload, extraction, analysis, embedding, retrieval, routing, llm, web_search)",
+    ["stage"]
+))
+REQUEST_LATENCY: Histogram = registry.register(Histogram(
+    "pdfchat_request_duration_seconds",
+    "Duração total das requisições por endpoint",
+    ["endpoint"]
+))
+SLOW_REQUESTS: Counter = registry.register(Counter(
+    "pdfchat_slow_requests_total",
+    "Requisições acima do limite de tempo (60 s para process-pdf, 5 s para chat)",
+    ["endpoint"]
+))
+STRATEGY_OUTCOMES: Counter = registry.register(Counter(
+    "pdfchat_strategy_total",
+    "Estratégia usada para responder (document, web, combined, out_of_context, ...)",
+    ["strategy"]
+))
+CACHE_REQUESTS: Counter = registry.register(Counter(
+    "pdfchat_cache_requests_total",
+    "Acessos a caches por resultado (hit ou miss)",
+    ["cache", "result"]
+))
+ANSWER_PATHS: Counter = registry.register(Counter(
+    "pdfchat_answer_path_total",
+    "Caminho que gerou a resposta do documento (extractive ou llm)",
+    ["path"]
+))
+DEDUP_REMOVED_CHARS: Counter = registry.register(Counter(
+    "pdfchat_dedup_removed_chars_total",
+    "Caracteres removidos na ingestão (boilerplate de página, bloco repetido ou trecho duplicado)",
+    ["kind"]
+))
+EMBEDDING_BATCH_SIZE: Histogram = registry.register(Histogram(
+    "pdfchat_embedding_batch_size",
+    "Textos por lote executado pelo agrupador de embeddings",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256)
+))
+EMBEDDING_QUEUE_WAIT: Histogram = registry.register(Histogram(
+    "pdfchat_embedding_queue_wait_seconds",
+    "Tempo de espera na fila do agrupador de embeddings",
+    buckets=(0.0005, 0.001, 0.002, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+))
+PROMPT_TOKENS: Histogram = registry.register(Histogram(
+    "pdfchat_prompt_tokens",
+    "Tokens do prompt enviado ao LLM",
+    buckets=(64, 128, 256, 512, 1024, 1536, 2048, 3072, 4096, 8192, 16384)
+))
+CANCELLED_REQUESTS: Counter = registry.register(Counter(
+    "pdfchat_cancelled_requests_total",
+    "Requisições canceladas por desconexão do cliente ou prazo do servidor",
+    ["endpoint", "reason"]
+))
+CANCELLED_WORK: Counter = registry.register(Counter(
+    "pdfchat_cancelled_work_total",
+    "Etapas interrompidas porque a requisição foi cancelada (llm, web_search, extraction, embedding, ...)",
+    ["stage"]
+))
+ADMISSION_QUEUE_WAIT: Histogram = registry.register(Histogram(
+    "pdfchat_admission_queue_wait_seconds",
+    "Espera na fila do controle de admissão",
+    ["endpoint"],
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+))
+SHED_REQUESTS: Counter = registry.register(Counter(
+    "pdfchat_shed_requests_total",
+    "Requisições rejeitadas com 503 porque a espera estourava o SLO de latência",
+    ["endpoint"]
+))
+COALESCED_REQUESTS: Counter = registry.register(Counter(
+    "pdfchat_coalesced_requests_total",
+    "Requisições idênticas concorrentes atendidas pelo resultado de outra",
+    ["endpoint"]
+))
+WORK_QUEUE_DEPTH: Gauge = registry.register(Gauge(
+    "pdfchat_work_queue_depth",
+    "Pedidos aguardando no scheduler por recurso (llm, embedding) e classe de prioridade",
+    ["resource", "priority"]
+))
+WORK_QUEUE_WAIT: Histogram = registry.register(Histogram(
+    "pdfchat_work_queue_wait_seconds",
+    "Espera no scheduler por recurso e classe de prioridade",
+    ["resource", "priority"],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+))
+SECTION_SUMMARIES: Counter = registry.register(Counter(
+    "pdfchat_section_summaries_total",
+    "Resumos de seção gerados na ingestão, por origem (llm, text para seções curtas, lead se o LLM falhou)",
+    ["source"]
+))
+RETRIEVAL_COMPARISONS: Histogram = registry.register(Histogram(
+    "pdfchat_retrieval_comparisons",
+    "Vetores comparados por documento em cada busca (flat, hierarchical ou batch, por pergunta)",
+    ["mode"],
+    buckets=(10, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 50000, 100000)
+))
+DEGRADED_PAGES: Counter = registry.register(Counter(
+    "pdfchat_degraded_pages_total",
+    "Páginas de PDF que estouraram o orçamento de extração, por motivo e resultado (fast ou skipped)",
+    ["reason", "outcome"]
+))
+PAGE_WORKER_RESTARTS: Counter = registry.register(Counter(
+    "pdfchat_page_worker_restarts_total",
+    "Processos de extração de páginas encerrados e recriados, por motivo",
+    ["reason"]
+))
+MEMORY_BYTES: Gauge = registry.register(Gauge(
+    "pdfchat_memory_bytes",
+    "Memória contabilizada por tipo (document_mapped, document_heap, conversations)",
+    ["kind"]
+))
+DOCUMENT_EVICTIONS: Counter = registry.register(Counter(
+    "pdfchat_document_evictions_total",
+    "Documentos abertos descartados da memória (reabertos do disco no próximo acesso)",
+    ["reason"]
+))
+IN_FLIGHT: Gauge = registry.register(Gauge(
+    "pdfchat_in_flight_requests",
+    "Requisições em andamento por endpoint",
+    ["endpoint"]
+))
+
+
+def time_stage(stage: str):
+    """Atalho para medir uma etapa do pipeline (histograma + span do trace)"""
+    return _StageTimer(STAGE_LATENCY, stage)
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
@@ -0,0 +1,60 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+# Referência do início do processo (o módulo é importado logo no começo de api.main)
+PROCESS_START = time.perf_counter()
+
+
+class StartupReport:
+    """
+    Registra as fases do cold start (imports, carga de modelos e aquecimento)
+    e indica quando a aplicação está pronta para receber tráfego
+    """
+
+    def __init__(self):
+        self.phases: List[Dict[str, Any]] = []
+        self.ready = False
+        self.error: Optional[str] = None
+        self.ready_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name: str, kind: str):
+        """Mede a duração de uma fase; kind: import, model ou warmup"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.phases.append({
+                    "name": name,
+                    "kind": kind,
+                    "started_at": round(start - PROCESS_START, 4),
+                    "seconds": round(time.perf_counter() - start, 4)
+                })
+
+    def mark_ready(self) -> None:
+        self.ready_at = time.perf_counter() - PROCESS_START
+        self.ready = True
+
+    def mark_failed(self, error: str) -> None:
+        self.error = error
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            phases = list(self.phases)
+        totals: Dict[str, float] = {}
+        for phase in phases:
+            totals[phase["kind"]] = round(totals.get(phase["kind"], 0.0) + phase["seconds"], 4)
+        return {
+            "ready": self.ready,
+            "error": self.error,
+            "seconds_to_ready": round(self.ready_at, 4) if self.ready_at is not None else None,
+            "totals_by_kind": totals,
+            "phases": phases
+        }
+
+
+startup_report = StartupReport()
@@ -0,0 +1,178 @@
+import json
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+# Span ativo na requisição atual; None quando não há trace (custo quase zero)
+_CURRENT_SPAN: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+
+class Span:
+    """Trecho medido de uma requisição, com atributos e filhos"""
+
+    __slots__ = ("name", "attributes", "start", "end", "children", "error")
+
+    def __init__(self, name: str, attributes: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.attributes = attributes or {}
+        self.start = time.perf_counter()
+        self.end: Optional[float] = None
+        self.children: List["Span"] = []
+        self.error: Optional[str] = None
+
+    @property
+    def duration(self) -> float:
+        return (self.end or time.perf_counter()) - self.start
+
+    def to_dict(self, origin: float) -> Dict[str, Any]:
+        data = {
+            "name": self.name,
+            "start_ms": round((self.start - origin) * 1000, 3),
+            "duration_ms": round(self.duration * 1000, 3),
+        }
+        if self.attributes:
+            data["attributes"] = self.attributes
+        if self.error:
+            data["error"] = self.error
+        if self.children:
+            data["children"] = [child.to_dict(origin) for child in self.children]
+        return data
+
+
+class _SpanContext:
+    """Abre um span filho do span atual; não faz nada fora de um trace"""
+
+    __slots__ = ("name", "attributes", "span", "token")
+
+    def __init__(self, name: str, attributes: Dict[str, Any]):
+        self.name = name
+        self.attributes = attributes
+        self.span: Optional[Span] = None
+
+    def __enter__(self) -> Optional[Span]:
+        parent = _CURRENT_SPAN.get()
+        if parent is not None:
+            self.span = Span(self.name, self.attributes)
+            parent.children.append(self.span)
+            self.token = _CURRENT_SPAN.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        if self.span is not None:
+            self.span.end = time.perf_counter()
+            if exc is not None:
+                self.span.error = f"{exc_type.__name__}: {exc}"
+            _CURRENT_SPAN.reset(self.token)
+        return False
+
+
+def span(name: str, **attributes) -> _SpanContext:
+    """Mede um trecho dentro do trace da requisição atual"""
+    return _SpanContext(name, attributes)
+
+
+def current_span() -> Optional[Span]:
+    return _CURRENT_SPAN.get()
+
+
+class Trace:
+    """Árvore de spans de uma requisição"""
+
+    def __init__(self, name: str, attributes: Optional[Dict[str, Any]] = None):
+        self.trace_id = uuid.uuid4().hex[:16]
+        self.started_at = time.time()
+        self.root = Span(name, attributes)
+        self.slow = False
+        self._token = None
+
+    def __enter__(self) -> "Trace":
+        self._token = _CURRENT_SPAN.set(self.root)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self.root.end = time.perf_counter()
+        if exc is not None:
+            self.root.error = f"{exc_type.__name__}: {exc}"
+        _CURRENT_SPAN.reset(self._token)
+        return False
+
+    @property
+    def duration(self) -> float:
+        return self.root.duration
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "started_at": self.started_at,
+            "duration_ms": round(self.duration * 1000, 3),
+            "slow": self.slow,
+            "root": self.root.to_dict(self.root.start)
+        }
+
+
+class TraceRecorder:
+    """
+    Guarda os traces recentes em um ring buffer e captura automaticamente
+    as requisições acima do limite, opcionalmente em um arquivo JSONL
+    """
+
+    def __init__(
+        self,
+        capacity: Optional[int] = None,
+        slow_threshold: Optional[float] = None,
+        log_path: Optional[str] = None
+    ):
+        capacity = capacity or int(os.getenv("TRACE_BUFFER_SIZE", "200"))
+        self.slow_threshold = (
+            slow_threshold if slow_threshold is not None
+            else float(os.getenv("TRACE_SLOW_THRESHOLD_SECONDS", "5"))
+        )
+        self.log_path = log_path if log_path is not None else os.getenv("TRACE_LOG_PATH")
+        self.enabled = os.getenv("TRACING_ENABLED", "true").lower() == "true"
+        self._recent: deque = deque(maxlen=capacity)
+        self._slow: deque = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+
+    def trace(self, name: str, **attributes) -> Trace:
+        return Trace(name, attributes)
+
+    def record(self, trace: Trace) -> None:
+        trace.slow = trace.duration >= self.slow_threshold
+        with self._lock:
+            self._recent.append(trace)
+            if trace.slow:
+                self._slow.append(trace)
+        if trace.slow and self.log_path:
+            self._write(trace)
+
+    def _write(self, trace: Trace) -> None:
+        try:
+            directory = os.path.dirname(self.log_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.log_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(trace.to_dict(), ensure_ascii=False, default=str) + "\n")
+        except Exception as e:
+            print(f"Erro ao gravar trace: {str(e)}")
+
+    def get(self, trace_id: str) -> Optional[Trace]:
+        with self._lock:
+            for trace in reversed(self._recent):
+                if trace.trace_id == trace_id:
+                    return trace
+            for trace in reversed(self._slow):
+                if trace.trace_id == trace_id:
+                    return trace
+        return None
+
+    def list(self, slow_only: bool = False, limit: int = 50) -> List[Dict[str, Any]]:
+        with self._lock:
+            traces = list(self._slow if slow_only else self._recent)
+        return [trace.to_dict() for trace in reversed(traces[-limit:])]
+
+
+trace_recorder = TraceRecorder()
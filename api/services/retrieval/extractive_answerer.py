@@ -0,0 +1,107 @@
+import os
+import re
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from api.models.state import Source
+
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?;])\s+")
+_WORD = re.compile(r"\w+")
+
+# Tipo de resposta esperado pela forma da pergunta
+_DATE = re.compile(r"\b\d{1,2}/\d{1,2}/\d{2,4}\b|\b(19|20)\d{2}\b")
+_AMOUNT = re.compile(r"(R\$|US\$|\$|€)\s?\d|\b\d+[.,]?\d*\s?(%|reais|dólares|dollars|mil|milhões)")
+_NAME = re.compile(r"\b[A-ZÀ-Ý][a-zà-ÿ]+(?:\s+(?:d[aeo]s?\s+)?[A-ZÀ-Ý][a-zà-ÿ]+)+")
+_QUESTION_TYPES = [
+    (re.compile(r"\b(quando|data|dia|ano|prazo|when|date|year|deadline)\b", re.I), _DATE),
+    (re.compile(r"\b(quanto|quanta|valor|preço|custo|total|multa|how much|amount|price|cost)\b", re.I), _AMOUNT),
+    (re.compile(r"\b(quem|nome|who|name)\b", re.I), _NAME),
+]
+
+STOP_WORDS = set(
+    "o a os as um uma uns umas de do da dos das em no na nos nas por para com "
+    "que qual quais quando quanto quem como onde é são foi ser ao aos e ou se "
+    "the of to in on for with is are was what which when who how much does do"
+    .split()
+)
+
+
+class ExtractiveAnswerer:
+    """
+    Responde sem o LLM quando um trecho recuperado contém a resposta quase
+    literalmente: pontua cada frase dos melhores trechos (similaridade
+    semântica, cobertura dos termos da pergunta e tipo esperado - data,
+    valor, nome) e devolve a melhor frase se a confiança passar do limiar
+    """
+
+    def __init__(
+        self,
+        embeddings,
+        threshold: Optional[float] = None,
+        max_passages: int = 3,
+        min_words: int = 4,
+        max_words: int = 60
+    ):
+        self.embeddings = embeddings
+        self.threshold = threshold if threshold is not None else float(os.getenv("EXTRACTIVE_THRESHOLD", "0.7"))
+        self.max_passages = max_passages
+        self.min_words = min_words
+        self.max_words = max_words
+
+    @staticmethod
+    def _terms(text: str) -> set:
+        return {w for w in _WORD.findall(text.lower()) if w not in STOP_WORDS and len(w) > 2}
+
+    def _sentences(self, passages: Sequence[Source]) -> List[Tuple[str, Source]]:
+        sentences = []
+        for passage in passages[:self.max_passages]:
+            for sentence in _SENTENCE_SPLIT.split(" ".join(passage["text"].split())):
+                if self.min_words <= len(sentence.split()) <= self.max_words:
+                    sentences.append((sentence, passage))
+        return sentences
+
+    def _expected_type(self, question: str):
+        for pattern, answer_pattern in _QUESTION_TYPES:
+            if pattern.search(question):
+                return answer_pattern
+        return None
+
+    def answer(
+        self,
+        question: str,
+        passages: Sequence[Source],
+        query: Optional[np.ndarray] = None
+    ) -> Tuple[Optional[str], Optional[Source], float]:
+        """Retorna (frase, trecho de origem, confiança); frase é None abaixo do limiar"""
+        sentences = self._sentences(passages)
+        terms = self._terms(question)
+        if not sentences or not terms:
+            return None, None, 0.0
+
+        if query is None:
+            query = np.asarray(self.embeddings.embed_query(question), dtype=np.float32)
+        vectors = np.asarray(self.embeddings.embed_documents([s for s, _ in sentences]), dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1) * (np.linalg.norm(query) or 1.0)
+        semantic = vectors @ query / np.where(norms == 0, 1.0, norms)
+
+        expected = self._expected_type(question)
+        best: Tuple[float, int] = (-1.0, -1)
+        for i, (sentence, _) in enumerate(sentences):
+            coverage = len(terms & self._terms(sentence)) / len(terms)
+            if expected is None:
+                type_match = 0.5
+            else:
+                type_match = 1.0 if expected.search(sentence) else 0.0
+            confidence = 0.45 * float(semantic[i]) + 0.4 * coverage + 0.15 * type_match
+            # Sem o tipo esperado (ex.: pergunta de data sem data) não há resposta extrativa
+            if expected is not None and not type_match:
+                confidence = min(confidence, self.threshold - 1e-6)
+            if confidence > best[0]:
+                best = (confidence, i)
+
+        confidence, index = best
+        sentence, passage = sentences[index]
+        if confidence < self.threshold:
+            return None, passage, confidence
+        return sentence, passage, confidence
@@ -0,0 +1,190 @@
+import contextvars
+import heapq
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from api.models.state import Source
+from api.services.monitoring.metrics import time_stage, RETRIEVAL_COMPARISONS
+from api.services.monitoring.tracing import span
+from api.services.storage.document_store import DocumentStore
+from api.services.storage.vector_index import get_vector_index
+
+
+class ShardedRetriever:
+    """
+    Busca trechos em vários documentos de uma conversa.
+    Cada documento é um shard com seu próprio índice: a consulta é roteada
+    pelos centróides de cada documento, os irrelevantes são ignorados e
+    os demais são buscados em paralelo, com merge global do top-k.
+    Documentos com resumos de seção usam busca em dois estágios: primeiro as
+    seções mais relevantes pelos resumos, depois os trechos só dessas seções.
+    """
+
+    def __init__(
+        self,
+        embeddings,
+        store: Optional[DocumentStore] = None,
+        max_workers: int = 8,
+        max_documents: int = 8,
+        min_route_score: float = 0.2,
+        route_margin: float = 0.15,
+        section_top_k: Optional[int] = None
+    ):
+        self.embeddings = embeddings
+        self.store = store or DocumentStore()
+        self.max_documents = max_documents
+        self.min_route_score = min_route_score
+        self.route_margin = route_margin
+        # 0 desativa a busca em dois estágios mesmo com resumos disponíveis
+        self.section_top_k = int(os.getenv("SECTION_TOP_K", "3")) if section_top_k is None else section_top_k
+        # O produto matricial do numpy libera o GIL, então threads paralelizam a busca
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="retrieval")
+
+    @staticmethod
+    def _normalize(embedding: List[float]) -> np.ndarray:
+        query = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        return query / norm if norm else query
+
+    def embed_query(self, question: str) -> np.ndarray:
+        """Gera o embedding normalizado da pergunta"""
+        with time_stage("embedding"):
+            return self._normalize(self.embeddings.embed_query(question))
+
+    async def aembed_query(self, question: str) -> np.ndarray:
+        """Versão assíncrona de embed_query (não bloqueia o event loop)"""
+        with time_stage("embedding"):
+            return self._normalize(await self.embeddings.aembed_query(question))
+
+    async def aembed_queries(self, questions: List[str]) -> np.ndarray:
+        """Embeddings normalizados de várias perguntas, em um único lote (consultas x dimensões)"""
+        with time_stage("embedding"):
+            matrix = np.asarray(await self.embeddings.aembed_documents(questions), dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.where(norms == 0, 1.0, norms)
+
+    def route(self, query: np.ndarray, document_ids: List[str]) -> List[Tuple[str, float]]:
+        """
+        Pontua cada documento pela similaridade com seus centróides e
+        descarta os que estão abaixo do limiar ou muito atrás do melhor
+        """
+        scores = [
+            (document_id, self.store.load(document_id).routing_score(query))
+            for document_id in document_ids
+            if self.store.exists(document_id)
+        ]
+        if not scores:
+            return []
+
+        scores.sort(key=lambda x: x[1], reverse=True)
+        best = scores[0][1]
+        routed = [
+            (document_id, score)
+            for document_id, score in scores
+            if score >= self.min_route_score and score >= best - self.route_margin
+        ]
+        # Sempre busca ao menos o documento mais provável
+        return (routed or scores[:1])[:self.max_documents]
+
+    def _search_document(self, document_id: str, query: np.ndarray, k: int) -> List[Source]:
+        with span("shard.search", document_id=document_id[:12]):
+            return self._search_stored(document_id, query, k)
+
+    def _search_sections(self, stored, query: np.ndarray, k: int) -> List[Tuple[int, float]]:
+        """Busca em dois estágios: seções pelos resumos, depois os trechos dessas seções"""
+        sections = stored.top_sections(query, self.section_top_k)
+        rows = np.sort(np.concatenate([stored.section_rows(index) for index, _ in sections]))
+        if len(rows) == 0:
+            return []
+        RETRIEVAL_COMPARISONS.observe(len(stored.section_names) + len(rows), mode="hierarchical")
+        scores = np.asarray(stored.embeddings[rows], dtype=np.float32) @ query
+        top = np.argsort(-scores)[:k]
+        return [(int(rows[i]), float(scores[i])) for i in top]
+
+    def _search_stored(self, document_id: str, query: np.ndarray, k: int) -> List[Source]:
+        stored = self.store.load(document_id)
+        hits = []
+        if self.section_top_k and len(stored.section_names) > self.section_top_k and stored.section_embeddings is not None:
+            with span("shard.sections"):
+                hits = self._search_sections(stored, query, k)
+        if not hits:
+            RETRIEVAL_COMPARISONS.observe(len(stored), mode="flat")
+            hits = get_vector_index(stored).search(query, k=k)
+        return self._sources(document_id, stored, hits)
+
+    @staticmethod
+    def _sources(document_id: str, stored, hits: List[Tuple[int, float]]) -> List[Source]:
+        return [
+            {
+                "document_id": document_id,
+                "document_name": stored.name,
+                "section": stored.chunk_section(i),
+                "text": stored.chunk(i),
+                "score": score
+            }
+            for i, score in hits
+        ]
+
+    def retrieve_batch(self, document_id: str, queries: np.ndarray, k: int = 4) -> Tuple[List[List[Source]], np.ndarray]:
+        """
+        Top-k de várias consultas normalizadas em um documento, com um único
+        produto matricial sobre os embeddings exatos. Retorna os trechos de
+        cada consulta e a pontuação de roteamento do documento para cada uma
+        """
+        stored = self.store.load(document_id)
+        with time_stage("retrieval"), span("shard.search_batch", document_id=document_id[:12], queries=len(queries)):
+            centroids = np.asarray(stored.centroids, dtype=np.float32)
+            routing = (centroids @ queries.T).max(axis=0) if len(centroids) else np.zeros(len(queries), dtype=np.float32)
+            if len(stored) == 0:
+                return [[] for _ in range(len(queries))], routing
+
+            scores = stored.score_matrix(queries)
+            comparisons = len(stored)
+            sections = stored.section_embeddings
+            if self.section_top_k and len(stored.section_names) > self.section_top_k and sections is not None:
+                # Dois estágios: cada consulta só enxerga os trechos das suas seções mais relevantes
+                section_scores = np.asarray(sections, dtype=np.float32) @ queries.T
+                top_sections = np.argsort(-section_scores, axis=0)[:self.section_top_k]
+                allowed = np.zeros(section_scores.shape, dtype=bool)
+                allowed[top_sections, np.arange(len(queries))] = True
+                scores = np.where(allowed[np.asarray(stored.chunk_sections)], scores, -np.inf)
+                comparisons += len(stored.section_names)
+            for _ in range(len(queries)):
+                RETRIEVAL_COMPARISONS.observe(comparisons, mode="batch")
+
+            k = min(k, len(stored))
+            top = np.argpartition(-scores, k - 1, axis=0)[:k]
+            results = []
+            for column in range(len(queries)):
+                rows = top[:, column]
+                rows = rows[np.argsort(-scores[rows, column])]
+                hits = [(int(i), float(scores[i, column])) for i in rows if np.isfinite(scores[i, column])]
+                results.append(self._sources(document_id, stored, hits))
+            return results, routing
+
+    def retrieve(
+        self,
+        question: str,
+        document_ids: List[str],
+        k: int = 4,
+        query: Optional[np.ndarray] = None
+    ) -> List[Source]:
+        """Retorna os k trechos mais relevantes entre todos os documentos roteados"""
+        if query is None:
+            query = self.embed_query(question)
+
+        with time_stage("retrieval"):
+            routed = self.route(query, document_ids)
+            if len(routed) == 1:
+                return self._search_document(routed[0][0], query, k)
+
+            # Cada tarefa roda no contexto da requisição, para os spans entrarem no trace
+            futures = [
+                self.executor.submit(contextvars.copy_context().run, self._search_document, document_id, query, k)
+                for document_id, _ in routed
+            ]
+            passages = [passage for future in futures for passage in future.result()]
+            return heapq.nlargest(k, passages, key=lambda p: p["score"])
@@ -1,6 +1,9 @@
 import requests
 from typing import List, Dict
+import os
 import time
+from api.services.monitoring.metrics import time_stage
+from api.services.concurrency.cancellation import check_cancelled, RequestCancelled
 
 class WebSearchService:
     """
@@ -8,12 +11,15 @@ class WebSearchService:
     """
     
     def __init__(self):
-        self.base_url = "https://api.duckduckgo.com/"
+        self.base_url = os.getenv("DUCKDUCKGO_API_URL", "https://api.duckduckgo.com/")
         self.max_results = 2  # Limitado a 2 resultados conforme RF07
+        # Sem timeout, uma busca lenta prende a thread mesmo após o cliente desistir
+        self.timeout = float(os.getenv("WEB_SEARCH_TIMEOUT_SECONDS", "10"))
 
     def search(self, query: str) -> List[Dict[str, str]]:
         """Realiza busca na web e retorna resultados formatados"""
         try:
+            check_cancelled("web_search")
             # Adiciona timestamp para evitar cache
             params = {
                 "q": query,
@@ -21,9 +27,10 @@ class WebSearchService:
                 "t": int(time.time())
             }
             
-            response = requests.get(self.base_url, params=params)
-            response.raise_for_status()
-            data = response.json()
+            with time_stage("web_search"):
+                response = requests.get(self.base_url, params=params, timeout=self.timeout)
+                response.raise_for_status()
+                data = response.json()
             
             results = []
             # Processa AbstractText e AbstractURL primeiro (geralmente mais relevantes)
@@ -57,6 +64,8 @@ class WebSearchService:
             
             return cleaned_results[:self.max_results]
             
+        except RequestCancelled:
+            raise
         except Exception as e:
             print(f"Erro na busca web: {str(e)}")
             return []
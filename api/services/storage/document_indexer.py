@@ -0,0 +1,80 @@
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+from api.models.state import DocumentInfo
+from api.services.extractors.deduplicator import Deduplicator
+from api.services.extractors.text_chunker import TextChunker
+from api.services.monitoring.metrics import time_stage, DEDUP_REMOVED_CHARS
+from api.services.concurrency.cancellation import check_cancelled
+from api.services.concurrency.scheduler import work_class, BACKGROUND
+from api.services.storage.document_store import DocumentStore, StoredDocument
+
+
+class DocumentIndexer:
+    """
+    Divide o documento em trechos, gera os embeddings uma única vez
+    e persiste tudo no DocumentStore
+    """
+
+    def __init__(
+        self,
+        embeddings,
+        store: Optional[DocumentStore] = None,
+        chunker: Optional[TextChunker] = None,
+        deduplicator: Optional[Deduplicator] = None
+    ):
+        self.embeddings = embeddings
+        self.store = store or DocumentStore()
+        self.chunker = chunker or TextChunker()
+        # Trechos quase idênticos (cláusulas padrão, tabelas repetidas) são embedados uma vez só
+        if deduplicator is None and os.getenv("DEDUP_ENABLED", "true").lower() == "true":
+            deduplicator = Deduplicator()
+        self.deduplicator = deduplicator
+
+    def index(
+        self,
+        document_id: str,
+        doc_info: DocumentInfo,
+        analysis: Optional[Dict[str, Any]] = None
+    ) -> StoredDocument:
+        """Indexa e persiste o documento; reaproveita o que já estiver em disco"""
+        if self.store.exists(document_id):
+            return self.store.load(document_id)
+
+        pieces = self.prepare(doc_info)
+        chunks = [text for _, text in pieces]
+        check_cancelled("embedding")
+        # Ingestão é trabalho de fundo: consultas do /chat entram nos lotes antes dela
+        with work_class(BACKGROUND, tenant=document_id), time_stage("embedding"):
+            vectors = self.embeddings.embed_documents(chunks) if chunks else []
+        return self.persist(document_id, doc_info, pieces, vectors, analysis)
+
+    def prepare(self, doc_info: DocumentInfo) -> List[Tuple[str, str]]:
+        """Trechos (seção, texto) do documento, já deduplicados; não usa o modelo"""
+        pieces = self.chunker.split_sections(doc_info["sections"])
+        if self.deduplicator is not None:
+            pieces, report = self.deduplicator.dedupe_chunks(pieces)
+            dedup = doc_info["metadata"].setdefault("dedup", {})
+            dedup.update(report)
+            DEDUP_REMOVED_CHARS.inc(dedup.get("boilerplate_chars", 0), kind="boilerplate")
+            DEDUP_REMOVED_CHARS.inc(dedup.get("repeated_block_chars", 0), kind="repeated_block")
+            DEDUP_REMOVED_CHARS.inc(report["duplicate_chars"], kind="duplicate_chunk")
+        return pieces
+
+    def persist(
+        self,
+        document_id: str,
+        doc_info: DocumentInfo,
+        pieces: List[Tuple[str, str]],
+        vectors: List[List[float]],
+        analysis: Optional[Dict[str, Any]] = None
+    ) -> StoredDocument:
+        """Grava o documento com os embeddings dos trechos de prepare()"""
+        return self.store.save(
+            document_id,
+            doc_info,
+            chunks=[text for _, text in pieces],
+            chunk_sections=[section for section, _ in pieces],
+            embeddings=vectors,
+            extra={"analysis": analysis} if analysis is not None else None
+        )
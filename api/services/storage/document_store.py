@@ -0,0 +1,627 @@
+import fcntl
+import hashlib
+import json
+import mmap
+import os
+import shutil
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from collections.abc import Mapping
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from api.models.state import DocumentInfo
+from api.services.monitoring.metrics import DOCUMENT_EVICTIONS
+
+# Documentos abertos no processo, compartilhados entre conversas e instâncias do store,
+# do menos para o mais recentemente usado
+_OPEN_DOCUMENTS: "OrderedDict[str, StoredDocument]" = OrderedDict()
+_OPEN_LOCK = threading.RLock()
+
+# Outros consumidores de memória que contam no orçamento global (ex.: conversas)
+_MEMORY_CONSUMERS: Dict[str, Callable[[], int]] = {}
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def compute_centroids(matrix: np.ndarray, count: int = 8, iterations: int = 10) -> np.ndarray:
+    """K-means esférico simples: vetores representativos usados para rotear consultas"""
+    matrix = np.asarray(matrix, dtype=np.float32)
+    if matrix.ndim != 2 or len(matrix) == 0:
+        return np.zeros((0, matrix.shape[-1] if matrix.ndim == 2 else 0), dtype=np.float32)
+
+    count = min(count, len(matrix))
+    rng = np.random.default_rng(0)
+    centroids = matrix[rng.choice(len(matrix), count, replace=False)].copy()
+    for _ in range(iterations):
+        labels = np.argmax(matrix @ centroids.T, axis=1)
+        for c in range(count):
+            members = matrix[labels == c]
+            if len(members):
+                centroids[c] = members.sum(axis=0)
+        norms = np.linalg.norm(centroids, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        centroids /= norms
+    return centroids
+
+
+class TextArray:
+    """
+    Lista de textos gravada em um único arquivo contíguo (UTF-8)
+    com um array de offsets, lida via mmap
+    """
+
+    def __init__(self, data_path: str, offsets_path: str):
+        self.offsets = np.load(offsets_path, mmap_mode="r")
+        self._file = open(data_path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        # mmap não aceita arquivos vazios
+        self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+
+    @staticmethod
+    def write(data_path: str, offsets_path: str, texts: List[str]) -> None:
+        """Grava os textos em um arquivo contíguo e seus offsets em bytes"""
+        offsets = np.zeros(len(texts) + 1, dtype=np.int64)
+        with open(data_path, "wb") as f:
+            position = 0
+            for i, text in enumerate(texts):
+                encoded = text.encode("utf-8")
+                f.write(encoded)
+                position += len(encoded)
+                offsets[i + 1] = position
+        np.save(offsets_path, offsets)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index: int) -> str:
+        start, end = int(self.offsets[index]), int(self.offsets[index + 1])
+        return self._data[start:end].decode("utf-8")
+
+    def close(self) -> None:
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+        self._file.close()
+
+
+class SpanArray:
+    """
+    Textos guardados como intervalos (início, fim) em bytes de um buffer
+    compartilhado: as seções apontam para o texto do documento, sem cópia
+    """
+
+    def __init__(self, data, spans: np.ndarray):
+        self._data = data
+        self.spans = spans
+
+    def __len__(self) -> int:
+        return len(self.spans)
+
+    def __getitem__(self, index: int) -> str:
+        start, end = int(self.spans[index, 0]), int(self.spans[index, 1])
+        return self._data[start:end].decode("utf-8")
+
+    def close(self) -> None:
+        # O buffer pertence ao documento, que o fecha
+        pass
+
+
+class SectionMap(Mapping):
+    """Seções de um documento persistido (nome -> texto), lidas do mmap a cada acesso"""
+
+    def __init__(self, stored: "StoredDocument"):
+        self._stored = stored
+        self._index = {name: i for i, name in enumerate(stored.section_names)}
+
+    def __getitem__(self, name: str) -> str:
+        return self._stored.sections[self._index[name]]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._index)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+
+class DocumentView(Mapping):
+    """
+    DocumentInfo de um documento persistido que não guarda o texto: conteúdo e
+    seções são lidos do documento aberto (mmap) a cada acesso. Guarda só o
+    caminho, então um documento descartado pelo orçamento de memória é
+    reaberto de forma transparente no próximo acesso
+    """
+
+    _KEYS = ("document_id", "content", "sections", "metadata")
+
+    def __init__(self, path: str, document_id: str):
+        self._path = path
+        self.document_id = document_id
+
+    def __getitem__(self, key: str) -> Any:
+        if key == "document_id":
+            return self.document_id
+        if key not in self._KEYS:
+            raise KeyError(key)
+        stored = _open_document(self._path)
+        if key == "content":
+            return stored.content
+        if key == "sections":
+            return SectionMap(stored)
+        return stored.meta.get("metadata", {})
+
+    def __contains__(self, key) -> bool:
+        return key in self._KEYS
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._KEYS)
+
+    def __len__(self) -> int:
+        return len(self._KEYS)
+
+
+class StoredDocument:
+    """
+    Documento processado persistido em disco e mapeado em memória (somente leitura).
+    As páginas são compartilhadas pelo page cache do SO entre conversas e processos.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            self.meta: Dict[str, Any] = json.load(f)
+
+        self.document_id: str = self.meta["document_id"]
+        self.section_names: List[str] = self.meta["section_names"]
+        self.embeddings = np.load(os.path.join(path, "embeddings.npy"), mmap_mode="r")
+        self.chunk_sections = np.load(os.path.join(path, "chunk_sections.npy"), mmap_mode="r")
+        self.chunks = TextArray(
+            os.path.join(path, "chunks.bin"),
+            os.path.join(path, "chunk_offsets.npy")
+        )
+        self._content_file = open(os.path.join(path, "content.txt"), "rb")
+        size = os.fstat(self._content_file.fileno()).st_size
+        self._content = mmap.mmap(self._content_file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        # Bytes do texto do documento; depois deles, as seções que não são trechos dele
+        self._content_bytes = self.meta.get("content_bytes", size)
+        spans_path = os.path.join(path, "section_spans.npy")
+        if os.path.exists(spans_path):
+            self.sections = SpanArray(self._content, np.load(spans_path, mmap_mode="r"))
+        else:
+            # Formato antigo: cópia das seções em um arquivo próprio
+            self.sections = TextArray(
+                os.path.join(path, "sections.bin"),
+                os.path.join(path, "section_offsets.npy")
+            )
+
+        centroids_path = os.path.join(path, "centroids.npy")
+        self._centroids = np.load(centroids_path, mmap_mode="r") if os.path.exists(centroids_path) else None
+
+        # Resumos das seções: gerados em segundo plano depois da ingestão
+        self._section_embeddings: Optional[np.ndarray] = None
+        self._section_summaries: Optional[TextArray] = None
+        self._section_rows: Optional[List[np.ndarray]] = None
+
+        # Índices em memória do documento (por tipo), descartados junto com ele
+        self.indexes: Dict[str, Any] = {}
+        self.last_access = time.time()
+        self._mapped_bytes = self._file_bytes(os.listdir(path))
+
+    def __len__(self) -> int:
+        return len(self.chunks)
+
+    def _file_bytes(self, names: List[str]) -> int:
+        total = 0
+        for name in names:
+            try:
+                total += os.path.getsize(os.path.join(self.path, name))
+            except OSError:
+                pass
+        return total
+
+    def memory_usage(self) -> Dict[str, int]:
+        """
+        Bytes do documento no processo: `mapped` são os arquivos mapeados
+        (page cache, recuperável pelo SO) e `heap` o que foi calculado em
+        memória privada (centróides, linhas por seção e índices)
+        """
+        heap = 0
+        if self._centroids is not None and not isinstance(self._centroids, np.memmap):
+            heap += self._centroids.nbytes
+        if self._section_rows is not None:
+            heap += sum(rows.nbytes for rows in self._section_rows)
+        heap += sum(index.memory_bytes for index in list(self.indexes.values()))
+        return {"mapped": self._mapped_bytes, "heap": heap}
+
+    @property
+    def content(self) -> str:
+        """Texto completo (decodifica o arquivo inteiro: evitar em caminhos por turno)"""
+        return self._content[:self._content_bytes].decode("utf-8")
+
+    @property
+    def name(self) -> str:
+        """Nome legível do documento (nome do arquivo enviado, se conhecido)"""
+        return self.meta.get("metadata", {}).get("filename") or self.document_id[:12]
+
+    @property
+    def centroids(self) -> np.ndarray:
+        """Vetores de roteamento do documento (calculados se não persistidos)"""
+        if self._centroids is None:
+            self._centroids = compute_centroids(self.embeddings)
+        return self._centroids
+
+    def routing_score(self, query: np.ndarray) -> float:
+        """Pontuação de relevância do documento para uma consulta normalizada"""
+        if len(self.centroids) == 0:
+            return 0.0
+        return float(np.max(np.asarray(self.centroids, dtype=np.float32) @ query))
+
+    @property
+    def section_embeddings(self) -> Optional[np.ndarray]:
+        """Embeddings normalizados dos resumos das seções (None enquanto não existirem)"""
+        if self._section_embeddings is None:
+            path = os.path.join(self.path, "section_embeddings.npy")
+            # Gravado por último: se existe, os resumos também existem
+            if os.path.exists(path):
+                self._section_summaries = TextArray(
+                    os.path.join(self.path, "section_summaries.bin"),
+                    os.path.join(self.path, "section_summary_offsets.npy")
+                )
+                self._section_embeddings = np.load(path, mmap_mode="r")
+                self._mapped_bytes += self._file_bytes([
+                    "section_summaries.bin", "section_summary_offsets.npy", "section_embeddings.npy"
+                ])
+        return self._section_embeddings
+
+    def section_summary(self, index: int) -> str:
+        """Resumo de uma seção (vazio se os resumos ainda não foram gerados)"""
+        if self.section_embeddings is None:
+            return ""
+        return self._section_summaries[index]
+
+    def section_rows(self, index: int) -> np.ndarray:
+        """Índices dos trechos de uma seção"""
+        if self._section_rows is None:
+            order = np.argsort(np.asarray(self.chunk_sections), kind="stable")
+            bounds = np.searchsorted(np.asarray(self.chunk_sections)[order], np.arange(len(self.section_names) + 1))
+            self._section_rows = [order[bounds[i]:bounds[i + 1]] for i in range(len(self.section_names))]
+        return self._section_rows[index]
+
+    def top_sections(self, query: np.ndarray, count: int) -> List[Tuple[int, float]]:
+        """Seções mais similares à consulta normalizada, pelos resumos"""
+        vectors = self.section_embeddings
+        if vectors is None or len(vectors) == 0:
+            return []
+        scores = np.asarray(vectors, dtype=np.float32) @ query
+        top = np.argsort(-scores)[:count]
+        return [(int(i), float(scores[i])) for i in top]
+
+    def score_matrix(self, queries: np.ndarray, block_size: int = 8192) -> np.ndarray:
+        """
+        Similaridade de cada trecho com cada consulta normalizada (trechos x
+        consultas), em um produto matricial por bloco do arquivo mapeado
+        """
+        if len(self) == 0:
+            return np.zeros((0, len(queries)), dtype=np.float32)
+        return np.concatenate([
+            np.asarray(self.embeddings[start:start + block_size], dtype=np.float32) @ queries.T
+            for start in range(0, len(self), block_size)
+        ])
+
+    def chunk(self, index: int) -> str:
+        """Retorna o texto de um trecho"""
+        return self.chunks[index]
+
+    def chunk_section(self, index: int) -> str:
+        """Retorna o nome da seção de origem de um trecho"""
+        return self.section_names[int(self.chunk_sections[index])]
+
+    def search(self, query_embedding: List[float], k: int = 4) -> List[Tuple[int, float]]:
+        """Busca exata por similaridade de cosseno sobre os embeddings mapeados"""
+        if len(self) == 0:
+            return []
+
+        query = np.asarray(query_embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm == 0:
+            return []
+        query /= norm
+
+        # Os embeddings são gravados normalizados, então o produto escalar é o cosseno
+        scores = self.embeddings @ query
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(i), float(scores[i])) for i in top]
+
+    def to_document_info(self) -> DocumentInfo:
+        """DocumentInfo usado no estado da conversa, sem cópia do texto (DocumentView)"""
+        return DocumentView(self.path, self.document_id)
+
+    def close(self) -> None:
+        self.chunks.close()
+        self.sections.close()
+        if self._section_summaries is not None:
+            self._section_summaries.close()
+        if isinstance(self._content, mmap.mmap):
+            self._content.close()
+        self._content_file.close()
+
+
+def _open_document(path: str) -> StoredDocument:
+    """Documento aberto do diretório, marcado como o mais recentemente usado"""
+    with _OPEN_LOCK:
+        document = _OPEN_DOCUMENTS.get(path)
+        if document is None:
+            if not os.path.exists(os.path.join(path, "meta.json")):
+                raise KeyError(f"Documento não encontrado: {os.path.basename(path)}")
+            document = StoredDocument(path)
+            _OPEN_DOCUMENTS[path] = document
+            enforce_memory_budget()
+        else:
+            _OPEN_DOCUMENTS.move_to_end(path)
+        document.last_access = time.time()
+        return document
+
+
+def open_documents() -> List[StoredDocument]:
+    """Documentos abertos no processo, do menos para o mais recentemente usado"""
+    with _OPEN_LOCK:
+        return list(_OPEN_DOCUMENTS.values())
+
+
+def register_memory_consumer(name: str, usage: Callable[[], int]) -> None:
+    """Inclui outro consumidor de memória (em bytes) no orçamento global"""
+    _MEMORY_CONSUMERS[name] = usage
+
+
+def memory_consumers() -> Dict[str, int]:
+    """Bytes de cada consumidor registrado"""
+    return {name: usage() for name, usage in list(_MEMORY_CONSUMERS.items())}
+
+
+def memory_budget() -> int:
+    """Orçamento global de memória em bytes (MEMORY_BUDGET_MB; 0 = sem limite)"""
+    return int(float(os.getenv("MEMORY_BUDGET_MB", "0")) * 1024 * 1024)
+
+
+def enforce_memory_budget() -> List[str]:
+    """
+    Descarta os documentos menos usados recentemente até o total (documentos
+    abertos e consumidores registrados) caber no orçamento. Os artefatos
+    continuam em disco: o próximo acesso reabre o documento. O mais recente
+    nunca é descartado. Retorna os ids descartados
+    """
+    budget = memory_budget()
+    if not budget:
+        return []
+    evicted = []
+    with _OPEN_LOCK:
+        usage = {path: sum(document.memory_usage().values()) for path, document in _OPEN_DOCUMENTS.items()}
+        total = sum(usage.values()) + sum(memory_consumers().values())
+        for path in list(_OPEN_DOCUMENTS)[:-1]:
+            if total <= budget:
+                break
+            document = _OPEN_DOCUMENTS.pop(path)
+            # Sem close(): requisições em andamento ainda podem usar o documento,
+            # e os mapeamentos são liberados quando a última referência sai
+            document.indexes.clear()
+            total -= usage[path]
+            evicted.append(document.document_id)
+            DOCUMENT_EVICTIONS.inc(reason="budget")
+    return evicted
+
+
+class DocumentStore:
+    """
+    Armazena documentos processados em disco em formato compacto:
+    matriz de embeddings (float16 ou float32), trechos em arquivo contíguo
+    com offsets e metadados em JSON. A leitura usa mmap.
+    """
+
+    def __init__(self, base_dir: Optional[str] = None, dtype: Optional[str] = None):
+        self.base_dir = base_dir or os.getenv("DOCUMENT_STORE_DIR", "data/documents")
+        self.dtype = np.dtype(dtype or os.getenv("EMBEDDING_DTYPE", "float16"))
+        if self.dtype not in (np.float16, np.float32):
+            raise ValueError("EMBEDDING_DTYPE deve ser float16 ou float32")
+        os.makedirs(self.base_dir, exist_ok=True)
+
+    @staticmethod
+    def compute_document_id(data: bytes) -> str:
+        """Identificador do documento baseado no hash do conteúdo"""
+        return hashlib.sha256(data).hexdigest()
+
+    def _document_path(self, document_id: str) -> str:
+        return os.path.join(self.base_dir, document_id)
+
+    def exists(self, document_id: str) -> bool:
+        return os.path.exists(os.path.join(self._document_path(document_id), "meta.json"))
+
+    def save(
+        self,
+        document_id: str,
+        doc_info: DocumentInfo,
+        chunks: List[str],
+        chunk_sections: List[str],
+        embeddings: List[List[float]],
+        extra: Optional[Dict[str, Any]] = None
+    ) -> "StoredDocument":
+        """Persiste o documento de forma atômica e retorna a versão mapeada"""
+        section_names = list(doc_info["sections"].keys())
+        section_index = {name: i for i, name in enumerate(section_names)}
+
+        matrix = np.asarray(embeddings, dtype=np.float32)
+        if matrix.ndim != 2:
+            matrix = matrix.reshape(len(chunks), 0)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        matrix = (matrix / norms).astype(self.dtype)
+
+        # Grava em diretório temporário e renomeia, para leitores nunca verem arquivos parciais
+        tmp_path = os.path.join(self.base_dir, f".tmp-{uuid.uuid4().hex}")
+        os.makedirs(tmp_path)
+        try:
+            np.save(os.path.join(tmp_path, "embeddings.npy"), matrix)
+            np.save(os.path.join(tmp_path, "centroids.npy"), compute_centroids(matrix))
+            np.save(
+                os.path.join(tmp_path, "chunk_sections.npy"),
+                np.asarray([section_index[s] for s in chunk_sections], dtype=np.int32)
+            )
+            TextArray.write(
+                os.path.join(tmp_path, "chunks.bin"),
+                os.path.join(tmp_path, "chunk_offsets.npy"),
+                chunks
+            )
+            # O texto é gravado uma única vez: cada seção é um intervalo dele.
+            # As seções seguem a ordem do texto, então a busca continua do fim da
+            # anterior (texto repetido cai na ocorrência certa); seções que não
+            # aparecem a partir dali vão depois do texto
+            content = doc_info["content"].encode("utf-8")
+            spans = np.zeros((len(section_names), 2), dtype=np.int64)
+            position = len(content)
+            cursor = 0
+            with open(os.path.join(tmp_path, "content.txt"), "wb") as f:
+                f.write(content)
+                for i, text in enumerate(doc_info["sections"].values()):
+                    encoded = text.encode("utf-8")
+                    start = content.find(encoded, cursor)
+                    if start < 0:
+                        f.write(encoded)
+                        start = position
+                        position += len(encoded)
+                    else:
+                        cursor = start + len(encoded)
+                    spans[i] = (start, start + len(encoded))
+            np.save(os.path.join(tmp_path, "section_spans.npy"), spans)
+
+            meta = {
+                "document_id": document_id,
+                "section_names": section_names,
+                "num_chunks": len(chunks),
+                "dimension": int(matrix.shape[1]) if matrix.size else 0,
+                "dtype": self.dtype.name,
+                "content_bytes": len(content),
+                "metadata": doc_info.get("metadata", {}),
+                **(extra or {})
+            }
+            with open(os.path.join(tmp_path, "meta.json"), "w", encoding="utf-8") as f:
+                json.dump(meta, f, ensure_ascii=False, default=str)
+
+            try:
+                os.rename(tmp_path, self._document_path(document_id))
+            except OSError:
+                # Outro processo persistiu o mesmo documento primeiro
+                shutil.rmtree(tmp_path, ignore_errors=True)
+        except Exception:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            raise
+
+        return self.load(document_id)
+
+    def save_section_summaries(
+        self,
+        document_id: str,
+        summaries: List[str],
+        embeddings: List[List[float]]
+    ) -> None:
+        """
+        Acrescenta os resumos das seções a um documento persistido. O vetor de
+        cada seção soma o embedding do resumo (o assunto, em outras palavras)
+        ao centróide dos seus trechos (o vocabulário exato do texto)
+        """
+        path = self._document_path(document_id)
+        stored = self.load(document_id)
+        summary_vectors = _normalize(np.asarray(embeddings, dtype=np.float32).reshape(len(summaries), -1))
+        chunk_vectors = np.asarray(stored.embeddings, dtype=np.float32)
+        centroids = np.zeros_like(summary_vectors)
+        for i in range(len(summaries)):
+            rows = stored.section_rows(i)
+            if len(rows):
+                centroids[i] = chunk_vectors[rows].mean(axis=0)
+        matrix = _normalize(summary_vectors + _normalize(centroids)).astype(self.dtype)
+
+        suffix = f".{uuid.uuid4().hex}.tmp"
+        TextArray.write(
+            os.path.join(path, f"section_summaries.bin{suffix}"),
+            os.path.join(path, f"section_summary_offsets{suffix}.npy"),
+            summaries
+        )
+        os.replace(os.path.join(path, f"section_summaries.bin{suffix}"), os.path.join(path, "section_summaries.bin"))
+        os.replace(os.path.join(path, f"section_summary_offsets{suffix}.npy"), os.path.join(path, "section_summary_offsets.npy"))
+        # Os embeddings por último: leitores só usam os resumos quando este arquivo existe
+        np.save(os.path.join(path, f"section_embeddings{suffix}.npy"), matrix)
+        os.replace(os.path.join(path, f"section_embeddings{suffix}.npy"), os.path.join(path, "section_embeddings.npy"))
+
+    def load(self, document_id: str) -> "StoredDocument":
+        """Abre (ou reutiliza) o documento mapeado em memória"""
+        return _open_document(os.path.abspath(self._document_path(document_id)))
+
+    def delete(self, document_id: str) -> None:
+        """Remove o documento do disco"""
+        path = os.path.abspath(self._document_path(document_id))
+        with _OPEN_LOCK:
+            document = _OPEN_DOCUMENTS.pop(path, None)
+        if document is not None:
+            document.close()
+        shutil.rmtree(path, ignore_errors=True)
+
+    def load_conversations(self) -> Dict[str, List[str]]:
+        """Carrega o índice conversa -> documentos"""
+        path = os.path.join(self.base_dir, "conversations.json")
+        if not os.path.exists(path):
+            return {}
+        with open(path, encoding="utf-8") as f:
+            conversations = json.load(f)
+        # Formato antigo: um único documento por conversa
+        return {
+            conversation_id: [ids] if isinstance(ids, str) else ids
+            for conversation_id, ids in conversations.items()
+        }
+
+    def save_conversations(self, conversations: Dict[str, List[str]]) -> None:
+        """Persiste o índice conversa -> documentos de forma atômica"""
+        path = os.path.join(self.base_dir, "conversations.json")
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(conversations, f)
+        os.replace(tmp_path, path)
+
+    @contextmanager
+    def _conversations_lock(self):
+        # Lock de arquivo: vários workers (processos) atualizam o mesmo índice
+        with open(os.path.join(self.base_dir, "conversations.lock"), "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def add_conversation(self, document_ids: List[str]) -> Tuple[str, Dict[str, List[str]]]:
+        """
+        Registra uma conversa relendo o índice sob lock, para que workers
+        diferentes não gerem o mesmo id nem apaguem conversas uns dos outros.
+        Retorna o id e o índice atualizado
+        """
+        with self._conversations_lock():
+            conversations = self.load_conversations()
+            conversation_id = f"conv_{len(conversations) + 1}"
+            conversations[conversation_id] = list(document_ids)
+            self.save_conversations(conversations)
+        return conversation_id, conversations
+
+    def add_conversation_document(self, conversation_id: str, document_id: str) -> Dict[str, List[str]]:
+        """Acrescenta um documento a uma conversa; retorna o índice atualizado"""
+        with self._conversations_lock():
+            conversations = self.load_conversations()
+            document_ids = conversations.setdefault(conversation_id, [])
+            if document_id not in document_ids:
+                document_ids.append(document_id)
+                self.save_conversations(conversations)
+        return conversations
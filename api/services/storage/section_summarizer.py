@@ -0,0 +1,94 @@
+import asyncio
+import contextvars
+import os
+from typing import Dict, List, Optional
+
+from api.services.concurrency.scheduler import work_class, BACKGROUND
+from api.services.monitoring.metrics import SECTION_SUMMARIES
+from api.services.storage.document_store import DocumentStore
+
+
+class SectionSummarizer:
+    """
+    Etapa opcional da ingestão: resume cada seção com o LLM, embeda os
+    resumos e os grava junto ao documento, em segundo plano e com prioridade
+    de fundo. Os resumos permitem a busca em dois estágios (seções, depois
+    trechos) do ShardedRetriever
+    """
+
+    def __init__(
+        self,
+        llm,
+        embeddings,
+        store: Optional[DocumentStore] = None,
+        concurrency: int = 2,
+        min_sections: int = 4,
+        min_chars: int = 400
+    ):
+        self.llm = llm
+        self.embeddings = embeddings
+        self.store = store or DocumentStore()
+        # Orçamento próprio de chamadas simultâneas, além da fatia de fundo do scheduler do LLM
+        self._budget = asyncio.Semaphore(max(1, concurrency))
+        # Documentos com poucas seções não ganham nada com a busca em dois estágios
+        self.min_sections = min_sections
+        # Seções curtas são usadas como o próprio resumo, sem chamar o LLM
+        self.min_chars = min_chars
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    def needs_summaries(self, document_id: str) -> bool:
+        stored = self.store.load(document_id)
+        return len(stored.section_names) >= self.min_sections and stored.section_embeddings is None
+
+    def schedule(self, document_id: str) -> Optional[asyncio.Task]:
+        """Agenda os resumos do documento sem bloquear a requisição"""
+        if document_id in self._tasks or not self.needs_summaries(document_id):
+            return self._tasks.get(document_id)
+        # Contexto vazio: a task não herda o trace nem o cancelamento do upload
+        task = contextvars.Context().run(asyncio.ensure_future, self.summarize(document_id))
+        self._tasks[document_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(document_id, None))
+        return task
+
+    async def _summarize_section(self, name: str, text: str) -> str:
+        text = text.strip()
+        if len(text) < self.min_chars:
+            SECTION_SUMMARIES.inc(source="text")
+            return text
+        async with self._budget:
+            summary = await self.llm.agenerate_section_summary(text)
+        if not summary or "NAO_ENCONTRADO" in summary:
+            # LLM indisponível: o início da seção serve de resumo
+            SECTION_SUMMARIES.inc(source="lead")
+            return text[:self.min_chars]
+        SECTION_SUMMARIES.inc(source="llm")
+        return summary
+
+    async def summarize(self, document_id: str) -> None:
+        try:
+            stored = self.store.load(document_id)
+            with work_class(BACKGROUND, tenant=document_id):
+                summaries: List[str] = await asyncio.gather(*(
+                    self._summarize_section(name, stored.sections[i])
+                    for i, name in enumerate(stored.section_names)
+                ))
+                # O nome da seção entra no vetor: ajuda perguntas como "o que diz a cláusula de rescisão"
+                vectors = await self.embeddings.aembed_documents([
+                    f"{name}: {summary}" for name, summary in zip(stored.section_names, summaries)
+                ])
+            await asyncio.to_thread(self.store.save_section_summaries, document_id, summaries, vectors)
+        except Exception as e:
+            print(f"Erro ao resumir seções do documento {document_id[:12]}: {str(e)}")
+
+
+def get_section_summarizer(llm, embeddings, store: DocumentStore) -> Optional[SectionSummarizer]:
+    """Resumidor configurado pelo ambiente (SECTION_SUMMARIES), ou None se desativado"""
+    if os.getenv("SECTION_SUMMARIES", "false").lower() != "true":
+        return None
+    return SectionSummarizer(
+        llm,
+        embeddings,
+        store,
+        concurrency=int(os.getenv("SECTION_SUMMARY_CONCURRENCY", "2")),
+        min_sections=int(os.getenv("SECTION_SUMMARY_MIN_SECTIONS", "4"))
+    )
@@ -0,0 +1,185 @@
+import os
+import threading
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from api.services.monitoring.metrics import record_cache
+from api.services.storage.document_store import StoredDocument, enforce_memory_budget
+
+INDEX_TYPES = ("mmap", "float32", "float16", "pq", "ivfpq")
+
+# Os índices ficam no próprio documento aberto (StoredDocument.indexes), compartilhados
+# entre conversas do mesmo processo e descartados junto com ele (orçamento de memória ou
+# DocumentStore.delete). Documentos são endereçados pelo hash e nunca regravados, então
+# um índice não fica desatualizado enquanto o documento está aberto
+_INDEX_LOCK = threading.Lock()
+
+
+class VectorIndex:
+    """
+    Índice vetorial em memória de um documento persistido.
+    Tipos disponíveis:
+    - mmap: busca exata direto nos embeddings mapeados (sem cópia privada)
+    - float32 / float16: cópia em memória com a precisão indicada
+    - pq / ivfpq: quantização por produto via FAISS (IndexPQ / IndexIVFPQ)
+    Para os tipos comprimidos, os candidatos são reordenados com os vetores
+    exatos do disco apenas para o top-k final.
+    """
+
+    def __init__(
+        self,
+        stored: StoredDocument,
+        index_type: str = "mmap",
+        rerank_factor: int = 4,
+        pq_m: int = 48,
+        pq_nbits: int = 8,
+        nprobe: int = 8
+    ):
+        if index_type not in INDEX_TYPES:
+            raise ValueError(f"Tipo de índice inválido: {index_type}")
+
+        self.stored = stored
+        self.index_type = index_type
+        self.rerank_factor = max(1, rerank_factor)
+        self.dimension = stored.embeddings.shape[1] if stored.embeddings.ndim == 2 else 0
+        self._vectors: Optional[np.ndarray] = None
+        self._faiss_index = None
+        self._quantizer = None
+        self._memory_bytes: Optional[int] = None
+
+        if index_type in ("pq", "ivfpq") and not self._build_pq(index_type, pq_m, pq_nbits, nprobe):
+            # Poucos trechos para treinar os codebooks: usa float16
+            self.index_type = "float16"
+
+        # Cópia explícita: asarray devolveria o próprio memmap quando o tipo
+        # gravado já é o pedido, e a memória "privada" seria a página mapeada
+        if self.index_type == "float32":
+            self._vectors = np.array(stored.embeddings, dtype=np.float32, copy=True)
+        elif self.index_type == "float16":
+            self._vectors = np.array(stored.embeddings, dtype=np.float16, copy=True)
+
+    def __len__(self) -> int:
+        return len(self.stored)
+
+    @staticmethod
+    def _subquantizers(dimension: int, pq_m: int) -> int:
+        """Maior número de subquantizadores <= pq_m que divide a dimensão"""
+        for m in range(min(pq_m, dimension), 0, -1):
+            if dimension % m == 0:
+                return m
+        return 1
+
+    def _build_pq(self, index_type: str, pq_m: int, pq_nbits: int, nprobe: int) -> bool:
+        """Treina o índice de quantização por produto com os vetores do documento"""
+        count = len(self.stored)
+        # O k-means do FAISS pede ao menos 39 pontos por centróide (2^nbits centróides)
+        nbits = min(pq_nbits, int(np.log2(count / 39))) if count >= 39 else 0
+        if nbits < 4 or self.dimension == 0:
+            return False
+
+        import faiss
+
+        vectors = np.ascontiguousarray(self.stored.embeddings, dtype=np.float32)
+        m = self._subquantizers(self.dimension, pq_m)
+        if index_type == "pq":
+            index = faiss.IndexPQ(self.dimension, m, nbits, faiss.METRIC_INNER_PRODUCT)
+        else:
+            nlist = max(1, min(int(np.sqrt(count)), count // 39))
+            self._quantizer = faiss.IndexFlatIP(self.dimension)
+            index = faiss.IndexIVFPQ(
+                self._quantizer, self.dimension, nlist, m, nbits, faiss.METRIC_INNER_PRODUCT
+            )
+            index.nprobe = min(nprobe, nlist)
+
+        index.train(vectors)
+        index.add(vectors)
+        self._faiss_index = index
+        return True
+
+    @property
+    def bytes_per_chunk(self) -> float:
+        """Bytes em memória privada por trecho (sem contar codebooks)"""
+        if self.index_type == "mmap":
+            return 0.0
+        if self._vectors is not None:
+            return float(self._vectors.itemsize * self.dimension)
+        if self.index_type == "pq":
+            return float(self._faiss_index.pq.code_size)
+        # IVFPQ guarda também o id de 8 bytes de cada vetor nas listas invertidas
+        return float(self._faiss_index.code_size + 8)
+
+    @property
+    def memory_bytes(self) -> int:
+        """Memória privada total do índice, incluindo codebooks e centróides"""
+        if self._memory_bytes is None:
+            if self._faiss_index is not None:
+                import faiss
+                self._memory_bytes = int(faiss.serialize_index(self._faiss_index).nbytes)
+            else:
+                self._memory_bytes = int(self.bytes_per_chunk * len(self))
+        return self._memory_bytes
+
+    def _candidates(self, query: np.ndarray, count: int) -> np.ndarray:
+        """Retorna os ids candidatos ordenados pela pontuação aproximada"""
+        if self._faiss_index is not None:
+            _, ids = self._faiss_index.search(query.reshape(1, -1), count)
+            return ids[0][ids[0] >= 0]
+
+        vectors = self._vectors if self._vectors is not None else self.stored.embeddings
+        scores = _scores(vectors, query)
+        top = np.argpartition(-scores, count - 1)[:count]
+        return top[np.argsort(-scores[top])]
+
+    def search(self, query_embedding: List[float], k: int = 4, rerank: bool = True) -> List[Tuple[int, float]]:
+        """Busca os k trechos mais similares à consulta"""
+        if len(self) == 0:
+            return []
+
+        query = np.asarray(query_embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm == 0:
+            return []
+        query = query / norm
+
+        k = min(k, len(self))
+        exact = self.index_type in ("mmap", "float32")
+        count = k if exact or not rerank else min(len(self), k * self.rerank_factor)
+        candidates = self._candidates(query, count)
+
+        # Reordena com os vetores exatos (lidos do mmap apenas para os candidatos)
+        rows = np.sort(candidates)
+        scores = np.asarray(self.stored.embeddings[rows], dtype=np.float32) @ query
+        order = np.argsort(-scores)[:k]
+        return [(int(rows[i]), float(scores[i])) for i in order]
+
+
+def _scores(vectors: np.ndarray, query: np.ndarray, block_size: int = 8192) -> np.ndarray:
+    """Produto escalar em blocos, convertendo float16 para float32 sem cópia completa"""
+    if vectors.dtype == np.float32:
+        return vectors @ query
+    return np.concatenate([
+        np.asarray(vectors[start:start + block_size], dtype=np.float32) @ query
+        for start in range(0, len(vectors), block_size)
+    ])
+
+
+def get_vector_index(stored: StoredDocument, index_type: Optional[str] = None) -> VectorIndex:
+    """Retorna o índice do documento, construindo-o uma única vez por processo"""
+    index_type = index_type or os.getenv("VECTOR_INDEX_TYPE", "mmap")
+    with _INDEX_LOCK:
+        index = stored.indexes.get(index_type)
+    record_cache("vector_index", index is not None)
+    if index is None:
+        index = VectorIndex(
+            stored,
+            index_type=index_type,
+            rerank_factor=int(os.getenv("VECTOR_INDEX_RERANK_FACTOR", "4")),
+            pq_m=int(os.getenv("PQ_SUBQUANTIZERS", "48")),
+            pq_nbits=int(os.getenv("PQ_NBITS", "8"))
+        )
+        with _INDEX_LOCK:
+            index = stored.indexes.setdefault(index_type, index)
+        # O índice pode ter passado o orçamento de memória
+        enforce_memory_budget()
+    return index
@@ -0,0 +1,149 @@
+"""
+Perguntas fixas sobre um documento: /chat sequencial vs. /documents/{id}/ask-batch.
+
+Sobe a API contra os serviços fake (como o teste de carga), processa um PDF
+sintético e faz as mesmas perguntas das duas formas. Reporta o tempo total,
+o tempo até o primeiro resultado do lote, as chamadas ao LLM fake e se o
+histórico da conversa ficou intacto depois do lote. Com --chat-concurrency,
+mede também a latência do /chat enquanto o lote roda.
+
+Uso:
+    python -m benchmarks.ask_batch --questions 40 --latency-ms 300
+    python -m benchmarks.ask_batch --priority interactive --chat-concurrency 4
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from typing import Any, Dict, List
+
+import requests
+
+from benchmarks.load.fake_services import FakeService, FakeServiceConfig
+from benchmarks.load.run_load import SyntheticDocument, fake_api_env, percentile, start_api, wait_ready
+
+
+def sequential(api_url: str, conversation_id: str, questions: List[str]) -> Dict[str, Any]:
+    session = requests.Session()
+    start = time.perf_counter()
+    statuses = []
+    for question in questions:
+        response = session.post(f"{api_url}/chat/{conversation_id}", params={"question": question}, timeout=60)
+        statuses.append(response.status_code)
+    return {"seconds": time.perf_counter() - start, "ok": sum(s == 200 for s in statuses)}
+
+
+def batch(api_url: str, document_id: str, questions: List[str]) -> Dict[str, Any]:
+    start = time.perf_counter()
+    first = None
+    lines = []
+    with requests.post(
+        f"{api_url}/documents/{document_id}/ask-batch",
+        json={"questions": questions},
+        stream=True,
+        timeout=600
+    ) as response:
+        response.raise_for_status()
+        for line in response.iter_lines():
+            if not line:
+                continue
+            if first is None:
+                first = time.perf_counter() - start
+            lines.append(json.loads(line))
+    summary = lines[-1]
+    answers = lines[:-1]
+    return {
+        "seconds": time.perf_counter() - start,
+        "first_result_seconds": first,
+        "ok": sum("answer" in item for item in answers),
+        "in_order": [item["index"] for item in answers] == sorted(item["index"] for item in answers),
+        "summary": summary
+    }
+
+
+def chat_during(api_url: str, conversation_id: str, questions: List[str], stop: threading.Event, latencies: List[float]):
+    session = requests.Session()
+    rng = random.Random(threading.get_ident())
+    while not stop.is_set():
+        start = time.perf_counter()
+        response = session.post(f"{api_url}/chat/{conversation_id}", params={"question": rng.choice(questions)}, timeout=60)
+        if response.ok:
+            latencies.append(time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Perguntas fixas: /chat sequencial vs. ask-batch")
+    parser.add_argument("--api-port", type=int, default=8766)
+    parser.add_argument("--questions", type=int, default=40)
+    parser.add_argument("--pages", type=int, default=10)
+    parser.add_argument("--latency-ms", type=float, default=300.0)
+    parser.add_argument("--jitter-ms", type=float, default=50.0)
+    parser.add_argument("--llm-max-concurrent", type=int, default=8)
+    parser.add_argument("--priority", choices=["background", "interactive"], default="background")
+    parser.add_argument("--chat-concurrency", type=int, default=0, help="Clientes de /chat simultâneos durante o lote")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Arquivo JSON com os resultados")
+    args = parser.parse_args()
+
+    config = FakeServiceConfig(args.latency_ms, args.jitter_ms, 0.0, args.seed)
+    openai = FakeService("openai", 0, config).start()
+    ddg = FakeService("duckduckgo", 0, config).start()
+    env = fake_api_env(openai, ddg)
+    env.update(LLM_MAX_CONCURRENT=str(args.llm_max_concurrent), ASK_BATCH_PRIORITY=args.priority)
+    process = start_api(args.api_port, env)
+    api_url = f"http://127.0.0.1:{args.api_port}"
+    try:
+        wait_ready(api_url)
+        document = SyntheticDocument(args.seed, args.pages, "pt")
+        response = requests.post(
+            f"{api_url}/process-pdf",
+            files={"file": (document.name, document.pdf, "application/pdf")},
+            timeout=120
+        )
+        response.raise_for_status()
+        uploaded = response.json()
+        rng = random.Random(args.seed)
+        questions = [rng.choice(document.sentences) for _ in range(args.questions)]
+
+        before = openai.behavior.requests
+        serial = sequential(api_url, uploaded["conversation_id"], questions)
+        serial["llm_calls"] = openai.behavior.requests - before
+        history = requests.get(f"{api_url}/conversations/{uploaded['conversation_id']}/history", timeout=10).json()
+
+        stop = threading.Event()
+        latencies: List[float] = []
+        chatters = [
+            threading.Thread(target=chat_during, args=(api_url, uploaded["conversation_id"], questions, stop, latencies))
+            for _ in range(args.chat_concurrency)
+        ]
+        for thread in chatters:
+            thread.start()
+        before = openai.behavior.requests
+        batched = batch(api_url, uploaded["document_id"], questions)
+        stop.set()
+        for thread in chatters:
+            thread.join()
+        batched["llm_calls"] = openai.behavior.requests - before
+        after = requests.get(f"{api_url}/conversations/{uploaded['conversation_id']}/history", timeout=10).json()
+        batched["history_untouched"] = args.chat_concurrency > 0 or after == history
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+        openai.stop()
+        ddg.stop()
+
+    print(f"{args.questions} perguntas, LLM fake de {args.latency_ms:.0f} ms, {args.llm_max_concurrent} vagas, lote {args.priority}")
+    print(f"{'modo':<12}{'total (s)':>11}{'1º (s)':>9}{'respostas':>11}{'LLM':>6}")
+    print(f"{'sequencial':<12}{serial['seconds']:>11.2f}{'-':>9}{serial['ok']:>11}{serial['llm_calls']:>6}")
+    print(f"{'lote':<12}{batched['seconds']:>11.2f}{batched['first_result_seconds']:>9.2f}{batched['ok']:>11}{batched['llm_calls']:>6}")
+    print(f"Lote concluído: {batched['summary']['done']}; histórico intacto: {batched['history_untouched']}")
+    if latencies:
+        print(f"/chat durante o lote: n={len(latencies)} p50={percentile(latencies, 50):.2f}s p95={percentile(latencies, 95):.2f}s")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"sequential": serial, "batch": batched, "chat_during_batch": latencies}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""
+Compara dois resultados de `run_benchmarks` e aponta regressões.
+
+Uso:
+    python -m benchmarks.compare benchmarks/results/base.json benchmarks/results/new.json --threshold 10
+Retorna código 1 se algum benchmark ficou mais lento que o limiar.
+"""
+import argparse
+import json
+import sys
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara resultados de benchmarks")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Regressão máxima aceita (%%)")
+    parser.add_argument("--metric", default="median_s")
+    args = parser.parse_args()
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)["results"]
+    with open(args.candidate, encoding="utf-8") as f:
+        candidate = json.load(f)["results"]
+
+    regressions = []
+    print(f"{'benchmark':<24}{'base (ms)':>12}{'novo (ms)':>12}{'variação':>10}")
+    for name in sorted(set(baseline) & set(candidate)):
+        before = baseline[name][args.metric]
+        after = candidate[name][args.metric]
+        change = 100.0 * (after - before) / before if before else 0.0
+        flag = ""
+        if change > args.threshold:
+            regressions.append(name)
+            flag = "  REGRESSÃO"
+        print(f"{name:<24}{before * 1000:>12.3f}{after * 1000:>12.3f}{change:>9.1f}%{flag}")
+
+    for name in sorted(set(baseline) ^ set(candidate)):
+        print(f"{name:<24} presente em apenas um dos resultados")
+
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
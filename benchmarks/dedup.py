@@ -0,0 +1,162 @@
+"""
+Efeito da deduplicação na ingestão: PDFs sintéticos com cabeçalho/rodapé,
+cláusulas padrão e tabelas repetidas são indexados com e sem o Deduplicator.
+Reporta texto removido, trechos, tamanho do índice em disco e tempo de embedding.
+Antes, confere que cláusulas que diferem só em um valor, data ou parte não são
+juntadas (encerra com erro se forem).
+
+Uso:
+    python -m benchmarks.dedup --pages 30 --boilerplate 0.6
+    EMBEDDING_BACKEND=huggingface python -m benchmarks.dedup --pages 30
+"""
+import os
+
+# Configuração offline antes de qualquer import da API
+os.environ.setdefault("EMBEDDING_BACKEND", "hashing")
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+import argparse
+import asyncio
+import json
+import tempfile
+import time
+from io import BytesIO
+from typing import Any, Dict
+
+from benchmarks.synthetic_pdf import CorpusConfig, generate_pdf
+
+
+def directory_size(path: str) -> int:
+    return sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, names in os.walk(path)
+        for name in names
+    )
+
+
+def ingest(pdf: bytes, dedup: bool, embeddings, store_dir: str) -> Dict[str, Any]:
+    from api.services.extractors.deduplicator import Deduplicator
+    from api.services.extractors.pdf_extractor import PDFExtractor
+    from api.services.storage.document_indexer import DocumentIndexer
+    from api.services.storage.document_store import DocumentStore
+
+    extractor = PDFExtractor(Deduplicator() if dedup else None)
+    if not dedup:
+        extractor.deduplicator = None
+    start = time.perf_counter()
+    doc_info = asyncio.run(extractor.process_pdf(BytesIO(pdf)))
+    extraction = time.perf_counter() - start
+
+    # Mede o embedding separadamente do restante da indexação
+    timed = _TimedEmbeddings(embeddings)
+    store = DocumentStore(store_dir)
+    indexer = DocumentIndexer(timed, store, deduplicator=Deduplicator() if dedup else None)
+    if not dedup:
+        indexer.deduplicator = None
+    document_id = "dedup" if dedup else "baseline"
+    doc_info["document_id"] = document_id
+    stored = indexer.index(document_id, doc_info)
+
+    return {
+        "content_chars": len(doc_info["content"]),
+        "sections": len(doc_info["sections"]),
+        "chunks": len(stored),
+        "index_bytes": directory_size(os.path.join(store_dir, document_id)),
+        "embedding_bytes": int(stored.embeddings.nbytes),
+        "extraction_s": extraction,
+        "embedding_s": timed.seconds,
+        "report": doc_info["metadata"].get("dedup", {})
+    }
+
+
+def check_distinct_clauses() -> None:
+    """Cláusulas iguais exceto por um número, data ou nome precisam sobreviver à deduplicação"""
+    from api.services.extractors.deduplicator import Deduplicator
+
+    clause = (
+        "O LOCATÁRIO pagará ao LOCADOR o valor mensal de {amount}, com vencimento em {date}, "
+        "mediante depósito na conta indicada por {party}. O atraso implica multa de dois por cento "
+        "sobre o valor devido, além de juros de mora de um por cento ao mês, calculados pro rata die, "
+        "e correção monetária pelo índice oficial acumulado no período entre o vencimento e o pagamento."
+    )
+    base = {"amount": "R$ 1.500,00", "date": "05/03/2024", "party": "João Silva"}
+    variants = [base, {**base, "amount": "R$ 1.800,00"}, {**base, "date": "05/04/2024"}, {**base, "party": "Maria Souza"}]
+    pieces = [("contrato", clause.format(**values)) for values in variants]
+    # A repetição exata da primeira cláusula continua sendo removida
+    pieces.append(("contrato", "  " + pieces[0][1].upper()))
+
+    kept, report = Deduplicator().dedupe_chunks(pieces)
+    if len(kept) != len(variants) or report["duplicate_chunks"] != 1:
+        raise SystemExit(f"Deduplicação juntou cláusulas distintas: {len(kept)} de {len(variants)} mantidas")
+    print(f"Cláusulas distintas preservadas: {len(kept)} de {len(variants)}; duplicata exata removida")
+
+
+class _TimedEmbeddings:
+    def __init__(self, embeddings):
+        self.embeddings = embeddings
+        self.seconds = 0.0
+
+    def embed_documents(self, texts):
+        start = time.perf_counter()
+        vectors = self.embeddings.embed_documents(texts)
+        self.seconds += time.perf_counter() - start
+        return vectors
+
+    def embed_query(self, text):
+        return self.embeddings.embed_query(text)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Redução do índice e do tempo de embedding com deduplicação")
+    parser.add_argument("--pages", type=int, default=30)
+    parser.add_argument("--boilerplate", type=float, default=0.6, help="Probabilidade de cláusula padrão por página")
+    parser.add_argument("--tables-per-page", type=float, default=0.3)
+    parser.add_argument("--language", choices=["pt", "en", "mixed"], default="pt")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Arquivo JSON com os resultados")
+    args = parser.parse_args()
+
+    from api.services.embeddings.embedding_provider import get_embeddings
+
+    check_distinct_clauses()
+    pdf = generate_pdf(CorpusConfig(
+        pages=args.pages,
+        tables_per_page=args.tables_per_page,
+        language=args.language,
+        boilerplate=args.boilerplate,
+        seed=args.seed
+    ))
+    embeddings = get_embeddings()
+    embeddings.embed_query("aquecimento")
+
+    results = {
+        "without_dedup": ingest(pdf, False, embeddings, tempfile.mkdtemp(prefix="dedup-base-")),
+        "with_dedup": ingest(pdf, True, embeddings, tempfile.mkdtemp(prefix="dedup-")),
+    }
+    base, dedup = results["without_dedup"], results["with_dedup"]
+
+    print(f"Backend de embeddings: {embeddings.backend}  Páginas: {args.pages}")
+    print(f"{'':<16}{'texto':>10}{'seções':>8}{'trechos':>9}{'índice (KB)':>13}{'extração':>10}{'embedding':>11}")
+    for mode, item in results.items():
+        print(
+            f"{mode:<16}{item['content_chars']:>10}{item['sections']:>8}{item['chunks']:>9}"
+            f"{item['index_bytes'] / 1024:>13.1f}{item['extraction_s'] * 1000:>8.1f}ms{item['embedding_s'] * 1000:>9.1f}ms"
+        )
+    report = dedup["report"]
+    print(
+        f"Removido: {report.get('boilerplate_lines', 0)} linhas de cabeçalho/rodapé, "
+        f"{report.get('repeated_block_lines', 0)} linhas de blocos repetidos, "
+        f"{report.get('duplicate_chunks', 0)} trechos duplicados"
+    )
+    if base["chunks"]:
+        print(
+            f"Redução: {100 * (1 - dedup['chunks'] / base['chunks']):.1f}% dos trechos, "
+            f"{100 * (1 - dedup['index_bytes'] / base['index_bytes']):.1f}% do índice em disco"
+        )
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, default=str)
+
+
+if __name__ == "__main__":
+    main()
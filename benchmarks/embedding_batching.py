@@ -0,0 +1,142 @@
+"""
+Throughput de embeddings sob concorrência, com e sem o EmbeddingBatcher.
+
+Várias threads pedem embeddings de consultas (chat) e, opcionalmente, lotes
+de trechos (ingestão). Com o modelo real (EMBEDDING_BACKEND=huggingface) o
+ganho vem da multiplicação de matrizes em lote; offline, --simulated-call-ms
+e --simulated-text-ms imitam esse custo (fixo por chamada + por texto).
+Com --background-ingest, os lotes de ingestão rodam como trabalho de fundo
+e a latência das consultas é reportada separadamente.
+
+Uso:
+    python -m benchmarks.embedding_batching --threads 16 --requests 2000
+    python -m benchmarks.embedding_batching --ingest-every 4 --ingest-size 256 --background-ingest
+    EMBEDDING_BACKEND=huggingface python -m benchmarks.embedding_batching --threads 16 --requests 500
+"""
+import os
+
+os.environ.setdefault("EMBEDDING_BACKEND", "hashing")
+
+import argparse
+import json
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from typing import Any, Dict, List
+
+from benchmarks.load.run_load import percentile
+
+
+class SimulatedModel:
+    """Custo fixo por chamada (overhead do modelo) mais um custo por texto"""
+
+    def __init__(self, inner, call_ms: float, text_ms: float):
+        self.inner = inner
+        self.call_ms = call_ms
+        self.text_ms = text_ms
+        # O modelo real usa todos os núcleos: uma chamada por vez
+        self.lock = threading.Lock()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        with self.lock:
+            time.sleep((self.call_ms + self.text_ms * len(texts)) / 1000)
+            return self.inner.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+def run(
+    embeddings,
+    threads: int,
+    requests: int,
+    ingest_every: int,
+    ingest_size: int,
+    background_ingest: bool = False
+) -> Dict[str, Any]:
+    from api.services.concurrency.scheduler import work_class, BACKGROUND
+
+    latencies: List[float] = []
+    query_latencies: List[float] = []
+    lock = threading.Lock()
+
+    def call(i: int) -> None:
+        start = time.perf_counter()
+        ingest = bool(ingest_every) and i % ingest_every == 0
+        if ingest:
+            context = work_class(BACKGROUND, tenant=f"doc{i}") if background_ingest else nullcontext()
+            with context:
+                embeddings.embed_documents([f"trecho {i} {j} do documento de ingestão" for j in range(ingest_size)])
+        else:
+            embeddings.embed_query(f"pergunta {i} sobre o valor do contrato")
+        with lock:
+            latencies.append(time.perf_counter() - start)
+            if not ingest:
+                query_latencies.append(latencies[-1])
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(call, range(requests)))
+    duration = time.perf_counter() - start
+    return {
+        "throughput_rps": requests / duration,
+        "p50_ms": 1000 * percentile(latencies, 50),
+        "p95_ms": 1000 * percentile(latencies, 95),
+        "p99_ms": 1000 * percentile(latencies, 99),
+        "mean_ms": 1000 * statistics.fmean(latencies),
+        "query_p50_ms": 1000 * percentile(query_latencies, 50),
+        "query_p99_ms": 1000 * percentile(query_latencies, 99)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput de embeddings com e sem agrupamento em lotes")
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--max-batch", type=int, default=64)
+    parser.add_argument("--max-wait-ms", type=float, default=2.0)
+    parser.add_argument("--ingest-every", type=int, default=0, help="A cada N pedidos, um lote de ingestão")
+    parser.add_argument("--ingest-size", type=int, default=32)
+    parser.add_argument("--background-ingest", action="store_true", help="Ingestão com prioridade de fundo")
+    parser.add_argument("--simulated-call-ms", type=float, default=5.0, help="Só com EMBEDDING_BACKEND=hashing")
+    parser.add_argument("--simulated-text-ms", type=float, default=0.2)
+    parser.add_argument("--output", help="Arquivo JSON com os resultados")
+    args = parser.parse_args()
+
+    from api.services.embeddings.embedding_provider import LazyEmbeddings, DEFAULT_EMBEDDING_MODEL
+    from api.services.monitoring.metrics import EMBEDDING_BATCH_SIZE
+
+    backend = os.environ["EMBEDDING_BACKEND"]
+    model = os.getenv("EMBEDDING_MODEL", DEFAULT_EMBEDDING_MODEL)
+    results = {}
+    for mode, options in (("sem_lotes", None), ("com_lotes", {"max_batch": args.max_batch, "max_wait": args.max_wait_ms / 1000})):
+        embeddings = LazyEmbeddings(model, backend=backend, batcher_options=options)
+        if backend == "hashing":
+            embeddings._model = SimulatedModel(embeddings.load(), args.simulated_call_ms, args.simulated_text_ms)
+        embeddings.embed_query("aquecimento")
+        batches_before = EMBEDDING_BATCH_SIZE.count()
+        results[mode] = run(
+            embeddings, args.threads, args.requests, args.ingest_every, args.ingest_size, args.background_ingest
+        )
+        batches = EMBEDDING_BATCH_SIZE.count() - batches_before
+        results[mode]["model_calls"] = batches if options else args.requests
+
+    print(f"Backend: {backend}  Threads: {args.threads}  Pedidos: {args.requests}")
+    print(
+        f"{'modo':<12}{'req/s':>10}{'p50 (ms)':>10}{'p95 (ms)':>10}{'p99 (ms)':>10}{'chamadas':>10}"
+        f"{'consulta p50':>14}{'consulta p99':>14}"
+    )
+    for mode, item in results.items():
+        print(
+            f"{mode:<12}{item['throughput_rps']:>10.1f}{item['p50_ms']:>10.2f}{item['p95_ms']:>10.2f}"
+            f"{item['p99_ms']:>10.2f}{item['model_calls']:>10}{item['query_p50_ms']:>14.2f}{item['query_p99_ms']:>14.2f}"
+        )
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
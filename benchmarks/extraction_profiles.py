@@ -0,0 +1,126 @@
+"""
+Perfis de extração (accurate, fast e auto) comparados em PDFs sintéticos.
+
+Mede páginas por segundo de cada perfil, no próprio processo, e quanto o
+perfil rápido concorda com o preciso na detecção de seções:
+
+- **títulos**: fração dos títulos do perfil preciso que o rápido também encontra
+- **atribuição**: fração das linhas que caem na mesma seção nos dois perfis
+
+Além dos corpora em pt, en e mixed, dois layouts em que o fluxo de
+caracteres diverge do layout: duas colunas (o conteúdo desenha uma coluna
+inteira e depois a outra) e linhas desenhadas fora de ordem. Neles a sonda do
+perfil auto deve ficar com o perfil preciso.
+
+Uso:
+    python -m benchmarks.extraction_profiles --pages 40
+    python -m benchmarks.extraction_profiles --corpora pt columns --repeat 3
+"""
+import os
+
+# Configuração offline antes de qualquer import da API
+os.environ.setdefault("EMBEDDING_BACKEND", "hashing")
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+import argparse
+import json
+import random
+import time
+from io import BytesIO
+from typing import Any, Dict, List, Tuple
+
+from benchmarks.synthetic_pdf import MARGIN, CorpusConfig, SyntheticPDFGenerator, build_pdf
+
+CORPORA = ["pt", "en", "mixed", "columns", "shuffled"]
+
+
+def build(corpus: str, pages: int, seed: int) -> bytes:
+    language = corpus if corpus in ("pt", "en", "mixed") else "pt"
+    generator = SyntheticPDFGenerator(CorpusConfig(pages=pages * 2 if corpus == "columns" else pages, language=language, seed=seed))
+    if corpus == "columns":
+        # Duas páginas do gerador viram as duas colunas de uma página
+        layout = []
+        for i in range(pages):
+            left, right = generator.page_lines(2 * i + 1), generator.page_lines(2 * i + 2)
+            layout.append(
+                [(MARGIN, y, text[:45]) for _, y, text in left]
+                + [(MARGIN + 260, y, text[:45]) for _, y, text in right]
+            )
+        return build_pdf(layout)
+    layout = [generator.page_lines(i + 1) for i in range(pages)]
+    if corpus == "shuffled":
+        rng = random.Random(seed)
+        for lines in layout:
+            rng.shuffle(lines)
+    return build_pdf(layout)
+
+
+def _line_sections(sections: Dict[str, str]) -> List[Tuple[str, str]]:
+    return [
+        (" ".join(line.split()), name)
+        for name, text in sections.items()
+        for line in text.splitlines() if line.strip()
+    ]
+
+
+def section_agreement(accurate: Dict[str, str], fast: Dict[str, str]) -> Dict[str, float]:
+    titles = set(accurate) - {"main"}
+    found = len(titles & set(fast)) / len(titles) if titles else 1.0
+    expected = _line_sections(accurate)
+    produced = set(_line_sections(fast))
+    assigned = sum(item in produced for item in expected) / len(expected) if expected else 1.0
+    return {"titles": found, "assignment": assigned}
+
+
+def run(corpus: str, args) -> Dict[str, Any]:
+    from api.services.extractors.page_text import ACCURATE, AUTO, FAST
+    from api.services.extractors.pdf_extractor import PDFExtractor
+
+    extractor = PDFExtractor(page_workers=None)
+    pdf = build(corpus, args.pages, args.seed)
+    result: Dict[str, Any] = {"corpus": corpus}
+    sections = {}
+    for profile in (ACCURATE, FAST):
+        best = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            pages, _ = extractor._extract_pages(BytesIO(pdf), profile)
+            best = min(best, time.perf_counter() - start)
+        result[f"{profile}_pages_per_second"] = len(pages) / best
+        sections[profile] = extractor._build_sections(pages)[1]
+    result.update(section_agreement(sections[ACCURATE], sections[FAST]))
+    start = time.perf_counter()
+    _, metadata = extractor._extract_pages(BytesIO(pdf), AUTO)
+    result["auto_seconds"] = time.perf_counter() - start
+    result["auto_profile"] = metadata["extraction_profile"]
+    result["probe_agreement"] = metadata["profile_probe"]["agreement"]
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Velocidade e concordância de seções dos perfis de extração")
+    parser.add_argument("--pages", type=int, default=40)
+    parser.add_argument("--corpora", nargs="+", choices=CORPORA, default=CORPORA)
+    parser.add_argument("--repeat", type=int, default=2, help="Repetições por perfil (vale a mais rápida)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Arquivo JSON com os resultados")
+    args = parser.parse_args()
+
+    results = [run(corpus, args) for corpus in args.corpora]
+
+    print(f"{'corpus':<10}{'accurate p/s':>14}{'fast p/s':>10}{'ganho':>8}{'títulos':>9}{'atribuição':>12}{'auto':>10}{'sonda':>7}")
+    for item in results:
+        speedup = item["fast_pages_per_second"] / item["accurate_pages_per_second"]
+        probe = "-" if item["probe_agreement"] is None else f"{item['probe_agreement']:.2f}"
+        print(
+            f"{item['corpus']:<10}{item['accurate_pages_per_second']:>14.1f}{item['fast_pages_per_second']:>10.1f}"
+            f"{speedup:>7.1f}x{100 * item['titles']:>8.1f}%{100 * item['assignment']:>11.1f}%"
+            f"{item['auto_profile']:>10}{probe:>7}"
+        )
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
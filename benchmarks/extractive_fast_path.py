@@ -0,0 +1,140 @@
+"""
+Distribuição de latência do DocumentAgent com e sem o atalho extrativo.
+
+Perguntas factuais (datas e valores) são geradas a partir das frases de um
+PDF sintético; o LLM é um fake com latência configurável. Reporta p50/p95/p99,
+a fração respondida sem o LLM e quantas respostas contêm o valor esperado.
+
+Uso:
+    python -m benchmarks.extractive_fast_path --pages 20 --questions 100 --llm-latency-ms 800
+"""
+import os
+
+# Configuração offline antes de qualquer import da API
+os.environ.setdefault("EMBEDDING_BACKEND", "hashing")
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+os.environ.setdefault("DOCUMENT_STORE_DIR", __import__("tempfile").mkdtemp(prefix="bench-extractive-"))
+
+import argparse
+import asyncio
+import json
+import random
+import re
+import statistics
+import time
+from io import BytesIO
+from typing import Any, Dict, List, Tuple
+
+from benchmarks.fakes import FakeLLMService
+from benchmarks.load.run_load import percentile
+from benchmarks.synthetic_pdf import CorpusConfig, generate_pdf
+
+FACT = re.compile(r"\d{2}/\d{2}/\d{4}|R\$ \d+,\d{2}")
+
+GENERIC_QUESTIONS = [
+    "Quais são as obrigações do locatário?",
+    "Como funciona a renovação do contrato?",
+    "Explique a política de auditoria e conformidade.",
+    "What does the termination clause say about notice?"
+]
+
+
+def make_questions(content: str, count: int, seed: int) -> List[Tuple[str, str]]:
+    """(pergunta, fato esperado) a partir de frases com data ou valor"""
+    rng = random.Random(seed)
+    sentences = [s for s in re.split(r"(?<=[.!?])\s+", " ".join(content.split())) if FACT.search(s)]
+    questions = []
+    for _ in range(count):
+        if rng.random() < 0.25 or not sentences:
+            questions.append((rng.choice(GENERIC_QUESTIONS), ""))
+            continue
+        sentence = rng.choice(sentences)
+        fact = FACT.search(sentence).group(0)
+        words = [w for w in sentence.rstrip(".").split() if not FACT.search(w) and w != "R$"]
+        start = rng.randint(0, max(0, len(words) - 6))
+        topic = " ".join(words[start:start + 6])
+        prefix = "Qual o valor de" if fact.startswith("R$") else "Quando ocorre"
+        questions.append((f"{prefix} {topic}?", fact))
+    return questions
+
+
+def run_mode(agent, state: Dict[str, Any], questions: List[Tuple[str, str]], extractive: bool) -> Dict[str, Any]:
+    agent.extractive_enabled = extractive
+    latencies, paths, correct, factual = [], {}, 0, 0
+    for question, fact in questions:
+        state["current_question"] = question
+        start = time.perf_counter()
+        result = asyncio.run(agent.execute(dict(state)))
+        latencies.append(time.perf_counter() - start)
+        path = result.get("answer_path", "")
+        paths[path] = paths.get(path, 0) + 1
+        if fact:
+            factual += 1
+            correct += fact in (result.get("answer") or "")
+    return {
+        "p50_ms": 1000 * percentile(latencies, 50),
+        "p95_ms": 1000 * percentile(latencies, 95),
+        "p99_ms": 1000 * percentile(latencies, 99),
+        "mean_ms": 1000 * statistics.fmean(latencies),
+        "paths": paths,
+        "fact_in_answer": correct / factual if factual else 0.0
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latência com e sem o atalho extrativo")
+    parser.add_argument("--pages", type=int, default=10)
+    parser.add_argument("--questions", type=int, default=60)
+    parser.add_argument("--llm-latency-ms", type=float, default=800.0)
+    parser.add_argument("--threshold", type=float, help="Limiar de confiança (padrão EXTRACTIVE_THRESHOLD)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Arquivo JSON com os resultados")
+    args = parser.parse_args()
+
+    from api.services.agents.document_agent import DocumentAgent
+    from api.services.memory.message_history import MessageHistory
+    from api.services.extractors.pdf_extractor import PDFExtractor
+    from api.services.storage.document_indexer import DocumentIndexer
+
+    doc_info = asyncio.run(PDFExtractor().process_pdf(BytesIO(generate_pdf(CorpusConfig(pages=args.pages, seed=args.seed)))))
+    doc_info["document_id"] = "extractive-bench"
+    doc_info["metadata"]["filename"] = "sintetico.pdf"
+
+    agent = DocumentAgent()
+    agent.llm = FakeLLMService(latency=args.llm_latency_ms / 1000)
+    if args.threshold is not None:
+        agent.extractive.threshold = args.threshold
+    DocumentIndexer(agent.embeddings, agent.store).index(doc_info["document_id"], doc_info)
+
+    state = {
+        "document": doc_info,
+        "document_ids": [doc_info["document_id"]],
+        "sources": [],
+        "conversation_history": MessageHistory(),
+        "current_question": "",
+        "web_results": [],
+        "selected_strategy": "",
+        "answer_path": "",
+        "answer": None,
+        "error": None
+    }
+    questions = make_questions(doc_info["content"], args.questions, args.seed)
+
+    results = {
+        "without_extractive": run_mode(agent, state, questions, extractive=False),
+        "with_extractive": run_mode(agent, state, questions, extractive=True),
+    }
+    print(f"Limiar: {agent.extractive.threshold}  Latência do LLM fake: {args.llm_latency_ms:.0f} ms")
+    print(f"{'modo':<22}{'p50 (ms)':>10}{'p95 (ms)':>10}{'p99 (ms)':>10}{'média':>10}{'fato':>7}  caminhos")
+    for mode, item in results.items():
+        print(
+            f"{mode:<22}{item['p50_ms']:>10.1f}{item['p95_ms']:>10.1f}{item['p99_ms']:>10.1f}"
+            f"{item['mean_ms']:>10.1f}{100 * item['fact_in_answer']:>6.0f}%  {item['paths']}"
+        )
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"threshold": agent.extractive.threshold, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
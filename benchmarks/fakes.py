@@ -0,0 +1,69 @@
+"""
+Substitutos locais e determinísticos do LLM e da busca web para benchmarks
+"""
+import asyncio
+import re
+import time
+from collections import Counter
+from typing import Dict, List
+
+
+class FakeLLMService:
+    """
+    Responde com a frase do contexto que mais compartilha palavras com a
+    pergunta (ou a primeira, sem pergunta), com latência configurável
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls = 0
+
+    def generate_response(self, prompt: str) -> str:
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return self._answer(prompt)
+
+    async def agenerate_response(self, prompt: str) -> str:
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self._answer(prompt)
+
+    def _answer(self, prompt: str) -> str:
+        match = re.search(r"(?:Contexto|Informações|Seção):\s*(.+?)(?:\n\s*Pergunta:|$)", prompt, re.S)
+        if not match:
+            return "NAO_ENCONTRADO"
+        sentences = re.split(r"(?<=[.!?])\s+", " ".join(match.group(1).split()))
+        question = re.search(r"Pergunta:\s*(.+)", prompt)
+        if question:
+            words = set(re.findall(r"\w{4,}", question.group(1).lower()))
+            sentences.sort(key=lambda s: len(words & set(re.findall(r"\w{4,}", s.lower()))), reverse=True)
+        return sentences[0][:300]
+
+    def generate_section_summary(self, section_text: str) -> str:
+        return self.generate_response(f"Seção:\n{section_text}")
+
+    async def agenerate_section_summary(self, section_text: str) -> str:
+        # Resumo "extrativo": as palavras mais frequentes da seção, como os termos
+        # centrais que um resumo de verdade repetiria
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        counts = Counter(re.findall(r"[^\W\d_]{4,}", section_text.lower()))
+        return " ".join(word for word, _ in counts.most_common(24)) + "."
+
+
+class FakeWebSearchService:
+    """Retorna resultados fixos construídos a partir da consulta"""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+
+    def search(self, query: str) -> List[Dict[str, str]]:
+        if self.latency:
+            time.sleep(self.latency)
+        return [
+            {"text": f"{query} - resultado de referência sobre o tema.", "url": "https://example.com/1"},
+            {"text": f"Mais informações sobre {query}.", "url": "https://example.com/2"}
+        ]
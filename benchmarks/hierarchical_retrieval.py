@@ -0,0 +1,127 @@
+"""
+Busca em dois estágios (resumos de seção, depois trechos) contra a busca
+plana em todos os trechos de um documento longo.
+
+Um PDF sintético com vocabulário próprio por seção é indexado; os resumos
+vêm do LLM fake (primeira frase da seção). Cada pergunta é um trecho de 8
+palavras de um chunk sorteado; acerta se algum dos k trechos recuperados o
+contém. Reporta acerto@k, vetores comparados por busca e latência.
+
+Uso:
+    python -m benchmarks.hierarchical_retrieval --pages 150 --queries 300
+    python -m benchmarks.hierarchical_retrieval --pages 150 --section-top-k 1 3 5
+"""
+import os
+
+# Configuração offline antes de qualquer import da API
+os.environ.setdefault("EMBEDDING_BACKEND", "hashing")
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+import argparse
+import asyncio
+import json
+import random
+import tempfile
+import time
+from io import BytesIO
+from typing import Any, Dict, List
+
+from benchmarks.fakes import FakeLLMService
+from benchmarks.load.run_load import percentile
+from benchmarks.synthetic_pdf import CorpusConfig, generate_pdf
+
+
+def make_queries(stored, count: int, seed: int) -> List[str]:
+    rng = random.Random(seed)
+    queries = []
+    while len(queries) < count:
+        words = stored.chunk(rng.randrange(len(stored))).split()
+        if len(words) < 8:
+            continue
+        start = rng.randint(0, len(words) - 8)
+        queries.append(" ".join(words[start:start + 8]))
+    return queries
+
+
+def run(retriever, document_id: str, queries: List[str], k: int) -> Dict[str, Any]:
+    from api.services.monitoring.metrics import RETRIEVAL_COMPARISONS
+
+    latencies, hits = [], 0
+    before = {
+        mode: (RETRIEVAL_COMPARISONS.count(mode=mode), RETRIEVAL_COMPARISONS.sum(mode=mode))
+        for mode in ("flat", "hierarchical")
+    }
+    for question in queries:
+        query = retriever.embed_query(question)
+        start = time.perf_counter()
+        passages = retriever.retrieve(question, [document_id], k=k, query=query)
+        latencies.append(time.perf_counter() - start)
+        hits += any(question in " ".join(p["text"].split()) for p in passages)
+    searches = compared = 0
+    for mode, (count, total) in before.items():
+        searches += RETRIEVAL_COMPARISONS.count(mode=mode) - count
+        compared += RETRIEVAL_COMPARISONS.sum(mode=mode) - total
+    return {
+        "hit_at_k": hits / len(queries),
+        "comparisons_per_search": compared / searches if searches else 0.0,
+        "p50_ms": 1000 * percentile(latencies, 50),
+        "p99_ms": 1000 * percentile(latencies, 99)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Busca plana vs. busca em dois estágios por resumos de seção")
+    parser.add_argument("--pages", type=int, default=150)
+    parser.add_argument("--sections-per-page", type=float, default=1.5)
+    parser.add_argument("--topical", type=float, default=0.5, help="Fração de palavras do vocabulário da seção")
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--k", type=int, default=8)
+    parser.add_argument("--section-top-k", type=int, nargs="+", default=[3, 5, 10])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Arquivo JSON com os resultados")
+    args = parser.parse_args()
+
+    from api.services.embeddings.embedding_provider import get_embeddings
+    from api.services.extractors.pdf_extractor import PDFExtractor
+    from api.services.retrieval.sharded_retriever import ShardedRetriever
+    from api.services.storage.document_indexer import DocumentIndexer
+    from api.services.storage.document_store import DocumentStore
+    from api.services.storage.section_summarizer import SectionSummarizer
+
+    pdf = generate_pdf(CorpusConfig(
+        pages=args.pages,
+        sections_per_page=args.sections_per_page,
+        topical=args.topical,
+        seed=args.seed
+    ))
+    doc_info = asyncio.run(PDFExtractor().process_pdf(BytesIO(pdf)))
+    embeddings = get_embeddings()
+    store = DocumentStore(tempfile.mkdtemp(prefix="bench-hierarchical-"))
+    document_id = "hierarchical"
+    doc_info["document_id"] = document_id
+    DocumentIndexer(embeddings, store).index(document_id, doc_info)
+
+    start = time.perf_counter()
+    asyncio.run(SectionSummarizer(FakeLLMService(), embeddings, store).summarize(document_id))
+    summarize_s = time.perf_counter() - start
+    stored = store.load(document_id)
+    queries = make_queries(stored, args.queries, args.seed)
+
+    results = {"flat": run(ShardedRetriever(embeddings, store, section_top_k=0), document_id, queries, args.k)}
+    for top in args.section_top_k:
+        results[f"sections_top{top}"] = run(ShardedRetriever(embeddings, store, section_top_k=top), document_id, queries, args.k)
+
+    print(f"Seções: {len(stored.section_names)}  Trechos: {len(stored)}  Resumos em {summarize_s:.2f}s  k={args.k}")
+    print(f"{'modo':<18}{'acerto@k':>10}{'comparações':>13}{'p50 (ms)':>10}{'p99 (ms)':>10}")
+    for mode, item in results.items():
+        print(
+            f"{mode:<18}{100 * item['hit_at_k']:>9.1f}%{item['comparisons_per_search']:>13.0f}"
+            f"{item['p50_ms']:>10.3f}{item['p99_ms']:>10.3f}"
+        )
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"sections": len(stored.section_names), "chunks": len(stored), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
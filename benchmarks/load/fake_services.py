@@ -0,0 +1,183 @@
+"""
+Servidores HTTP locais que imitam a API da OpenAI (chat completions) e a
+API do DuckDuckGo, com latência e taxa de erro configuráveis.
+
+Uso isolado:
+    python -m benchmarks.load.fake_services --openai-port 9101 --ddg-port 9102 --latency-ms 300
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Tuple
+from urllib.parse import parse_qs, urlparse
+
+
+@dataclass
+class FakeServiceConfig:
+    latency_ms: float = 200.0
+    jitter_ms: float = 50.0
+    error_rate: float = 0.0
+    seed: int = 0
+
+
+class _Behavior:
+    """Sorteia latência e erros de forma reprodutível e thread-safe"""
+
+    def __init__(self, config: FakeServiceConfig):
+        self.config = config
+        self.random = random.Random(config.seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+
+    def next(self) -> Tuple[float, bool]:
+        with self.lock:
+            self.requests += 1
+            delay = max(0.0, self.random.gauss(self.config.latency_ms, self.config.jitter_ms)) / 1000
+            failed = self.random.random() < self.config.error_rate
+            if failed:
+                self.errors += 1
+            return delay, failed
+
+
+def fake_answer(prompt: str) -> str:
+    """Resposta plausível: primeira frase do contexto que compartilha palavras com a pergunta"""
+    question = re.search(r"Pergunta:\s*(.+)", prompt)
+    context = re.search(r"(?:Contexto|Informações):\s*(.+?)\n\s*\n", prompt, re.S)
+    if not question or not context:
+        return "NAO_ENCONTRADO"
+
+    words = {w for w in re.findall(r"\w{4,}", question.group(1).lower())}
+    for sentence in re.split(r"(?<=[.!?])\s+", context.group(1)):
+        if words & set(re.findall(r"\w{4,}", sentence.lower())):
+            return " ".join(sentence.split())[:300]
+    return "NAO_ENCONTRADO"
+
+
+def _handler(behavior: _Behavior, kind: str):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, status: int, payload: dict) -> None:
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _delay_or_fail(self) -> bool:
+            delay, failed = behavior.next()
+            time.sleep(delay)
+            if failed:
+                self._send(500, {"error": {"message": "falha simulada", "type": "server_error"}})
+            return failed
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length) or b"{}")
+            if kind != "openai" or not self.path.endswith("/chat/completions"):
+                self._send(404, {"error": {"message": "not found"}})
+                return
+            if self._delay_or_fail():
+                return
+
+            prompt = "\n".join(m.get("content", "") for m in request.get("messages", []))
+            content = fake_answer(prompt)
+            prompt_tokens = len(prompt.split())
+            completion_tokens = len(content.split())
+            self._send(200, {
+                "id": f"chatcmpl-{uuid.uuid4().hex}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": request.get("model", "gpt-3.5-turbo"),
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop"
+                }],
+                "usage": {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens,
+                    "total_tokens": prompt_tokens + completion_tokens
+                }
+            })
+
+        def do_GET(self):
+            if kind != "duckduckgo":
+                self._send(404, {"error": {"message": "not found"}})
+                return
+            if self._delay_or_fail():
+                return
+
+            query = parse_qs(urlparse(self.path).query).get("q", [""])[0]
+            slug = re.sub(r"\W+", "_", query.lower()).strip("_")[:40] or "consulta"
+            self._send(200, {
+                "AbstractText": f"{query} é um tema com definição de referência e exemplos de uso.",
+                "AbstractURL": f"https://example.com/{slug}",
+                "RelatedTopics": [
+                    {"Text": f"Mais detalhes sobre {query}.", "FirstURL": f"https://example.com/{slug}/1"},
+                    {"Text": f"Artigos relacionados a {query}.", "FirstURL": f"https://example.com/{slug}/2"}
+                ]
+            })
+
+    return Handler
+
+
+class FakeService:
+    """Servidor fake rodando em uma thread"""
+
+    def __init__(self, kind: str, port: int, config: FakeServiceConfig, host: str = "127.0.0.1"):
+        self.kind = kind
+        self.behavior = _Behavior(config)
+        self.server = ThreadingHTTPServer((host, port), _handler(self.behavior, kind))
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeService":
+        self.thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidores fake da OpenAI e do DuckDuckGo")
+    parser.add_argument("--openai-port", type=int, default=9101)
+    parser.add_argument("--ddg-port", type=int, default=9102)
+    parser.add_argument("--latency-ms", type=float, default=200.0)
+    parser.add_argument("--jitter-ms", type=float, default=50.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    config = FakeServiceConfig(args.latency_ms, args.jitter_ms, args.error_rate)
+    openai = FakeService("openai", args.openai_port, config).start()
+    ddg = FakeService("duckduckgo", args.ddg_port, config).start()
+    print(f"OPENAI_BASE_URL={openai.url}/v1")
+    print(f"DUCKDUCKGO_API_URL={ddg.url}/")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        openai.stop()
+        ddg.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,322 @@
+"""
+Teste de carga ponta a ponta de /process-pdf e /chat, totalmente offline.
+
+Sobe servidores fake da OpenAI e do DuckDuckGo (latência e erros configuráveis),
+inicia a API apontando para eles (embeddings por hashing) e reproduz uma carga
+mista de uploads e perguntas nos caminhos documento, web e combinado do
+AgentOrchestrator, com concorrência alvo. Reporta throughput, latências
+p50/p95/p99 e taxa de erro por tipo de operação.
+
+Uso:
+    python -m benchmarks.load.run_load --concurrency 16 --requests 400 --latency-ms 300
+    python -m benchmarks.load.run_load --api-url http://localhost:8000 --requests 100
+    python -m benchmarks.load.run_load --workers 4 --concurrency 32
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import requests
+
+from benchmarks.load.fake_services import FakeService, FakeServiceConfig
+from benchmarks.synthetic_pdf import CorpusConfig, SyntheticPDFGenerator, build_pdf
+
+# Temas sem relação com os documentos sintéticos, para forçar o caminho web
+WEB_TOPICS = [
+    "fotossíntese", "Machado de Assis", "teoria da relatividade", "vulcões ativos",
+    "história do futebol", "linguagem Python", "sistema solar", "bossa nova"
+]
+
+# Estratégia que cada tipo de pergunta deve exercitar no AgentOrchestrator
+EXPECTED_STRATEGIES = {
+    "chat_document": "document",
+    "chat_web": "web",
+    "chat_combined": "combined"
+}
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def percentile(values: List[float], p: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    index = min(len(values) - 1, max(0, int(round(p / 100 * len(values) + 0.5)) - 1))
+    return values[index]
+
+
+class SyntheticDocument:
+    """PDF sintético e perguntas extraídas do próprio texto"""
+
+    def __init__(self, seed: int, pages: int, language: str):
+        generator = SyntheticPDFGenerator(CorpusConfig(pages=pages, language=language, seed=seed))
+        pages_lines = [generator.page_lines(i + 1) for i in range(pages)]
+        self.pdf = build_pdf(pages_lines)
+        self.name = f"carga_{seed:05d}.pdf"
+        self.sentences = [
+            text for lines in pages_lines for _, _, text in lines
+            if len(text) > 60 and not text.isupper()
+        ]
+
+
+class LoadRunner:
+    def __init__(self, api_url: str, args):
+        self.api_url = api_url.rstrip("/")
+        self.args = args
+        self.random = random.Random(args.seed)
+        self.random_lock = threading.Lock()
+        self.local = threading.local()
+        self.results: List[Dict[str, Any]] = []
+        self.results_lock = threading.Lock()
+        self.conversations: List[tuple] = []
+        self.next_seed = args.seed + 1000
+
+    def _session(self) -> requests.Session:
+        if not hasattr(self.local, "session"):
+            self.local.session = requests.Session()
+        return self.local.session
+
+    def _record(self, kind: str, start: float, ok: bool, status: int, strategy: Optional[str] = None, error: str = ""):
+        with self.results_lock:
+            self.results.append({
+                "kind": kind,
+                "latency": time.perf_counter() - start,
+                "ok": ok,
+                "status": status,
+                "strategy": strategy,
+                "error": error[:200]
+            })
+
+    def upload(self, document: SyntheticDocument, kind: str = "upload") -> Optional[str]:
+        start = time.perf_counter()
+        try:
+            response = self._session().post(
+                f"{self.api_url}/process-pdf",
+                files={"file": (document.name, document.pdf, "application/pdf")},
+                timeout=65
+            )
+            self._record(kind, start, response.ok, response.status_code, error="" if response.ok else response.text)
+            if response.ok:
+                conversation_id = response.json()["conversation_id"]
+                with self.results_lock:
+                    self.conversations.append((conversation_id, document))
+                return conversation_id
+        except requests.RequestException as e:
+            self._record(kind, start, False, 0, error=str(e))
+        return None
+
+    def chat(self, kind: str) -> None:
+        with self.random_lock:
+            conversation_id, document = self.random.choice(self.conversations)
+            sentence = self.random.choice(document.sentences)
+            topic = self.random.choice(WEB_TOPICS)
+
+        if kind == "chat_document":
+            question = sentence
+        elif kind == "chat_web":
+            question = f"busque na web o que é {topic}"
+        else:
+            question = f"busque na web {sentence}"
+
+        start = time.perf_counter()
+        try:
+            response = self._session().post(
+                f"{self.api_url}/chat/{conversation_id}",
+                params={"question": question},
+                timeout=30
+            )
+            strategy = response.json().get("source") if response.ok else None
+            self._record(kind, start, response.ok, response.status_code, strategy, "" if response.ok else response.text)
+        except requests.RequestException as e:
+            self._record(kind, start, False, 0, error=str(e))
+
+    def _operation(self, _: int) -> None:
+        with self.random_lock:
+            roll = self.random.random()
+            seed = self.next_seed
+            self.next_seed += 1
+
+        if roll < self.args.upload_ratio:
+            self.upload(SyntheticDocument(seed, self.args.pages, self.args.language))
+            return
+        roll = (roll - self.args.upload_ratio) / (1 - self.args.upload_ratio)
+        if roll < self.args.web_ratio:
+            self.chat("chat_web")
+        elif roll < self.args.web_ratio + self.args.combined_ratio:
+            self.chat("chat_combined")
+        else:
+            self.chat("chat_document")
+
+    def run(self) -> Dict[str, Any]:
+        # Documentos iniciais para as conversas
+        for i in range(self.args.documents):
+            self.upload(SyntheticDocument(self.args.seed + i, self.args.pages, self.args.language), "setup_upload")
+        if not self.conversations:
+            raise RuntimeError("Nenhum documento inicial foi processado")
+
+        with self.results_lock:
+            self.results = [r for r in self.results if r["kind"] != "setup_upload"]
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.args.concurrency) as executor:
+            list(executor.map(self._operation, range(self.args.requests)))
+        duration = time.perf_counter() - start
+        return self.report(duration)
+
+    def report(self, duration: float) -> Dict[str, Any]:
+        by_kind: Dict[str, Any] = {}
+        for kind in sorted({r["kind"] for r in self.results}):
+            items = [r for r in self.results if r["kind"] == kind]
+            latencies = [r["latency"] for r in items if r["ok"]]
+            errors = [r for r in items if not r["ok"]]
+            strategies: Dict[str, int] = {}
+            for r in items:
+                if r["strategy"]:
+                    strategies[r["strategy"]] = strategies.get(r["strategy"], 0) + 1
+            by_kind[kind] = {
+                "count": len(items),
+                "throughput_rps": len(items) / duration if duration else 0.0,
+                "error_rate": len(errors) / len(items),
+                "p50_s": percentile(latencies, 50),
+                "p95_s": percentile(latencies, 95),
+                "p99_s": percentile(latencies, 99),
+                "strategies": strategies,
+                "expected_strategy": EXPECTED_STRATEGIES.get(kind),
+                "unexpected_strategies": sum(
+                    count for strategy, count in strategies.items()
+                    if kind in EXPECTED_STRATEGIES and strategy != EXPECTED_STRATEGIES[kind]
+                ),
+                "sample_errors": sorted({e["error"] for e in errors})[:3]
+            }
+        total_errors = sum(1 for r in self.results if not r["ok"])
+        return {
+            "duration_s": duration,
+            "requests": len(self.results),
+            "throughput_rps": len(self.results) / duration if duration else 0.0,
+            "error_rate": total_errors / len(self.results) if self.results else 0.0,
+            "concurrency": self.args.concurrency,
+            "by_kind": by_kind
+        }
+
+
+def start_api(port: int, env: Dict[str, str], workers: int = 1) -> subprocess.Popen:
+    if workers > 1:
+        # Servidor pré-fork: modelo carregado uma vez e compartilhado pelos workers
+        command = [sys.executable, "-m", "api.server", "--workers", str(workers)]
+    else:
+        command = [sys.executable, "-m", "uvicorn", "api.main:app"]
+    return subprocess.Popen(
+        command + ["--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=REPO_ROOT,
+        env={**os.environ, **env}
+    )
+
+
+def fake_api_env(openai: FakeService, ddg: FakeService) -> Dict[str, str]:
+    """Ambiente da API apontando para os serviços fake, sem baixar o modelo"""
+    return {
+        "OPENAI_API_KEY": "fake",
+        "OPENAI_BASE_URL": f"{openai.url}/v1",
+        "DUCKDUCKGO_API_URL": f"{ddg.url}/",
+        "EMBEDDING_BACKEND": "hashing",
+        "DOCUMENT_STORE_DIR": tempfile.mkdtemp(prefix="load-store-")
+    }
+
+
+def wait_ready(api_url: str, timeout: float = 120.0) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if requests.get(f"{api_url}/ready", timeout=2).ok:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError("A API não ficou pronta a tempo")
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    print(f"\nDuração: {report['duration_s']:.1f}s  Requisições: {report['requests']}  "
+          f"Throughput: {report['throughput_rps']:.2f} req/s  Erros: {100 * report['error_rate']:.1f}%")
+    print(f"{'operação':<16}{'n':>6}{'req/s':>8}{'erros':>8}{'p50 (s)':>9}{'p95 (s)':>9}{'p99 (s)':>9}  estratégias")
+    for kind, item in report["by_kind"].items():
+        print(
+            f"{kind:<16}{item['count']:>6}{item['throughput_rps']:>8.2f}{100 * item['error_rate']:>7.1f}%"
+            f"{item['p50_s']:>9.3f}{item['p95_s']:>9.3f}{item['p99_s']:>9.3f}  {item['strategies']}"
+        )
+
+
+def add_load_arguments(parser: argparse.ArgumentParser) -> None:
+    """Opções da carga, compartilhadas com outros benchmarks que usam o LoadRunner"""
+    parser.add_argument("--api-port", type=int, default=8765)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--documents", type=int, default=4, help="Documentos carregados antes da carga")
+    parser.add_argument("--pages", type=int, default=5)
+    parser.add_argument("--language", choices=["pt", "en", "mixed"], default="pt")
+    parser.add_argument("--upload-ratio", type=float, default=0.05)
+    parser.add_argument("--web-ratio", type=float, default=0.2)
+    parser.add_argument("--combined-ratio", type=float, default=0.2)
+    parser.add_argument("--latency-ms", type=float, default=300.0, help="Latência média dos serviços fake")
+    parser.add_argument("--jitter-ms", type=float, default=100.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Taxa de erro dos serviços fake")
+    parser.add_argument("--seed", type=int, default=0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga offline de /process-pdf e /chat")
+    parser.add_argument("--api-url", help="Usa uma API já em execução em vez de iniciar uma local")
+    add_load_arguments(parser)
+    parser.add_argument("--workers", type=int, default=1, help="Workers da API local (api.server)")
+    parser.add_argument("--output", help="Arquivo JSON com o relatório")
+    args = parser.parse_args()
+
+    services: List[FakeService] = []
+    api_process = None
+    api_url = args.api_url
+    try:
+        if api_url is None:
+            config = FakeServiceConfig(args.latency_ms, args.jitter_ms, args.error_rate, args.seed)
+            openai = FakeService("openai", 0, config).start()
+            ddg = FakeService("duckduckgo", 0, config).start()
+            services = [openai, ddg]
+            api_process = start_api(args.api_port, fake_api_env(openai, ddg), args.workers)
+            api_url = f"http://127.0.0.1:{args.api_port}"
+
+        wait_ready(api_url)
+        report = LoadRunner(api_url, args).run()
+        report["fake_services"] = {
+            s.kind: {"requests": s.behavior.requests, "errors": s.behavior.errors}
+            for s in services
+        }
+        print_report(report)
+        for kind, stats in report["fake_services"].items():
+            print(f"Serviço fake {kind}: {stats['requests']} requisições, {stats['errors']} erros simulados")
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+        # Com os serviços fake e sem erros simulados, cada tipo deve cair na estratégia do seu nome
+        unexpected = {
+            kind: item["strategies"] for kind, item in report["by_kind"].items()
+            if item["unexpected_strategies"]
+        }
+        if args.api_url is None and args.error_rate == 0 and unexpected:
+            raise SystemExit(f"Estratégias diferentes das esperadas {EXPECTED_STRATEGIES}: {unexpected}")
+    finally:
+        if api_process is not None:
+            api_process.terminate()
+            api_process.wait(timeout=10)
+        for service in services:
+            service.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Memória por conversa e orçamento global de memória.
+
+Sobe a API contra os serviços fake (como o teste de carga), processa vários
+PDFs sintéticos, abre conversas sobre eles e faz perguntas. Reporta o RSS do
+servidor, o que /admin/memory contabiliza (documentos mapeados, memória
+privada e conversas), os documentos descartados pelo orçamento e a latência
+do /chat, que passa a incluir reaberturas do disco quando o orçamento aperta.
+
+Uso:
+    python -m benchmarks.memory_budget --documents 8 --conversations 200
+    python -m benchmarks.memory_budget --budget-mb 2 --index-type float32
+"""
+import argparse
+import json
+import os
+import random
+import time
+from typing import Any, Dict, List
+
+import requests
+
+from benchmarks.load.fake_services import FakeService, FakeServiceConfig
+from benchmarks.load.run_load import SyntheticDocument, fake_api_env, percentile, start_api, wait_ready
+
+
+def rss_bytes(pid: int) -> int:
+    with open(f"/proc/{pid}/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memória por conversa e orçamento global de memória")
+    parser.add_argument("--api-port", type=int, default=8767)
+    parser.add_argument("--documents", type=int, default=8)
+    parser.add_argument("--pages", type=int, default=30)
+    parser.add_argument("--conversations", type=int, default=200)
+    parser.add_argument("--questions", type=int, default=100)
+    parser.add_argument("--budget-mb", type=float, default=0.0, help="MEMORY_BUDGET_MB da API (0 = sem limite)")
+    parser.add_argument("--index-type", default="mmap", help="VECTOR_INDEX_TYPE da API")
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Arquivo JSON com os resultados")
+    args = parser.parse_args()
+
+    config = FakeServiceConfig(args.latency_ms, 0.0, 0.0, args.seed)
+    openai = FakeService("openai", 0, config).start()
+    ddg = FakeService("duckduckgo", 0, config).start()
+    env = fake_api_env(openai, ddg)
+    env.update(MEMORY_BUDGET_MB=str(args.budget_mb), VECTOR_INDEX_TYPE=args.index_type)
+    process = start_api(args.api_port, env)
+    api_url = f"http://127.0.0.1:{args.api_port}"
+    rng = random.Random(args.seed)
+    result: Dict[str, Any] = {"args": vars(args)}
+    try:
+        wait_ready(api_url)
+        session = requests.Session()
+        documents: List[Dict[str, Any]] = []
+        for i in range(args.documents):
+            document = SyntheticDocument(args.seed + i, args.pages, "pt")
+            response = session.post(
+                f"{api_url}/process-pdf",
+                files={"file": (document.name, document.pdf, "application/pdf")},
+                timeout=120
+            )
+            response.raise_for_status()
+            documents.append({"id": response.json()["document_id"], "sentences": document.sentences})
+        result["rss_after_ingest"] = rss_bytes(process.pid)
+
+        conversations = []
+        for _ in range(args.conversations):
+            document = rng.choice(documents)
+            response = session.post(f"{api_url}/conversations", json={"document_ids": [document["id"]]}, timeout=30)
+            response.raise_for_status()
+            conversations.append((response.json()["conversation_id"], document))
+        result["rss_after_conversations"] = rss_bytes(process.pid)
+
+        latencies = []
+        for _ in range(args.questions):
+            conversation_id, document = rng.choice(conversations)
+            start = time.perf_counter()
+            response = session.post(
+                f"{api_url}/chat/{conversation_id}",
+                params={"question": rng.choice(document["sentences"])},
+                timeout=60
+            )
+            if response.ok:
+                latencies.append(time.perf_counter() - start)
+        result["rss_after_chat"] = rss_bytes(process.pid)
+        result["chat_p50"] = percentile(latencies, 50)
+        result["chat_p95"] = percentile(latencies, 95)
+
+        report = session.get(f"{api_url}/admin/memory", timeout=30)
+        result["admin_memory"] = report.json() if report.ok else None
+        metrics = session.get(f"{api_url}/metrics", timeout=30).text
+        result["evictions"] = sum(
+            float(line.rsplit(" ", 1)[1]) for line in metrics.splitlines()
+            if line.startswith("pdfchat_document_evictions_total{")
+        )
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+        openai.stop()
+        ddg.stop()
+
+    mb = 1024 * 1024
+    print(f"{args.documents} documentos de {args.pages} páginas, {args.conversations} conversas, {args.questions} perguntas")
+    print(f"RSS: ingestão {result['rss_after_ingest'] / mb:.1f} MB, "
+          f"conversas {result['rss_after_conversations'] / mb:.1f} MB, chat {result['rss_after_chat'] / mb:.1f} MB")
+    per_conversation = (result["rss_after_conversations"] - result["rss_after_ingest"]) / max(1, args.conversations)
+    print(f"RSS por conversa: {per_conversation / 1024:.1f} KB")
+    admin = result["admin_memory"]
+    if admin:
+        totals = admin["totals"]
+        print(f"Contabilizado: mapeado {totals['document_mapped'] / mb:.2f} MB, privado {totals['document_heap'] / mb:.2f} MB, "
+              f"conversas {totals['conversations'] / mb:.2f} MB; documentos abertos: {len(admin['documents'])}")
+    print(f"Descartes pelo orçamento: {result['evictions']:.0f}")
+    print(f"/chat: p50={result['chat_p50'] * 1000:.0f} ms p95={result['chat_p95'] * 1000:.0f} ms")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
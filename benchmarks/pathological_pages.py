@@ -0,0 +1,122 @@
+"""
+Extração de um PDF com páginas patológicas (milhares de glifos minúsculos e
+desenhos vetoriais enormes), no próprio processo e nos workers isolados com
+orçamento por página.
+
+As páginas normais vêm do gerador sintético; algumas recebem, além do texto,
+glifos de 2 pt espalhados e curvas de Bézier. Reporta o tempo total, as
+páginas degradadas e quanto do texto das páginas normais foi preservado.
+
+Uso:
+    python -m benchmarks.pathological_pages --pages 30 --dense 3 --glyphs 60000 --curves 60000
+    python -m benchmarks.pathological_pages --page-timeout 2 --document-budget 20
+"""
+import os
+
+# Configuração offline antes de qualquer import da API
+os.environ.setdefault("EMBEDDING_BACKEND", "hashing")
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+import argparse
+import json
+import random
+import time
+from io import BytesIO
+from typing import Any, Dict
+
+from benchmarks.synthetic_pdf import CorpusConfig, SyntheticPDFGenerator, build_pdf
+
+
+def dense_content(glyphs: int, curves: int, seed: int) -> bytes:
+    """Operadores de uma página densa: glifos de 2 pt e curvas de Bézier"""
+    rng = random.Random(seed)
+    ops = [b"BT"]
+    for _ in range(glyphs):
+        ops.append(b"/F1 2 Tf 1 0 0 1 %.1f %.1f Tm (%s) Tj" % (
+            rng.uniform(20, 580), rng.uniform(20, 820), bytes([rng.randint(97, 122)])
+        ))
+    ops.append(b"ET")
+    for _ in range(curves):
+        ops.append(b"%.1f %.1f m %.1f %.1f %.1f %.1f %.1f %.1f c S" % tuple(rng.uniform(0, 600) for _ in range(8)))
+    return b"\n".join(ops)
+
+
+def build(args) -> bytes:
+    generator = SyntheticPDFGenerator(CorpusConfig(pages=args.pages, seed=args.seed))
+    pages = [generator.page_lines(i + 1) for i in range(args.pages)]
+    step = max(1, args.pages // (args.dense + 1))
+    extra = {
+        step * (i + 1): dense_content(args.glyphs, args.curves, args.seed + i)
+        for i in range(min(args.dense, args.pages))
+    }
+    return build_pdf(pages, extra)
+
+
+def run(pdf: bytes, isolated: bool, args) -> Dict[str, Any]:
+    from api.services.extractors.page_text import ACCURATE
+    from api.services.extractors.page_worker import PageWorkerPool
+    from api.services.extractors.pdf_extractor import PDFExtractor
+
+    if isolated:
+        pool = PageWorkerPool(
+            size=1,
+            page_timeout=args.page_timeout,
+            page_memory_mb=args.page_memory_mb,
+            document_budget=args.document_budget
+        )
+        # Sobe o worker antes de medir: o custo do spawn é pago uma vez por processo
+        pool.extract(build_pdf([[(72, 720, "aquecimento")]]))
+        start = time.perf_counter()
+        pages, metadata = pool.extract(pdf)
+    else:
+        extractor = PDFExtractor()
+        extractor.page_workers = None
+        start = time.perf_counter()
+        pages, metadata = extractor._extract_pages(BytesIO(pdf), ACCURATE)
+    return {
+        "seconds": time.perf_counter() - start,
+        "pages": pages,
+        "degraded_pages": metadata.get("degraded_pages", [])
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Extração com orçamento por página vs. no próprio processo")
+    parser.add_argument("--pages", type=int, default=30)
+    parser.add_argument("--dense", type=int, default=3, help="Páginas patológicas")
+    parser.add_argument("--glyphs", type=int, default=60000)
+    parser.add_argument("--curves", type=int, default=60000)
+    parser.add_argument("--page-timeout", type=float, default=5.0)
+    parser.add_argument("--page-memory-mb", type=int, default=1024)
+    parser.add_argument("--document-budget", type=float, default=45.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Arquivo JSON com os resultados")
+    args = parser.parse_args()
+
+    pdf = build(args)
+    baseline = run(pdf, isolated=False, args=args)
+    isolated = run(pdf, isolated=True, args=args)
+
+    degraded = {item["page"] for item in isolated["degraded_pages"]}
+    normal = [i for i in range(args.pages) if i + 1 not in degraded]
+    preserved = sum(baseline["pages"][i] == isolated["pages"][i] for i in normal) / max(1, len(normal))
+
+    print(f"PDF: {args.pages} páginas, {args.dense} patológicas, {len(pdf) / 1e6:.1f} MB")
+    print(f"{'modo':<14}{'total (s)':>11}{'degradadas':>12}")
+    print(f"{'processo':<14}{baseline['seconds']:>11.2f}{0:>12}")
+    print(f"{'isolado':<14}{isolated['seconds']:>11.2f}{len(degraded):>12}")
+    for item in isolated["degraded_pages"]:
+        print(f"  página {item['page']}: {item['reason']} -> {item['mode']} ({item['seconds']:.2f} s)")
+    print(f"Páginas normais com texto idêntico: {100 * preserved:.1f}%")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({
+                "in_process_seconds": baseline["seconds"],
+                "isolated_seconds": isolated["seconds"],
+                "degraded_pages": isolated["degraded_pages"],
+                "normal_pages_preserved": preserved
+            }, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
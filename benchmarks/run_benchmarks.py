@@ -0,0 +1,269 @@
+"""
+Micro-benchmarks dos componentes: extração, análise, chunking, embedding,
+similaridade, construção de índice, consulta e orquestrador (LLM falso).
+
+Roda totalmente offline: embeddings por hashing (EMBEDDING_BACKEND=hashing)
+e LLM/busca web substituídos por fakes. Os resultados são gravados em JSON
+para comparação com `python -m benchmarks.compare`.
+
+Uso:
+    python -m benchmarks.run_benchmarks --pages 20 --repeat 5 --output benchmarks/results/base.json
+"""
+import os
+
+# Configuração offline antes de qualquer import da API
+os.environ.setdefault("EMBEDDING_BACKEND", "hashing")
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+import argparse
+import asyncio
+import json
+import platform
+import statistics
+import tempfile
+import time
+from io import BytesIO
+from typing import Any, Callable, Dict, List
+
+from benchmarks.fakes import FakeLLMService, FakeWebSearchService
+from benchmarks.synthetic_pdf import CorpusConfig, generate_pdf
+
+QUESTIONS = [
+    "Qual é o valor do pagamento mensal?",
+    "Quais são as obrigações do locatário?",
+    "Qual o prazo de vigência do contrato?",
+    "What is the termination penalty?"
+]
+
+
+def bench(name: str, fn: Callable[[], Any], repeat: int, warmup: int = 1, **info) -> Dict[str, Any]:
+    """Executa `fn` repetidas vezes e retorna estatísticas de tempo"""
+    for _ in range(warmup):
+        fn()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    times.sort()
+    result = {
+        "runs": repeat,
+        "min_s": times[0],
+        "median_s": statistics.median(times),
+        "mean_s": statistics.fmean(times),
+        "p95_s": times[min(len(times) - 1, int(0.95 * len(times)))],
+        **info
+    }
+    print(f"{name:<24} mediana {result['median_s'] * 1000:10.3f} ms  (min {result['min_s'] * 1000:.3f} ms)")
+    return result
+
+
+def run(args) -> Dict[str, Any]:
+    store_dir = tempfile.mkdtemp(prefix="bench-store-")
+    os.environ["DOCUMENT_STORE_DIR"] = store_dir
+
+    from api.services.extractors.pdf_extractor import PDFExtractor
+    from api.services.extractors.text_analyzer import TextAnalyzer
+    from api.services.extractors.text_chunker import TextChunker
+    from api.services.embeddings.embedding_provider import get_embeddings
+    from api.services.memory.conversation_memory import ConversationMemory
+    from api.services.memory.message_history import MessageHistory
+    from api.services.storage.document_store import DocumentStore
+    from api.services.storage.document_indexer import DocumentIndexer
+    from api.services.storage.vector_index import VectorIndex
+    from api.services.retrieval.sharded_retriever import ShardedRetriever
+    from api.services.agents.agent_orchestrator import AgentOrchestrator
+    from api.services.monitoring.metrics import registry, time_stage
+
+    config = CorpusConfig(pages=args.pages, language=args.language, seed=args.seed)
+    pdf = generate_pdf(config)
+    results: Dict[str, Any] = {}
+    selected = set(args.only.split(",")) if args.only else None
+
+    def enabled(name: str) -> bool:
+        return selected is None or name in selected
+
+    extractor = PDFExtractor()
+    doc_info = asyncio.run(extractor.process_pdf(BytesIO(pdf)))
+    if enabled("extraction"):
+        results["extraction"] = bench(
+            "extraction",
+            lambda: asyncio.run(extractor.process_pdf(BytesIO(pdf))),
+            args.repeat,
+            pages=args.pages,
+            bytes=len(pdf)
+        )
+
+    analyzer = TextAnalyzer()
+    if enabled("analysis"):
+        results["analysis"] = bench(
+            "analysis",
+            lambda: analyzer.analyze_content(doc_info["content"], doc_info["sections"]),
+            args.repeat,
+            chars=len(doc_info["content"])
+        )
+
+    chunker = TextChunker()
+    pieces = chunker.split_sections(doc_info["sections"])
+    chunks = [text for _, text in pieces]
+    if enabled("chunking"):
+        results["chunking"] = bench(
+            "chunking",
+            lambda: chunker.split_sections(doc_info["sections"]),
+            args.repeat,
+            chunks=len(chunks)
+        )
+
+    embeddings = get_embeddings()
+    vectors = embeddings.embed_documents(chunks)
+    if enabled("embedding"):
+        results["embedding"] = bench(
+            "embedding",
+            lambda: embeddings.embed_documents(chunks),
+            args.repeat,
+            chunks=len(chunks),
+            backend=embeddings.backend
+        )
+
+    memory = ConversationMemory()
+    query_vector = embeddings.embed_query(QUESTIONS[0])
+    if enabled("similarity"):
+        results["similarity"] = bench(
+            "similarity",
+            lambda: [memory._calculate_similarity(query_vector, v) for v in vectors],
+            args.repeat,
+            comparisons=len(vectors)
+        )
+
+    if enabled("history"):
+        history_state = {"conversation_history": MessageHistory(), "current_question": "", "answer": None}
+        for i in range(history_state["conversation_history"].capacity):
+            history_state["current_question"] = QUESTIONS[i % len(QUESTIONS)]
+            history_state["answer"] = chunks[i % len(chunks)]
+            memory.update_history(history_state)
+        results["history"] = bench(
+            "history",
+            lambda: [memory.get_relevant_history(history_state, q) for q in QUESTIONS],
+            args.repeat,
+            queries=len(QUESTIONS),
+            messages=len(history_state["conversation_history"])
+        )
+
+    store = DocumentStore(store_dir)
+    counter = iter(range(10 ** 9))
+    if enabled("index_build"):
+        results["index_build"] = bench(
+            "index_build",
+            lambda: VectorIndex(store.save(
+                f"build-{next(counter)}", doc_info, chunks, [s for s, _ in pieces], vectors
+            ), "float32"),
+            args.repeat,
+            chunks=len(chunks)
+        )
+
+    indexer = DocumentIndexer(embeddings, store)
+    document_ids = []
+    for i in range(args.documents):
+        item = CorpusConfig(pages=args.pages, language=args.language, seed=args.seed + i)
+        info = asyncio.run(extractor.process_pdf(BytesIO(generate_pdf(item))))
+        document_id = f"doc-{i}"
+        info["document_id"] = document_id
+        indexer.index(document_id, info)
+        document_ids.append(document_id)
+
+    stored = store.load(document_ids[0])
+    index = VectorIndex(stored, "mmap")
+    if enabled("query"):
+        results["query"] = bench(
+            "query",
+            lambda: [index.search(embeddings.embed_query(q), k=4) for q in QUESTIONS],
+            args.repeat,
+            queries=len(QUESTIONS),
+            chunks=len(stored)
+        )
+
+    retriever = ShardedRetriever(embeddings, store)
+    if enabled("sharded_query"):
+        results["sharded_query"] = bench(
+            "sharded_query",
+            lambda: [retriever.retrieve(q, document_ids, k=4) for q in QUESTIONS],
+            args.repeat,
+            queries=len(QUESTIONS),
+            documents=len(document_ids)
+        )
+
+    orchestrator = AgentOrchestrator()
+    for agent in orchestrator.agents:
+        agent.llm = FakeLLMService()
+        if hasattr(agent, "web_search"):
+            agent.web_search = FakeWebSearchService()
+
+    def ask_all():
+        state = {
+            "document": stored.to_document_info(),
+            "document_ids": document_ids,
+            "sources": [],
+            "conversation_history": MessageHistory(),
+            "current_question": "",
+            "web_results": [],
+            "selected_strategy": "",
+            "answer_path": "",
+            "answer": None,
+            "error": None
+        }
+        for question in QUESTIONS:
+            state["current_question"] = question
+            state = asyncio.run(orchestrator.process_question(state))
+
+    if enabled("orchestrator"):
+        results["orchestrator"] = bench(
+            "orchestrator",
+            ask_all,
+            args.repeat,
+            questions=len(QUESTIONS),
+            documents=len(document_ids)
+        )
+
+    # Custo da instrumentação: deve ser desprezível perto de qualquer etapa medida
+    if enabled("metrics"):
+        def observe_many():
+            for _ in range(1000):
+                with time_stage("bench"):
+                    pass
+
+        results["metrics"] = bench("metrics", observe_many, args.repeat, observations=1000)
+        results["metrics_render"] = bench("metrics_render", registry.render, args.repeat)
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmarks dos componentes")
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--language", choices=["pt", "en", "mixed"], default="pt")
+    parser.add_argument("--documents", type=int, default=4, help="Documentos para a busca em shards")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--only", help="Lista de benchmarks separados por vírgula")
+    parser.add_argument("--output", help="Arquivo JSON de saída")
+    args = parser.parse_args()
+
+    results = run(args)
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "args": vars(args)
+        },
+        "results": results
+    }
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Resultados gravados em {args.output}")
+
+
+if __name__ == "__main__":
+    main()
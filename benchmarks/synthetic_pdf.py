@@ -0,0 +1,307 @@
+"""
+Gerador reprodutível de PDFs sintéticos para benchmarks.
+
+Escreve o PDF diretamente (fonte Helvetica, WinAnsiEncoding), sem dependências
+externas. Páginas, seções, tabelas, idioma, cabeçalho/rodapé e cláusulas
+padrão repetidos são configuráveis; a mesma semente sempre gera o mesmo arquivo.
+
+Uso:
+    python -m benchmarks.synthetic_pdf --pages 20 --language pt --output corpus.pdf
+    python -m benchmarks.synthetic_pdf --corpus benchmarks/corpus --count 10
+"""
+import argparse
+import os
+import random
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+WORDS = {
+    "pt": (
+        "contrato prazo pagamento cláusula parte locador locatário valor mensal "
+        "reajuste índice rescisão multa notificação obrigação garantia imóvel "
+        "vigência renovação serviço fornecimento entrega responsabilidade seguro "
+        "relatório análise resultado projeto execução orçamento cronograma meta "
+        "qualidade auditoria conformidade política procedimento documento anexo "
+        "informação atualização revisão aprovação diretoria comitê operação"
+    ).split(),
+    "en": (
+        "contract term payment clause party landlord tenant amount monthly "
+        "adjustment index termination penalty notice obligation guarantee property "
+        "validity renewal service supply delivery liability insurance report "
+        "analysis result project execution budget schedule goal quality audit "
+        "compliance policy procedure document annex information update review "
+        "approval board committee operation"
+    ).split()
+}
+
+CONNECTORS = {
+    "pt": "de para com pelo pela nos nas que como está são conforme durante sobre".split(),
+    "en": "of for with by the in on that as is are according during about".split()
+}
+
+SECTION_TITLES = {
+    "pt": ["INTRODUÇÃO", "OBJETO", "PRAZO", "PAGAMENTO", "OBRIGAÇÕES", "RESCISÃO",
+           "GARANTIAS", "DISPOSIÇÕES GERAIS", "ANEXOS", "CRONOGRAMA", "ORÇAMENTO"],
+    "en": ["INTRODUCTION", "SCOPE", "TERM", "PAYMENT", "OBLIGATIONS", "TERMINATION",
+           "GUARANTEES", "GENERAL PROVISIONS", "ANNEXES", "SCHEDULE", "BUDGET"]
+}
+
+PAGE_WIDTH = 595
+PAGE_HEIGHT = 842
+MARGIN = 50
+FONT_SIZE = 10
+LEADING = 13
+CHARS_PER_LINE = 95
+
+
+SYLLABLES = ["ba", "ca", "de", "fi", "go", "lu", "ma", "ne", "ri", "so", "ta", "vi", "xu", "za", "tro", "mar", "len", "dor"]
+
+
+@dataclass
+class CorpusConfig:
+    pages: int = 10
+    sections_per_page: float = 1.5
+    tables_per_page: float = 0.3
+    language: str = "pt"  # pt, en ou mixed
+    headers: bool = True
+    boilerplate: float = 0.0  # probabilidade, por página, de repetir uma cláusula padrão
+    topical: float = 0.0  # fração das palavras tiradas dos termos próprios de cada seção
+    seed: int = 0
+
+
+class SyntheticPDFGenerator:
+    """Gera o texto das páginas e serializa o PDF"""
+
+    def __init__(self, config: CorpusConfig):
+        self.config = config
+        self.random = random.Random(config.seed)
+        self._section = 0
+        # Cláusula padrão fixa do documento, repetida em várias páginas
+        clause = random.Random(config.seed + 7919)
+        self._boilerplate = " ".join(
+            " ".join(clause.choice(WORDS["pt"]) for _ in range(14)).capitalize() + "."
+            for _ in range(6)
+        )
+        # Gerador separado: com topical=0 o documento é idêntico ao de versões anteriores
+        self._topic_random = random.Random(config.seed + 104729)
+        self._topic: List[str] = []
+
+    def _language(self) -> str:
+        if self.config.language == "mixed":
+            return self.random.choice(["pt", "en"])
+        return self.config.language
+
+    def _topic_terms(self) -> List[str]:
+        # Termos próprios da seção (nomes de produtos, partes, sistemas), inventados por sílabas
+        return [
+            "".join(self._topic_random.choice(SYLLABLES) for _ in range(self._topic_random.randint(3, 4)))
+            for _ in range(6)
+        ]
+
+    def _sentence(self, language: str) -> str:
+        words = []
+        for _ in range(self.random.randint(8, 20)):
+            pool = CONNECTORS[language] if self.random.random() < 0.3 else WORDS[language]
+            if pool is WORDS[language] and self._topic and self._topic_random.random() < self.config.topical:
+                pool = self._topic
+            words.append(self.random.choice(pool))
+        if self.random.random() < 0.3:
+            words.append(f"{self.random.randint(1, 31):02d}/{self.random.randint(1, 12):02d}/20{self.random.randint(20, 30)}")
+        if self.random.random() < 0.3:
+            words.append(f"R$ {self.random.randint(100, 99999)},{self.random.randint(0, 99):02d}")
+        sentence = " ".join(words)
+        return sentence[0].upper() + sentence[1:] + "."
+
+    def _wrap(self, text: str) -> List[str]:
+        lines, current = [], ""
+        for word in text.split():
+            if len(current) + len(word) + 1 > CHARS_PER_LINE:
+                lines.append(current)
+                current = word
+            else:
+                current = f"{current} {word}".strip()
+        if current:
+            lines.append(current)
+        return lines
+
+    def _table(self, language: str) -> List[List[str]]:
+        columns = self.random.randint(3, 5)
+        header = [self.random.choice(WORDS[language]).upper() for _ in range(columns)]
+        rows = [header]
+        for _ in range(self.random.randint(3, 8)):
+            rows.append([
+                self.random.choice(WORDS[language]) if c == 0 else str(self.random.randint(1, 9999))
+                for c in range(columns)
+            ])
+        return rows
+
+    def page_lines(self, page_number: int) -> List[Tuple[float, float, str]]:
+        """Retorna (x, y, texto) de cada linha da página"""
+        lines: List[Tuple[float, float, str]] = []
+        y = PAGE_HEIGHT - MARGIN
+        bottom = MARGIN + 2 * LEADING
+        language = self._language()
+
+        if self.config.headers:
+            lines.append((MARGIN, y, "EMPRESA EXEMPLO S.A. - DOCUMENTO CONFIDENCIAL"))
+            y -= 2 * LEADING
+
+        sections = int(self.config.sections_per_page) + (
+            1 if self.random.random() < self.config.sections_per_page % 1 else 0
+        )
+        section_starts = set(self.random.sample(range(1, 30), min(sections, 29)))
+        has_table = self.random.random() < self.config.tables_per_page
+        boilerplate_step = 3 if self.random.random() < self.config.boilerplate else -1
+        step = 0
+
+        while y > bottom:
+            step += 1
+            if step in section_starts:
+                self._section += 1
+                title = SECTION_TITLES[language][self._section % len(SECTION_TITLES[language])]
+                if self.config.topical:
+                    self._topic = self._topic_terms()
+                lines.append((MARGIN, y, f"{self._section}. {title}"))
+                y -= LEADING
+                continue
+
+            if has_table and step == 6:
+                has_table = False
+                for row in self._table(language):
+                    if y <= bottom:
+                        break
+                    for column, cell in enumerate(row):
+                        lines.append((MARGIN + column * 100, y, cell))
+                    y -= LEADING
+                continue
+
+            if step == boilerplate_step:
+                paragraph = self._boilerplate
+            else:
+                paragraph = " ".join(self._sentence(language) for _ in range(self.random.randint(1, 4)))
+            for line in self._wrap(paragraph):
+                if y <= bottom:
+                    break
+                lines.append((MARGIN, y, line))
+                y -= LEADING
+            y -= LEADING // 2
+
+        if self.config.headers:
+            lines.append((MARGIN, MARGIN, f"Página {page_number} - Uso interno"))
+        return lines
+
+    def generate(self) -> bytes:
+        pages = [self.page_lines(i + 1) for i in range(self.config.pages)]
+        return build_pdf(pages)
+
+
+def _escape(text: str) -> bytes:
+    encoded = text.encode("cp1252", errors="replace")
+    return encoded.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+
+
+def build_pdf(pages: List[List[Tuple[float, float, str]]], extra_content: Optional[Dict[int, bytes]] = None) -> bytes:
+    """
+    Serializa as páginas em um PDF mínimo válido. extra_content acrescenta
+    operadores crus ao conteúdo de algumas páginas (índice a partir de 0)
+    """
+    objects: List[bytes] = []
+
+    def add(obj: bytes) -> int:
+        objects.append(obj)
+        return len(objects)
+
+    catalog = add(b"")  # preenchido depois
+    pages_id = add(b"")
+    font = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+
+    page_ids = []
+    for index, lines in enumerate(pages):
+        stream = b"BT\n" + b"".join(
+            b"/F1 %d Tf 1 0 0 1 %.1f %.1f Tm (%s) Tj\n" % (FONT_SIZE, x, y, _escape(text))
+            for x, y, text in lines
+        ) + b"ET"
+        if extra_content and index in extra_content:
+            stream += b"\n" + extra_content[index]
+        content = add(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        page_ids.append(add(
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %d %d] "
+            b"/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>"
+            % (pages_id, PAGE_WIDTH, PAGE_HEIGHT, font, content)
+        ))
+
+    objects[catalog - 1] = b"<< /Type /Catalog /Pages %d 0 R >>" % pages_id
+    objects[pages_id - 1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % i for i in page_ids), len(page_ids)
+    )
+
+    output = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    offsets = []
+    for number, obj in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += b"%d 0 obj\n%s\nendobj\n" % (number, obj)
+
+    xref = len(output)
+    output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    output += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    output += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1, catalog, xref
+    )
+    return bytes(output)
+
+
+def generate_pdf(config: CorpusConfig) -> bytes:
+    """Gera um PDF sintético a partir da configuração"""
+    return SyntheticPDFGenerator(config).generate()
+
+
+def generate_corpus(directory: str, count: int, config: CorpusConfig) -> List[str]:
+    """Gera um diretório com `count` PDFs (sementes consecutivas)"""
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for i in range(count):
+        languages = ["pt", "en"] if config.language == "mixed" else [config.language]
+        item = CorpusConfig(**{**config.__dict__, "seed": config.seed + i, "language": languages[i % len(languages)]})
+        path = os.path.join(directory, f"synthetic_{item.language}_{item.seed:04d}.pdf")
+        with open(path, "wb") as f:
+            f.write(generate_pdf(item))
+        paths.append(path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera PDFs sintéticos reprodutíveis")
+    parser.add_argument("--pages", type=int, default=10)
+    parser.add_argument("--sections-per-page", type=float, default=1.5)
+    parser.add_argument("--tables-per-page", type=float, default=0.3)
+    parser.add_argument("--language", choices=["pt", "en", "mixed"], default="pt")
+    parser.add_argument("--no-headers", action="store_true", help="Sem cabeçalho/rodapé repetidos")
+    parser.add_argument("--boilerplate", type=float, default=0.0, help="Probabilidade de cláusula padrão por página")
+    parser.add_argument("--topical", type=float, default=0.0, help="Fração de palavras do vocabulário da seção")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="synthetic.pdf")
+    parser.add_argument("--corpus", help="Diretório para gerar vários PDFs")
+    parser.add_argument("--count", type=int, default=10)
+    args = parser.parse_args()
+
+    config = CorpusConfig(
+        pages=args.pages,
+        sections_per_page=args.sections_per_page,
+        tables_per_page=args.tables_per_page,
+        language=args.language,
+        headers=not args.no_headers,
+        boilerplate=args.boilerplate,
+        topical=args.topical,
+        seed=args.seed
+    )
+    if args.corpus:
+        paths = generate_corpus(args.corpus, args.count, config)
+        print(f"{len(paths)} PDFs gerados em {args.corpus}")
+    else:
+        with open(args.output, "wb") as f:
+            f.write(generate_pdf(config))
+        print(f"PDF gerado: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Relatório de compressão dos embeddings em memória: bytes por trecho,
+memória total e impacto no recall@k para cada tipo de índice.
+
+Uso:
+    python -m benchmarks.vector_compression --chunks 5000 --dim 384
+    python -m benchmarks.vector_compression --document-id <sha256> --store-dir data/documents
+"""
+import argparse
+import json
+import tempfile
+import time
+from typing import Dict, List
+
+import numpy as np
+
+from api.services.storage.document_store import DocumentStore, StoredDocument
+from api.services.storage.vector_index import INDEX_TYPES, VectorIndex
+
+
+def synthetic_embeddings(count: int, dim: int, clusters: int = 32, seed: int = 0) -> np.ndarray:
+    """Gera embeddings agrupados em clusters, parecidos com os de documentos reais"""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim))
+    labels = rng.integers(0, clusters, size=count)
+    vectors = centers[labels] + 0.6 * rng.normal(size=(count, dim))
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+def build_synthetic_document(store: DocumentStore, count: int, dim: int, seed: int) -> StoredDocument:
+    """Persiste um documento sintético com os embeddings gerados"""
+    vectors = synthetic_embeddings(count, dim, seed=seed)
+    doc_info = {"document_id": "synthetic", "content": "", "sections": {"main": ""}, "metadata": {}}
+    return store.save(
+        "synthetic",
+        doc_info,
+        chunks=[f"trecho {i}" for i in range(count)],
+        chunk_sections=["main"] * count,
+        embeddings=vectors
+    )
+
+
+def make_queries(stored: StoredDocument, count: int, seed: int) -> np.ndarray:
+    """Consultas próximas de trechos existentes, com ruído"""
+    rng = np.random.default_rng(seed + 1)
+    base = np.asarray(stored.embeddings[rng.integers(0, len(stored), size=count)], dtype=np.float32)
+    queries = base + 0.5 * rng.normal(size=base.shape) / np.sqrt(base.shape[1])
+    return queries / np.linalg.norm(queries, axis=1, keepdims=True)
+
+
+def evaluate(index: VectorIndex, queries: np.ndarray, truth: List[set], k: int, rerank: bool) -> Dict[str, float]:
+    """Mede recall@k e latência média por consulta"""
+    hits = 0
+    start = time.perf_counter()
+    for query, expected in zip(queries, truth):
+        found = {i for i, _ in index.search(query, k=k, rerank=rerank)}
+        hits += len(found & expected)
+    elapsed = time.perf_counter() - start
+    return {
+        "recall": hits / (len(queries) * k),
+        "query_ms": 1000 * elapsed / len(queries)
+    }
+
+
+def run(stored: StoredDocument, num_queries: int, k: int, seed: int) -> List[Dict[str, float]]:
+    queries = make_queries(stored, num_queries, seed)
+    exact = VectorIndex(stored, "float32")
+    truth = [{i for i, _ in exact.search(q, k=k)} for q in queries]
+
+    report = []
+    for index_type in INDEX_TYPES:
+        start = time.perf_counter()
+        index = VectorIndex(stored, index_type)
+        build_seconds = time.perf_counter() - start
+
+        row = {
+            "index_type": index.index_type,
+            "requested_type": index_type,
+            "bytes_per_chunk": index.bytes_per_chunk,
+            "memory_bytes": index.memory_bytes,
+            "build_seconds": round(build_seconds, 4)
+        }
+        for rerank in (False, True):
+            metrics = evaluate(index, queries, truth, k, rerank)
+            suffix = "rerank" if rerank else "approx"
+            row[f"recall_{suffix}"] = round(metrics["recall"], 4)
+            row[f"query_ms_{suffix}"] = round(metrics["query_ms"], 4)
+        report.append(row)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Relatório de compressão de embeddings")
+    parser.add_argument("--chunks", type=int, default=5000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--document-id", help="Usa um documento já persistido em vez de dados sintéticos")
+    parser.add_argument("--store-dir", default=None)
+    parser.add_argument("--output", help="Arquivo JSON para gravar o relatório")
+    args = parser.parse_args()
+
+    if args.document_id:
+        stored = DocumentStore(args.store_dir).load(args.document_id)
+        report = run(stored, args.queries, args.k, args.seed)
+    else:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            store = DocumentStore(tmp_dir, dtype="float32")
+            stored = build_synthetic_document(store, args.chunks, args.dim, args.seed)
+            report = run(stored, args.queries, args.k, args.seed)
+
+    header = f"{'tipo':<10}{'bytes/trecho':>14}{'memória (KB)':>14}{'recall':>10}{'recall+rr':>11}{'ms/consulta':>13}"
+    print(header)
+    print("-" * len(header))
+    for row in report:
+        print(
+            f"{row['requested_type']:<10}{row['bytes_per_chunk']:>14.1f}"
+            f"{row['memory_bytes'] / 1024:>14.1f}{row['recall_approx']:>10.3f}"
+            f"{row['recall_rerank']:>11.3f}{row['query_ms_rerank']:>13.3f}"
+        )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Memória e throughput da API com 1, 2, 4 e 8 workers (api.server, pré-fork).
+
+Para cada quantidade de workers, sobe a API contra os serviços fake, mede a
+memória da árvore de processos depois do aquecimento e depois da carga, e
+roda a mesma carga do teste de carga. A memória é reportada como soma de RSS
+(conta as páginas compartilhadas uma vez por processo), soma de PSS (divide
+as compartilhadas entre os processos: o custo real) e memória privada média
+por worker.
+
+Uso:
+    python -m benchmarks.workers --workers 1 2 4 8 --requests 300 --concurrency 32
+    # Com o modelo de verdade (precisa de torch e sentence-transformers)
+    python -m benchmarks.workers --embedding-backend huggingface
+"""
+import argparse
+import json
+import os
+from typing import Any, Dict, List
+
+from benchmarks.load.fake_services import FakeService, FakeServiceConfig
+from benchmarks.load.run_load import LoadRunner, add_load_arguments, fake_api_env, start_api, wait_ready
+
+
+def _children(pid: int) -> List[int]:
+    children = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # O nome do processo pode ter espaços: o ppid vem depois do último ")"
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        if ppid == pid:
+            children.append(int(entry))
+    return children
+
+
+def _rollup(pid: int) -> Dict[str, int]:
+    """Campos de /proc/<pid>/smaps_rollup, em kB"""
+    values = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) == 3 and parts[2] == "kB":
+                    values[parts[0].rstrip(":")] = int(parts[1])
+    except OSError:
+        pass
+    return values
+
+
+def tree_memory(pid: int) -> Dict[str, Any]:
+    """Memória do processo pai e de todos os workers, em MB"""
+    workers = _children(pid)
+    rollups = [_rollup(p) for p in [pid] + workers]
+    # Com um worker só, o próprio processo atende (uvicorn direto)
+    private = [r.get("Private_Clean", 0) + r.get("Private_Dirty", 0) for r in rollups[1:] or rollups]
+    return {
+        "processes": len(rollups),
+        "rss_mb": sum(r.get("Rss", 0) for r in rollups) / 1024,
+        "pss_mb": sum(r.get("Pss", 0) for r in rollups) / 1024,
+        "private_per_worker_mb": (sum(private) / len(private) / 1024) if private else 0.0
+    }
+
+
+def measure(workers: int, args) -> Dict[str, Any]:
+    config = FakeServiceConfig(args.latency_ms, args.jitter_ms, args.error_rate, args.seed)
+    services = [FakeService("openai", 0, config).start(), FakeService("duckduckgo", 0, config).start()]
+    env = fake_api_env(*services)
+    env["EMBEDDING_BACKEND"] = args.embedding_backend
+    process = start_api(args.api_port, env, workers)
+    try:
+        api_url = f"http://127.0.0.1:{args.api_port}"
+        wait_ready(api_url, timeout=300)
+        idle = tree_memory(process.pid)
+        report = LoadRunner(api_url, args).run()
+        loaded = tree_memory(process.pid)
+        return {
+            "workers": workers,
+            "idle": idle,
+            "loaded": loaded,
+            "throughput_rps": report["throughput_rps"],
+            "error_rate": report["error_rate"]
+        }
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+        for service in services:
+            service.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memória total e throughput por número de workers")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--embedding-backend", choices=["hashing", "huggingface"], default="hashing")
+    add_load_arguments(parser)
+    parser.add_argument("--output", help="Arquivo JSON com os resultados")
+    parser.set_defaults(concurrency=32, requests=300, latency_ms=100.0, jitter_ms=30.0)
+    args = parser.parse_args()
+
+    results = [measure(workers, args) for workers in args.workers]
+
+    print(f"{'workers':>8}{'RSS (MB)':>10}{'PSS (MB)':>10}{'priv/worker':>13}{'PSS carga':>11}{'req/s':>8}{'erros':>8}")
+    for item in results:
+        print(
+            f"{item['workers']:>8}{item['idle']['rss_mb']:>10.0f}{item['idle']['pss_mb']:>10.0f}"
+            f"{item['loaded']['private_per_worker_mb']:>13.1f}{item['loaded']['pss_mb']:>11.0f}"
+            f"{item['throughput_rps']:>8.2f}{100 * item['error_rate']:>7.1f}%"
+        )
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,24 @@
 import streamlit as st
 import requests
-from io import BytesIO
+from requests.adapters import HTTPAdapter
+import hashlib
+import os
 import time
 
+API_URL = os.getenv("API_URL", "http://api:8000")
+
+def read_timeout(variable: str, default: str):
+    """Prazo de leitura alguns segundos acima do prazo do servidor, para a UI receber o 504 dele"""
+    deadline = float(os.getenv(variable, default))
+    return deadline + 5 if deadline > 0 else None  # 0: servidor sem prazo, a UI também espera
+
+
+# (conexão, leitura) em segundos: servidor fora do ar falha rápido, respostas lentas têm o prazo todo.
+# Os prazos do servidor vêm das mesmas variáveis usadas pela API
+PROCESS_TIMEOUT = (3, read_timeout("PROCESS_PDF_TIMEOUT_SECONDS", "65"))
+CHAT_TIMEOUT = (3, read_timeout("CHAT_TIMEOUT_SECONDS", "30"))
+LOOKUP_TIMEOUT = (3, 10)
+
 # Configuração da página
 st.set_page_config(
     page_title="PDF Chat Assistant",
@@ -17,30 +33,99 @@ if "messages" not in st.session_state:
     st.session_state.messages = []
 if "pdf_info" not in st.session_state:
     st.session_state.pdf_info = None
+if "server_ready" not in st.session_state:
+    st.session_state.server_ready = False
 
-def check_server_connection():
-    """Verifica se o servidor está disponível"""
+@st.cache_resource
+def get_session():
+    """
+    Sessão HTTP compartilhada pelo processo do Streamlit: as conexões
+    keep-alive com a API são reaproveitadas entre reruns, perguntas e usuários
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=16)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+def check_server_ready():
+    """Verifica se o servidor terminou de carregar os modelos"""
     try:
-        response = requests.get("http://api:8000/health", timeout=2)
+        response = get_session().get(f"{API_URL}/ready", timeout=2)
         return response.ok
-    except:
+    except requests.RequestException:
         return False
 
-def wait_for_server(timeout=30):
-    """Espera o servidor iniciar"""
+def wait_for_server(timeout=120):
+    """Espera o servidor iniciar e carregar os modelos"""
     with st.spinner('Aguardando o servidor iniciar...'):
         start_time = time.time()
         while time.time() - start_time < timeout:
-            if check_server_connection():
+            if check_server_ready():
                 return True
             time.sleep(2)
     return False
 
-# Verifica a conexão com o servidor
-if not check_server_connection():
-    if not wait_for_server():
+def file_digest(uploaded_file):
+    """SHA-256 do arquivo (o mesmo id de documento da API), calculado uma vez por upload"""
+    key = (uploaded_file.name, uploaded_file.size, getattr(uploaded_file, "file_id", None))
+    cached = st.session_state.get("upload_digest")
+    if cached is None or cached[0] != key:
+        cached = (key, hashlib.sha256(uploaded_file.getvalue()).hexdigest())
+        st.session_state.upload_digest = cached
+    return cached[1]
+
+def error_message(response, action):
+    """Mensagem de erro da API para o usuário"""
+    if response.status_code == 503:
+        retry_after = response.headers.get("Retry-After")
+        wait = f" Tente novamente em {retry_after} segundos." if retry_after else " Tente novamente em instantes."
+        return f"O servidor está ocupado.{wait}"
+    if response.status_code == 504:
+        return f"O servidor excedeu o tempo limite ao {action}. Por favor, tente novamente."
+    try:
+        detail = response.json().get("detail", response.text)
+    except ValueError:
+        detail = response.text
+    return f"Erro ao {action}: {detail}"
+
+def open_processed_document(document_id):
+    """
+    Abre uma conversa sobre um documento que o servidor já processou, sem
+    reenviar o arquivo. Retorna None se o documento ainda não existe lá
+    """
+    session = get_session()
+    response = session.get(f"{API_URL}/documents/{document_id}", timeout=LOOKUP_TIMEOUT)
+    if response.status_code == 404:
+        return None
+    if not response.ok:
+        raise RuntimeError(error_message(response, "consultar o documento"))
+    document = response.json()
+    response = session.post(
+        f"{API_URL}/conversations",
+        json={"document_ids": [document_id]},
+        timeout=LOOKUP_TIMEOUT
+    )
+    if not response.ok:
+        raise RuntimeError(error_message(response, "abrir a conversa"))
+    document["conversation_id"] = response.json()["conversation_id"]
+    return document
+
+def upload_document(uploaded_file):
+    """Envia o PDF para processamento"""
+    files = {"file": (uploaded_file.name, uploaded_file.getvalue(), "application/pdf")}
+    response = get_session().post(f"{API_URL}/process-pdf", files=files, timeout=PROCESS_TIMEOUT)
+    if not response.ok:
+        raise RuntimeError(error_message(response, "processar o PDF"))
+    return response.json()
+
+# Verifica se o servidor está pronto (uma vez por sessão: depois, erros de
+# conexão aparecem na própria requisição, sem uma ida extra ao servidor)
+if not st.session_state.server_ready:
+    if not (check_server_ready() or wait_for_server()):
         st.error("O servidor está offline. Por favor, aguarde alguns instantes e recarregue a página.")
         st.stop()
+    st.session_state.server_ready = True
 
 # Interface principal
 st.title("PDF Chat Assistant")
@@ -50,41 +135,39 @@ with st.sidebar:
     st.header("📄 Upload de Documento")
     uploaded_file = st.file_uploader("Escolha um arquivo PDF", type="pdf")
     
-    # Upload de arquivo
-    if uploaded_file and (not st.session_state.pdf_info or uploaded_file.name != st.session_state.pdf_info.get("name")):
+    # Upload de arquivo: o documento é identificado pelo conteúdo, não pelo nome
+    document_id = file_digest(uploaded_file) if uploaded_file else None
+    if document_id and (not st.session_state.pdf_info or document_id != st.session_state.pdf_info.get("document_id")):
         with st.spinner('Processando o documento...'):
             try:
-                # Prepara o arquivo para envio
-                pdf_contents = uploaded_file.read()
-                files = {"file": (uploaded_file.name, pdf_contents, "application/pdf")}
+                # Documento já processado no servidor: só abre a conversa
+                data = open_processed_document(document_id)
+                if data is None:
+                    data = upload_document(uploaded_file)
                 
-                # Processa o PDF
-                response = requests.post(
-                    "http://api:8000/process-pdf",
-                    files=files,
-                    timeout=65  # 65 segundos para permitir o timeout de 60s do servidor
-                )
+                st.session_state.conversation_id = data["conversation_id"]
+                st.session_state.pdf_info = {
+                    "document_id": document_id,
+                    "name": uploaded_file.name,
+                    "analysis": data.get("analysis") or {},
+                    "degraded_pages": data.get("degraded_pages") or [],
+                    "extraction_profile": data.get("extraction_profile")
+                }
                 
-                if response.ok:
-                    data = response.json()
-                    st.session_state.conversation_id = data["conversation_id"]
-                    st.session_state.pdf_info = {
-                        "name": uploaded_file.name,
-                        "analysis": data["analysis"]
-                    }
-                    
-                    # Limpa mensagens anteriores
-                    st.session_state.messages = []
-                    
-                    # Adiciona mensagem de boas-vindas
-                    welcome_msg = f"O arquivo '{uploaded_file.name}' foi carregado com sucesso! Como posso ajudar?"
-                    st.session_state.messages.append({"role": "assistant", "content": welcome_msg})
-                    st.rerun()
-                else:
-                    st.error(f"Erro ao processar o PDF: {response.text}")
+                # Limpa mensagens anteriores
+                st.session_state.messages = []
+                
+                # Adiciona mensagem de boas-vindas
+                welcome_msg = f"O arquivo '{uploaded_file.name}' foi carregado com sucesso! Como posso ajudar?"
+                st.session_state.messages.append({"role": "assistant", "content": welcome_msg})
+                st.rerun()
                     
             except requests.Timeout:
                 st.error("O processamento do documento excedeu o tempo limite. Tente um arquivo menor.")
+            except requests.ConnectionError:
+                st.error("O servidor está temporariamente indisponível.")
+            except RuntimeError as e:
+                st.error(str(e))
             except Exception as e:
                 st.error(f"Erro ao processar o documento: {str(e)}")
 
@@ -115,6 +198,13 @@ with st.sidebar:
                 st.write(f"Sentenças: {metrics.get('num_sentences', 0)}")
                 st.write(f"Palavras: {metrics.get('num_words', 0)}")
 
+            if st.session_state.pdf_info.get("extraction_profile"):
+                st.subheader("Extração")
+                st.write(f"Perfil: {st.session_state.pdf_info['extraction_profile']}")
+                degraded = st.session_state.pdf_info.get("degraded_pages")
+                if degraded:
+                    st.write(f"Páginas degradadas: {len(degraded)}")
+
 # Área principal de chat
 for message in st.session_state.messages:
     with st.chat_message(message["role"]):
@@ -133,18 +223,13 @@ if prompt := st.chat_input("Digite sua pergunta sobre o documento..."):
         try:
             with st.chat_message("assistant"):
                 with st.spinner('Processando sua pergunta...'):
-                    # Verifica conexão
-                    if not check_server_connection():
-                        st.error("O servidor está temporariamente indisponível.")
-                        st.stop()
-                    
-                    # Envia a pergunta
-                    response = requests.post(
-                        f"http://api:8000/chat/{st.session_state.conversation_id}",
+                    # Envia a pergunta pela sessão compartilhada (conexão já aberta)
+                    response = get_session().post(
+                        f"{API_URL}/chat/{st.session_state.conversation_id}",
                         params={
                             "question": prompt
                         },
-                        timeout=30  # 30 segundos 
+                        timeout=CHAT_TIMEOUT
                     )
                     
                     if response.ok:
@@ -158,11 +243,15 @@ if prompt := st.chat_input("Digite sua pergunta sobre o documento..."):
                         
                         st.markdown(answer)
                         st.session_state.messages.append({"role": "assistant", "content": answer})
+                    elif response.status_code in (503, 504):
+                        st.error(error_message(response, "responder"))
                     else:
                         st.error("Erro ao processar sua pergunta. Por favor, tente novamente.")
 
         except requests.Timeout:
             st.error("A resposta demorou muito. Por favor, tente novamente.")
+        except requests.ConnectionError:
+            st.error("O servidor está temporariamente indisponível.")
         except Exception as e:
             st.error(f"Erro ao processar sua pergunta: {str(e)}")
 